@@ -0,0 +1,36 @@
+import sys
+sys.path.extend(['..', '../src/modules'])
+
+import argparse
+from pathlib import Path
+
+from src.modules.archive import SongArchive
+
+# command-line interface
+if ("archive_songs.py" in sys.argv[0]):
+
+    desc = "Script to move known songs between songs.json and the SQLite song archive."
+    parser = argparse.ArgumentParser(description=desc)
+    subparsers = parser.add_subparsers(dest = "command", required = True)
+
+    import_parser = subparsers.add_parser("import", help = "import a songs.json file into the archive")
+    export_parser = subparsers.add_parser("export", help = "export the archive to a songs.json file")
+
+    for subparser in [import_parser, export_parser]:
+        subparser.add_argument("-j", dest = "json", type = Path, default = Path('../output/songs.json'),
+            help = "songs.json file (default: ../output/songs.json)")
+
+        subparser.add_argument("-a", dest = "archive", type = Path, default = Path('../output/songs.db'),
+            help = "SQLite song archive (default: ../output/songs.db)")
+
+    args = parser.parse_args()
+    archive = SongArchive(args.archive)
+
+    if (args.command == "import"):
+        print(f'imported {archive.import_JSON(args.json)} songs from {args.json} into {args.archive}')
+
+    elif (args.command == "export"):
+        archive.export_JSON(args.json)
+        print(f'exported {len(archive)} songs from {args.archive} to {args.json}')
+
+    archive.close()
@@ -0,0 +1,366 @@
+import sys
+sys.path.extend(['..', '../src/modules'])
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Iterator, List, TextIO, Tuple
+
+from src.modules.connection import Connection
+from src.modules.core.config import Config
+from src.modules.core.submission import Submission, SubmissionBatch, Fetcher, Pager, Title
+from src.modules.core.timestamp import Timestamp, day
+from src.modules.store import SongStore
+from src.modules.fixtures import Fixture
+
+# Reddit serves listings in pages of (at most) 100 submissions
+page_size = 100
+
+def timed(f: Callable[[], List]) -> Tuple[List, float]:
+    start = time.perf_counter()
+    result = f()
+    return (result, time.perf_counter() - start)
+
+def fetch(days: int, size: int, latency: float):
+    """Compare the doubling fetch strategy against cursor-based streaming on the same fake "new" listing."""
+
+    connection = Connection(Config('client_id', 'client_secret', 'username', 'password'))
+    listing = Fixture.listing(size)
+    since = Timestamp.now() - days*day
+
+    # doubling: every retry re-downloads the whole (larger) batch, in pages of 100
+    doubling_requests: List[int] = []
+
+    def doubling(limit: int) -> Iterator[Submission]:
+        doubling_requests.extend([page_size] * -(-limit // page_size))
+        return iter(listing[:limit])
+
+    # streaming: one request per page, following the 'after' cursor
+    streaming_requests: List[int] = []
+
+    doubled, doubling_time = timed(lambda: connection.fetch_submissions(fetcher = Fetcher(doubling), since = since, limit = page_size))
+    streamed, streaming_time = timed(lambda: list(connection.stream_submissions(pager = Pager(Fixture.pager(listing, streaming_requests)), since = since, limit = size)))
+
+    print(f"{len(streamed)} submissions posted in the last {days} days (listing of {size}, {latency}s per request)\n")
+    print(f"  strategy  | requests | transferred | est. latency | cpu")
+    print(f"  doubling  | {len(doubling_requests):8d} | {sum(doubling_requests):11d} | {len(doubling_requests)*latency:11.1f}s | {doubling_time*1000:.2f}ms")
+    print(f"  streaming | {len(streaming_requests):8d} | {sum(streaming_requests):11d} | {len(streaming_requests)*latency:11.1f}s | {streaming_time*1000:.2f}ms")
+
+def history() -> List[str]:
+    """Every raw title in songs.json and in the monthly playlists."""
+
+    with open('../output/songs.json') as songs:
+        titles = [song['raw_title'] for song in json.load(songs)]
+
+    # playlist lines look like "  12)  31.4^ | Artist - Song [subgenre]"
+    for playlist in sorted(glob.glob('../../monthly_playlist/*.txt')):
+        with open(playlist, encoding='utf-8') as lines:
+            titles.extend(line.split(' | ', 1)[1].rstrip('\n') for line in lines if ' | ' in line)
+
+    return titles
+
+def parse(repeat: int):
+    """Measure Title.parse() throughput over every title in the archive and the monthly playlists."""
+
+    titles = history()
+    errors = 0
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for title in titles:
+            try:
+                Title.parse(title)
+            except ValueError:
+                errors += 1
+    elapsed = time.perf_counter() - start
+
+    print(f"parsed {len(titles)} titles x {repeat} in {elapsed:.2f}s ({errors // repeat} unparseable)")
+    print(f"  {len(titles) * repeat / elapsed:,.0f} titles/sec")
+
+def reparse(size: int, chunksize: int):
+    """Measure Title.parse_many() on a large synthetic archive, with 1, 2, 4, ... worker processes."""
+
+    titles = history()
+    archive = [titles[i % len(titles)] for i in range(size)]
+    cpus = os.cpu_count() or 1
+
+    print(f"reparsing a synthetic archive of {size} titles ({cpus} CPUs)\n")
+    print(f"  workers | time   | titles/sec | speedup")
+
+    workers = 1
+    baseline = None
+    while (workers <= cpus):
+        start = time.perf_counter()
+        parsed = Title.parse_many(archive, workers, chunksize)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"  {workers:7d} | {elapsed:5.2f}s | {size / elapsed:10,.0f} | {baseline / elapsed:.2f}x")
+        workers *= 2
+
+    errors = len([title for title in parsed if isinstance(title, ValueError)])
+    print(f"\n  {errors} titles could not be parsed")
+
+def archive(size: int) -> List[Submission]:
+    """A synthetic archive of 'size' songs, newest first, one every ~6 hours."""
+
+    now = int(Timestamp.now())
+    return [Submission(now - i * 6*3600, 'Rock', f'Artist {i} - Song {i}', 10, 0.9, f't3_{i:x}') for i in range(size)]
+
+def merge(sizes: List[int], batch: int):
+    """Compare merging a batch of pulled songs into the archive with a timestamp list vs. with a SongStore."""
+
+    print(f"merging {batch} pulled songs (half new, half updated) into the archive\n")
+    print(f"  archive size | list.index | SongStore.upsert_many")
+
+    for size in sizes:
+        songs = archive(size)
+        newest = songs[0].timestamp
+        pulled = [Submission(newest + (i + 1) * 3600, 'Rock', f'New {i} - Song', 1, 1.0, f't3_new{i}') for i in range(batch // 2)]
+        pulled += [Submission(s.timestamp, s.flair, s.raw_title, s.score + 1, s.upvote_ratio, s.fullname) for s in songs[:batch - batch // 2]]
+
+        # the previous implementation of update_songs.update()
+        def list_merge():
+            merged = list(songs)
+            timestamps = list(map(lambda song: song.timestamp, merged))
+            for song in pulled:
+                try:
+                    index = timestamps.index(song.timestamp)
+                    merged[index] = song
+                except:
+                    merged.append(song)
+
+        store = SongStore(songs)
+
+        _, list_time = timed(list_merge)
+        _, store_time = timed(lambda: store.upsert_many(pulled))
+
+        print(f"  {size:12,d} | {list_time*1000:8.1f}ms | {store_time*1000:8.3f}ms")
+
+def legacy_as_JSON(s: Submission) -> str:
+    """The previous implementation of Submission.as_JSON(), for a processed Submission."""
+
+    fullname = f',\n"fullname"    : {json.dumps(s.fullname)}' if s.fullname else ''
+
+    if (not s.is_song()):
+        return (
+            '{'
+            f'\n"timestamp"   : {s.timestamp},'
+            f'\n"flair"       : {json.dumps(s.flair, ensure_ascii=False)},'
+            f'\n"raw_title"   : {json.dumps(s.raw_title, ensure_ascii=False)},'
+            f'\n"score"       : {s.score},'
+            f'\n"upvote_ratio": {s.upvote_ratio}'
+            f'{fullname}'
+            '\n}'
+        )
+
+    return (
+        '{'
+        f'\n"timestamp"   : {s.timestamp},'
+        f'\n"flair"       : {json.dumps(s.flair, ensure_ascii=False)},'
+        f'\n"raw_title"   : {json.dumps(s.raw_title, ensure_ascii=False)},'
+        f'\n"score"       : {s.score},'
+        f'\n"upvote_ratio": {s.upvote_ratio},'
+        f'\n"artist"      : {json.dumps(s.artist, ensure_ascii=False)},'
+        f'\n"song_title"  : {json.dumps(s.song_title, ensure_ascii=False)},'
+        f'\n"featuring"   : {json.dumps(s.featuring, ensure_ascii=False)},'
+        f'\n"subgenre"    : {json.dumps(s.subgenre, ensure_ascii=False)},'
+        f'\n"year"        : {s.year or "null"}'
+        f'{fullname}'
+        '\n}'
+    )
+
+def rss() -> int:
+    """Current resident set size of this process, in bytes."""
+
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+def measure(write: Callable[[TextIO], None], results: multiprocessing.Queue) -> None:
+    """Run one serialisation strategy (in a fresh process, so that peak RSS is its own), then trace its allocations."""
+
+    with tempfile.TemporaryFile('w+', encoding='utf-8') as outfile:
+        before = rss()
+        start = time.perf_counter()
+        write(outfile)
+        elapsed = time.perf_counter() - start
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 - before
+
+        outfile.seek(0)
+        outfile.truncate()
+        tracemalloc.start()
+        write(outfile)
+        _, peak_traced = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results.put((elapsed, max(peak_rss, 0), peak_traced, outfile.tell()))
+
+def serialise(size: int):
+    """Compare ", ".join() of the previous as_JSON() against streaming Submission.write_JSON(), on a synthetic archive."""
+
+    songs = archive(size)
+    for song in songs:
+        song.process()
+
+    def join(outfile: TextIO) -> None:
+        # the previous implementation of update_songs.update()
+        print("[", file=outfile)
+        print(", ".join(map(legacy_as_JSON, songs)), file=outfile)
+        print("]", file=outfile)
+
+    def stream(outfile: TextIO) -> None:
+        Submission.write_JSON(songs, outfile)
+
+    print(f"serialising a synthetic archive of {size:,} songs\n")
+    print(f"  strategy   | time   | records/sec | peak RSS  | peak traced | output")
+
+    context = multiprocessing.get_context('fork')
+    for name, write in [("join", join), ("write_JSON", stream)]:
+        results = context.Queue()
+        process = context.Process(target = measure, args = (write, results))
+        process.start()
+        elapsed, peak_rss, peak_traced, output = results.get()
+        process.join()
+        print(f"  {name:10s} | {elapsed:5.2f}s | {size / elapsed:11,.0f} | {peak_rss / 2**20:6.1f}MiB | {peak_traced / 2**20:8.1f}MiB | {output / 2**20:.1f}MiB")
+
+class LegacySubmission:
+    """The previous (dict-backed) Submission, which grew its parsed fields as attributes when processed."""
+
+    def __init__(self, timestamp, flair, raw_title, score, upvote_ratio, fullname):
+        self.timestamp = timestamp
+        self.flair = flair
+        self.raw_title = raw_title
+        self.score = score
+        self.upvote_ratio = upvote_ratio
+        self.fullname = fullname
+
+class LegacyTitle:
+    def __init__(self, artist, song_title, featuring, subgenre, year):
+        self.artist = artist
+        self.song_title = song_title
+        self.featuring = featuring
+        self.subgenre = subgenre
+        self.year = year
+
+def memory(size: int):
+    """Compare the memory used by, and the time taken to filter and sort, 'size' processed songs in each representation."""
+
+    flairs = ["Rock", "Jazz", "Electronic", "Math Rock", "Discussion"]
+    now = int(Timestamp.now())
+
+    # parsed fields as loaded from songs.json; each record has its own strings, as it would after json.load()
+    def fields(i: int) -> Tuple:
+        return (now - i * 600, ''.join(flairs[i % 5]), f'Artist {i} - Song {i} [subgenre {i % 50}]', i % 40, 0.9, f't3_{i:x}',
+                f'Artist {i}', f'Song {i}', [], f'subgenre {i % 50}', None)
+
+    def legacy(i: int) -> LegacySubmission:
+        f = fields(i)
+        s = LegacySubmission(*f[:6])
+        parsed = LegacyTitle(*f[6:])
+        s.artist, s.song_title, s.featuring, s.subgenre, s.year = parsed.artist, parsed.song_title, parsed.featuring, parsed.subgenre, parsed.year
+        return s
+
+    def slotted(i: int) -> Submission:
+        f = fields(i)
+        s = Submission(*f[:6])
+        s.artist, s.song_title, s.featuring, s.subgenre, s.year = f[6:]
+        return s
+
+    def load(make: Callable[[int], object]) -> Tuple[object, int]:
+        tracemalloc.start()
+        loaded = make()
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return (loaded, size)
+
+    def sort_songs(songs: List) -> List:
+        # as in Pull.songs() / update_songs.update()
+        return sorted(filter(lambda s: s.flair != 'Discussion', songs), key = lambda s: -s.timestamp)
+
+    print(f"holding {size:,} processed songs in memory\n")
+    print(f"  representation   | memory    | bytes/song | filter + sort")
+
+    for name, make, sort in [
+        ("dict-backed", lambda: [legacy(i) for i in range(size)], sort_songs),
+        ("__slots__", lambda: [slotted(i) for i in range(size)], sort_songs),
+        ("SubmissionBatch", lambda: SubmissionBatch(slotted(i) for i in range(size)), lambda b: b.songs().sorted(newest_first = True)),
+        ("SongStore", lambda: SongStore(slotted(i) for i in range(size)), lambda s: s.batch.songs().sorted(newest_first = True))]:
+
+        loaded, used = load(make)
+        _, elapsed = timed(lambda: sort(loaded))
+        print(f"  {name:16s} | {used / 2**20:6.1f}MiB | {used / size:10.0f} | {elapsed*1000:10.1f}ms")
+        del loaded
+
+# command-line interface
+if ("benchmark.py" in sys.argv[0]):
+
+    desc = "Benchmarks for the r/nearprog submission pipeline."
+    parser = argparse.ArgumentParser(description=desc)
+    subparsers = parser.add_subparsers(dest = "benchmark", required = True)
+
+    fetch_parser = subparsers.add_parser("fetch", help = "doubling vs. streaming submission fetching")
+
+    fetch_parser.add_argument("-d", dest = "days", type = int, default = 100,
+        help = "days of submissions to fetch from today backward (default: 100)")
+
+    fetch_parser.add_argument("-n", dest = "size", type = int, default = 1000,
+        help = "number of submissions in the fake listing (default: 1000)")
+
+    fetch_parser.add_argument("-l", dest = "latency", type = float, default = 0.5,
+        help = "assumed seconds per request to Reddit (default: 0.5)")
+
+    parse_parser = subparsers.add_parser("parse", help = "Title.parse() throughput over the full title history")
+
+    parse_parser.add_argument("-r", dest = "repeat", type = int, default = 20,
+        help = "number of passes over the title history (default: 20)")
+
+    reparse_parser = subparsers.add_parser("reparse", help = "Title.parse_many() scaling over a synthetic archive")
+
+    reparse_parser.add_argument("-n", dest = "size", type = int, default = 500000,
+        help = "number of titles in the synthetic archive (default: 500000)")
+
+    reparse_parser.add_argument("-c", dest = "chunksize", type = int, default = 1000,
+        help = "number of titles parsed per chunk (default: 1000)")
+
+    merge_parser = subparsers.add_parser("merge", help = "merging pulled songs into the archive")
+
+    merge_parser.add_argument("-n", dest = "sizes", type = int, nargs = "+", default = [10**5, 10**6],
+        help = "archive sizes to test (default: 100000 1000000)")
+
+    merge_parser.add_argument("-b", dest = "batch", type = int, default = 100,
+        help = "number of pulled songs to merge (default: 100)")
+
+    serialise_parser = subparsers.add_parser("serialise", help = "writing the archive to songs.json")
+
+    serialise_parser.add_argument("-n", dest = "size", type = int, default = 10**5,
+        help = "number of songs in the synthetic archive (default: 100000)")
+
+    memory_parser = subparsers.add_parser("memory", help = "memory used by dict-backed, slotted and columnar Submissions, and by a SongStore")
+
+    memory_parser.add_argument("-n", dest = "size", type = int, default = 10**6,
+        help = "number of songs to hold in memory (default: 1000000)")
+
+    args = parser.parse_args()
+
+    if (args.benchmark == "fetch"):
+        fetch(args.days, args.size, args.latency)
+
+    elif (args.benchmark == "parse"):
+        parse(args.repeat)
+
+    elif (args.benchmark == "reparse"):
+        reparse(args.size, args.chunksize)
+
+    elif (args.benchmark == "merge"):
+        merge(args.sizes, args.batch)
+
+    elif (args.benchmark == "serialise"):
+        serialise(args.size)
+
+    elif (args.benchmark == "memory"):
+        memory(args.size)
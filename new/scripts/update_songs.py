@@ -2,49 +2,83 @@ import sys
 sys.path.extend(['..', '../src/modules'])
 
 import argparse
-import json
-from typing import List
+from pathlib import Path
 
 from src.pull import Pull
-from src.modules.core.submission import Submission
+from src.modules.core.submission import ParseCache, SubmissionBatch
 from src.modules.core.timestamp import Timestamp, day
+from src.modules.archive import SongArchive
+from src.modules.songlog import SongLog
 
-def update(since: int, limit: int):
+def update(since: int, limit: int, store: str = 'json'):
 
     # pull submissions (max 1000)
     pulled = Pull.songs(since, limit)
 
     # sort newest -> oldest
-    new_songs: List[Submission] = sorted(pulled, key = lambda s: -s.timestamp)
+    new_songs: SubmissionBatch = pulled.sorted(newest_first = True)
 
-    # output file
+    if (store == 'sqlite'):
+        update_archive(new_songs)
+        return
+
+    if (store == 'log'):
+        update_log(new_songs)
+        return
+
+    # output file; the log of upserts left by '-s log' runs (if any) is read and folded in too, so that none are lost
     songs_json = '../output/songs.json'
+    log = SongLog(Path(songs_json))
 
     # read in known songs
-    with open(songs_json) as songs:
-        songs: List[Submission] = list(map(lambda x: Submission.deserialise(x), json.load(songs)))
+    store = log.read()
+
+    # update known songs (with the new data we've fetched) and add new songs
+    store.upsert_many(new_songs)
+    songs: SubmissionBatch = store.newest_first()
+
+    # parse song titles, using the persistent cache so that only new titles are actually parsed
+    cache = ParseCache(Path('../output/parse_cache.db'))
+    songs.process(cache)
+    cache.close()
+
+    # rewrite the "known songs" file, and empty the log (which has been folded into it)
+    log.rewrite(songs)
+    print(f'{songs_json} has been updated')
 
-    # use timestamps as primary keys
-    timestamps = list(map(lambda song: song.timestamp, songs))
+def update_archive(new_songs: SubmissionBatch):
 
-    # update known songs and add new songs
-    for song in new_songs:
+    # output file
+    songs_db = '../output/songs.db'
+
+    # parse only the pulled song titles; the archive already holds every other parsed song
+    cache = ParseCache(Path('../output/parse_cache.db'))
+    new_songs.process(cache)
+    cache.close()
+
+    # update known songs and add new songs, in a single transaction
+    archive = SongArchive(Path(songs_db))
+    archive.upsert_many(new_songs)
+    archive.close()
+    print(f'{songs_db} has been updated')
 
-        # if we already know about this song, update it with the new data we've fetched
-        try:
-            index = timestamps.index(song.timestamp)
-            songs[index] = song
+def update_log(new_songs: SubmissionBatch):
 
-        # if this song is new to us, add it to the list of known songs
-        except:
-            songs.append(song)
+    # output files: songs.json is the snapshot, songs.jsonl the log of upserts since
+    log = SongLog(Path('../output/songs.json'))
 
-    # rewrite the "known songs" file
-    with open(songs_json, 'w') as outfile:
-        print("[", file=outfile)
-        print(", ".join(map(lambda s: s.as_JSON(), sorted(songs, key = lambda s: -s.timestamp))), file=outfile)
-        print("]", file=outfile)
-        print(f'{songs_json} has been updated')
+    # parse only the pulled song titles; every other song is already parsed in the snapshot or the log
+    cache = ParseCache(Path('../output/parse_cache.db'))
+    new_songs.process(cache)
+    cache.close()
+
+    # append the pulled songs, then fold the log into songs.json once it has grown large enough
+    log.append(new_songs)
+    print(f'{log.log} has been updated')
+
+    if (log.needs_compaction()):
+        log.compact()
+        print(f'{log.snapshot} has been compacted')
 
 # command-line interface
 if ("update_songs.py" in sys.argv[0]):
@@ -58,5 +92,8 @@ if ("update_songs.py" in sys.argv[0]):
     parser.add_argument('-m', dest = "max", type = int, default = 1000,
         help = "maximum number of submissions to fetch from Reddit (default: 1000, oldest are returned first)")
 
+    parser.add_argument('-s', dest = "store", choices = ['json', 'sqlite', 'log'], default = 'json',
+        help = "where known songs are kept: ../output/songs.json, ../output/songs.db, or ../output/songs.json plus a log of upserts in ../output/songs.jsonl (default: json)")
+
     args = parser.parse_args()
-    update(Timestamp.now() - args.days*day, args.max)
\ No newline at end of file
+    update(Timestamp.now() - args.days*day, args.max, args.store)
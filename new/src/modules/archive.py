@@ -0,0 +1,125 @@
+import json
+from pathlib import Path
+import sqlite3
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from core.submission import Submission
+import records
+from store import SongStore
+
+class SongArchive:
+    """An SQLite-backed archive of Submissions, replacing the all-at-once songs.json file.
+
+    Each Submission is one row, keyed like SongStore (by fullname, or by timestamp for songs archived before fullnames
+    were recorded), with indexes on timestamp, flair, artist and subgenre. Upserts are batched into a single transaction,
+    so a run only writes the songs which it actually pulled.
+    """
+
+    columns = ['key', 'timestamp', 'flair', 'raw_title', 'score', 'upvote_ratio', 'fullname',
+               'artist', 'song_title', 'featuring', 'subgenre', 'year']
+
+    def __init__(self, path: Path) -> None:
+        self.db = sqlite3.connect(str(path))
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS submissions (
+                key          TEXT PRIMARY KEY,
+                timestamp    INTEGER NOT NULL,
+                flair        TEXT,
+                raw_title    TEXT NOT NULL,
+                score        INTEGER,
+                upvote_ratio REAL,
+                fullname     TEXT,
+                artist       TEXT,
+                song_title   TEXT,
+                featuring    TEXT,
+                subgenre     TEXT,
+                year         INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS submissions_timestamp ON submissions (timestamp);
+            CREATE INDEX IF NOT EXISTS submissions_flair     ON submissions (flair);
+            CREATE INDEX IF NOT EXISTS submissions_artist    ON submissions (artist);
+            CREATE INDEX IF NOT EXISTS submissions_subgenre  ON submissions (subgenre);
+        ''')
+
+    @staticmethod
+    def row(submission: Submission) -> List[Any]:
+        """Returns this Submission as a row of values, in the order of SongArchive.columns."""
+
+        # only processed songs have 'artist', 'song_title', etc.
+        parsed = hasattr(submission, 'artist')
+
+        return [SongStore.key(submission), submission.timestamp, submission.flair, submission.raw_title,
+                submission.score, submission.upvote_ratio, submission.fullname,
+                submission.artist if parsed else None,
+                submission.song_title if parsed else None,
+                json.dumps(submission.featuring, ensure_ascii=False) if parsed else None,
+                submission.subgenre if parsed else None,
+                submission.year if parsed else None]
+
+    @staticmethod
+    def submission(row: Iterable[Any]) -> Submission:
+        """Creates a Submission from a row of values, in the order of SongArchive.columns."""
+
+        fields: Dict[str, Any] = dict(zip(SongArchive.columns, row))
+        submission = Submission(fields['timestamp'], fields['flair'], fields['raw_title'], fields['score'], fields['upvote_ratio'], fields['fullname'])
+
+        if (fields['featuring'] is not None):
+            submission.artist = fields['artist']
+            submission.song_title = fields['song_title']
+            submission.featuring = json.loads(fields['featuring'])
+            submission.subgenre = fields['subgenre']
+            submission.year = fields['year']
+
+        return submission
+
+    def upsert_many(self, submissions: Iterable[Submission]) -> int:
+        """Inserts or replaces these Submissions in a single transaction. Returns the number of Submissions written."""
+
+        rows = [SongArchive.row(s) for s in submissions]
+
+        with self.db:
+            # a pulled song replaces any copy archived (by timestamp) before we recorded fullnames
+            self.db.executemany('DELETE FROM submissions WHERE key = ?',
+                [(SongStore.legacy_key(row[1]),) for row in rows if row[6] is not None])
+
+            self.db.executemany(f'INSERT OR REPLACE INTO submissions VALUES ({", ".join("?" * len(SongArchive.columns))})', rows)
+
+        return len(rows)
+
+    def query(self, where: str = '', parameters: Iterable[Any] = ()) -> Iterator[Submission]:
+        cursor = self.db.execute(f'SELECT {", ".join(SongArchive.columns)} FROM submissions {where} ORDER BY timestamp DESC, key', tuple(parameters))
+        return map(SongArchive.submission, cursor)
+
+    def between(self, start: Optional[int] = None, end: Optional[int] = None) -> Iterator[Submission]:
+        """Yields Submissions posted in [start, end) (either may be None), newest first."""
+
+        return self.query('WHERE timestamp >= ? AND timestamp < ?', (start or 0, end if end is not None else 2**63 - 1))
+
+    def by_flair(self, flair: str) -> Iterator[Submission]:
+        return self.query('WHERE flair = ?', (flair,))
+
+    def by_artist(self, artist: str) -> Iterator[Submission]:
+        return self.query('WHERE artist = ?', (artist,))
+
+    def by_subgenre(self, subgenre: str) -> Iterator[Submission]:
+        return self.query('WHERE subgenre = ?', (subgenre,))
+
+    def __iter__(self) -> Iterator[Submission]:
+        return self.query()
+
+    def __len__(self) -> int:
+        return self.db.execute('SELECT COUNT(*) FROM submissions').fetchone()[0]
+
+    def import_JSON(self, path: Path) -> int:
+        """One-shot import of a songs.json file. Returns the number of Submissions imported."""
+
+        return self.upsert_many(records.submissions(path))
+
+    def export_JSON(self, path: Path) -> None:
+        """Writes every archived Submission to a file in the songs.json format (newest first)."""
+
+        with path.open('w') as outfile:
+            Submission.write_JSON(self, outfile)
+
+    def close(self) -> None:
+        self.db.close()
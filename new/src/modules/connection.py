@@ -2,10 +2,10 @@ from praw import Reddit
 from praw.models import Subreddit
 from prawcore.exceptions import OAuthException, PrawcoreException, ResponseException
 from requests.models import Response
-from typing import List, Optional
+from typing import Iterator, List, Optional
 
 from core.config import Config
-from core.submission import Submission, Fetcher
+from core.submission import Submission, Fetcher, Pager
 from core.timestamp import Timestamp, day
 
 class Connection:
@@ -56,24 +56,44 @@ class Connection:
 
         return self.reddit().subreddit('nearprog')
 
+    def stream_submissions(self, pager: Optional[Pager] = None, since: int = Timestamp.now() - 10*day, limit: int = 1000, page_size: int = 100) -> Iterator[Submission]:
+        """Lazily yields submissions (newest first) since the given UTC UNIX timestamp, one page at a time.
+
+        Walks the listing with the 'after' cursor, so each submission is downloaded at most once, and stops at the
+        first submission older than 'since'. At most ceil(limit / page_size) requests are made.
+
+        If no argument is passed for 'pager' (or it is None), this method will page through the newest posts from r/nearprog.
+        """
+
+        # if None is provided, use the default (live) Submission pager
+        default_pager = Pager(lambda after, n: map(lambda s: Submission.wrap(s), self.nearprog().new(limit=n, params={'after': after})))
+        max_pages = -(-limit // page_size)
+
+        for count, submission in enumerate((pager or default_pager).stream(since, page_size, max_pages)):
+            if (count >= limit):
+                return
+            yield submission
+
     def fetch_submissions(self, fetcher: Optional[Fetcher] = None, since: int = Timestamp.now() - 10*day, limit: int = 1000) -> List[Submission]:
         """Fetches all submissions (up to 1000) since the given UTC UNIX timestamp, using the provided fetcher.
         
-        If no argument is passed for 'fetcher' (or it is None), this method will request the newest posts from r/nearprog.
+        If no argument is passed for 'fetcher' (or it is None), this method will stream the newest posts from r/nearprog
+        with stream_submissions(), rather than re-requesting ever-larger batches.
         """
 
+        # return the oldest submissions first (at the head of the list)
+        if (fetcher is None):
+            return sorted(self.stream_submissions(since=since), key = lambda x: x.timestamp)[:limit]
+
         def fetch(extended_limit: int) -> List:
 
-            # if None is provided, use the default (live) Submission fetcher
-            default_fetcher = Fetcher(lambda n: map(lambda s: Submission.wrap(s), self.nearprog().new(limit=n)))
-            submissions = list((fetcher or default_fetcher).fetch(since, extended_limit))
+            submissions = list(fetcher.fetch(since, extended_limit))
             earliest = min(map(lambda s: s.timestamp, submissions))
 
             # if we're limited only by our own self-imposed max # submissions, try again, but request more
             if (earliest > since and len(submissions) == extended_limit):
                 return fetch(extended_limit * 2)
             else:
-                # return the oldest submissions first (at the head of the list)
                 return sorted(submissions, key = lambda x: x.timestamp)[:limit]
 
         return fetch(limit)
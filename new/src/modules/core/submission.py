@@ -1,15 +1,27 @@
+from array import array
+from collections import OrderedDict
 from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import inspect
 import json
+import operator
+from pathlib import Path
 import praw.models
 import re
-from typing import Any, Dict, Iterator, List, Optional
+import sqlite3
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
 
 class Submission:
     """A Submission can be a PRAW Submission or any other kind of Submission representation."""
 
+    # a fixed set of attributes (no per-instance __dict__); the parsed fields are only set once a song is processed
+    __slots__ = ('timestamp', 'flair', 'raw_title', 'score', 'upvote_ratio', 'fullname',
+                 'artist', 'song_title', 'featuring', 'subgenre', 'year', '__processed')
+
     # add mandatory 'score' and 'upvote_ratio' fields
 
-    def __init__(self, timestamp: int, flair: str = 'N/A', raw_title: str = 'N/A', score: int = -1, upvote_ratio: float = -1.0) -> None:
+    def __init__(self, timestamp: int, flair: str = 'N/A', raw_title: str = 'N/A', score: int = -1, upvote_ratio: float = -1.0, fullname: Optional[str] = None) -> None:
         """Create a Submission object by directly defining its fields."""
 
         self.timestamp = timestamp
@@ -17,22 +29,47 @@ class Submission:
         self.raw_title = raw_title
         self.score = score
         self.upvote_ratio = upvote_ratio
+        self.fullname = fullname
+        self.__processed = False
 
-    __processed = False
+    def process(self, cache: Optional['ParseCache'] = None) -> None:
+        """Parse this Submission's title, extracting artist, song, subgenre, and other information.
 
-    def process(self) -> None:
-        """Parse this Submission's title, extracting artist, song, subgenre, and other information."""
+        If a ParseCache is given, titles which have already been parsed (by the same version of the parser) are not parsed again.
+        """
 
         if (self.is_song()):
-            parsed: Title = Title.parse(self.raw_title)
+            parsed: Title = cache.parse(self.raw_title) if cache else Title.parse(self.raw_title)
+            self._assign(parsed)
+
+    def _assign(self, parsed: 'Title') -> None:
+        self.artist = parsed.artist
+        self.song_title = parsed.song_title
+        self.featuring = parsed.featuring
+        self.subgenre = parsed.subgenre
+        self.year = parsed.year
+
+        self.__processed = True
+
+    @staticmethod
+    def process_many(submissions: Iterable['Submission'], workers: Optional[int] = None, cache: Optional['ParseCache'] = None) -> List[Tuple['Submission', ValueError]]:
+        """Process many Submissions at once, parsing their titles on a pool of 'workers' processes (see Title.parse_many()).
+
+        Submissions whose titles cannot be parsed are left unprocessed, and returned alongside their parsing errors.
+        """
 
-            self.artist = parsed.artist
-            self.song_title = parsed.song_title
-            self.featuring = parsed.featuring
-            self.subgenre = parsed.subgenre
-            self.year = parsed.year
+        songs = [submission for submission in submissions if submission.is_song()]
+        raws = [song.raw_title for song in songs]
+        parsed = cache.parse_many(raws, workers) if cache else Title.parse_many(raws, workers)
+
+        errors = []
+        for song, title in zip(songs, parsed):
+            if isinstance(title, ValueError):
+                errors.append((song, title))
+            else:
+                song._assign(title)
 
-            self.__processed = True
+        return errors
 
     @staticmethod
     def deserialise(dict: Dict) -> None:
@@ -41,7 +78,7 @@ class Submission:
         if not all(map(lambda x: x in dict, ['timestamp', 'flair', 'raw_title', 'score', 'upvote_ratio'])):
             raise ValueError('Cannot deserialise malformed submission. Missing one or more required fields: "timestamp", "flair", "raw_title", "score", "upvote_ratio".')
 
-        submission = Submission(dict['timestamp'], dict['flair'], dict['raw_title'], dict['score'], dict['upvote_ratio'])
+        submission = Submission(dict['timestamp'], dict['flair'], dict['raw_title'], dict['score'], dict['upvote_ratio'], dict.get('fullname'))
 
         if all(map(lambda x: x in dict, ['artist', 'song_title', 'featuring', 'subgenre', 'year'])):
             submission.artist = dict['artist']
@@ -56,45 +93,119 @@ class Submission:
     def wrap(submission: praw.models.Submission) -> None:
         """Create a Submission object from a PRAW Submission."""
 
-        return Submission(int(submission.created_utc), submission.link_flair_text, submission.title, submission.score, submission.upvote_ratio)
+        return Submission(int(submission.created_utc), submission.link_flair_text, submission.title, submission.score, submission.upvote_ratio, submission.fullname)
 
     def is_song(self) -> bool:
         """Returns True if this Submission is a song (and not a contest, etc.)."""
 
-        return ((self.flair != 'Discussion') and
-                (self.flair != 'Contest') and
-                (self.flair != 'Announcement') and
-                ('[Discussion]' not in self.raw_title))
+        return Submission.is_song_flair(self.flair) and Submission.is_song_title(self.raw_title)
+
+    @staticmethod
+    def is_song_flair(flair: str) -> bool:
+        """Returns False if Submissions with this flair are never songs (see is_song())."""
+
+        return ((flair != 'Discussion') and
+                (flair != 'Contest') and
+                (flair != 'Announcement'))
+
+    @staticmethod
+    def is_song_title(raw_title: str) -> bool:
+        """Returns False if a Submission with this title is never a song (see is_song())."""
+
+        return ('[Discussion]' not in raw_title)
+
+    def serialise(self) -> Dict:
+        """Returns the serialised (JSON) form of this Submission, with the same fields as as_JSON()."""
+
+        serialised = {
+            'timestamp': self.timestamp,
+            'flair': self.flair,
+            'raw_title': self.raw_title,
+            'score': self.score,
+            'upvote_ratio': self.upvote_ratio
+        }
+
+        if (self.is_song()):
+            if (not self.__processed):
+                self.process()
+            serialised.update({
+                'artist': self.artist,
+                'song_title': self.song_title,
+                'featuring': self.featuring,
+                'subgenre': self.subgenre,
+                'year': self.year or None
+            })
+
+        # submissions archived before fullnames were recorded don't have one
+        if (self.fullname):
+            serialised['fullname'] = self.fullname
+
+        return serialised
+
+    # reused for every record written by as_JSON() / write_JSON()
+    encoder = json.JSONEncoder(ensure_ascii=False)
+    encode_string = staticmethod(json.encoder.encode_basestring)
+
+    @staticmethod
+    def string_JSON(value: Optional[str]) -> str:
+        return 'null' if value is None else Submission.encode_string(value)
 
     def as_JSON(self) -> str:
+        string = Submission.string_JSON
+
+        # submissions archived before fullnames were recorded don't have one
+        fullname = f',\n"fullname"    : {string(self.fullname)}' if self.fullname else ''
+
         if (self.is_song()):
             if (not self.__processed):
                 self.process()
             return (
                 '{'
                 f'\n"timestamp"   : {self.timestamp},'
-                f'\n"flair"       : {json.dumps(self.flair, ensure_ascii=False)},'
-                f'\n"raw_title"   : {json.dumps(self.raw_title, ensure_ascii=False)},'
+                f'\n"flair"       : {string(self.flair)},'
+                f'\n"raw_title"   : {string(self.raw_title)},'
                 f'\n"score"       : {self.score},'
                 f'\n"upvote_ratio": {self.upvote_ratio},'
-                f'\n"artist"      : {json.dumps(self.artist, ensure_ascii=False)},'
-                f'\n"song_title"  : {json.dumps(self.song_title, ensure_ascii=False)},'
-                f'\n"featuring"   : {json.dumps(self.featuring, ensure_ascii=False)},'
-                f'\n"subgenre"    : {json.dumps(self.subgenre, ensure_ascii=False)},'
+                f'\n"artist"      : {string(self.artist)},'
+                f'\n"song_title"  : {string(self.song_title)},'
+                f'\n"featuring"   : {Submission.encoder.encode(self.featuring)},'
+                f'\n"subgenre"    : {string(self.subgenre)},'
                 f'\n"year"        : {self.year or "null"}'
+                f'{fullname}'
                 '\n}'
             )
         else:
             return (
                 '{'
                 f'\n"timestamp"   : {self.timestamp},'
-                f'\n"flair"       : {json.dumps(self.flair, ensure_ascii=False)},'
-                f'\n"raw_title"   : {json.dumps(self.raw_title, ensure_ascii=False)},'
+                f'\n"flair"       : {string(self.flair)},'
+                f'\n"raw_title"   : {string(self.raw_title)},'
                 f'\n"score"       : {self.score},'
                 f'\n"upvote_ratio": {self.upvote_ratio}'
+                f'{fullname}'
                 '\n}'
             )
 
+    @staticmethod
+    def write_JSON(submissions: Iterable['Submission'], file: TextIO) -> int:
+        """Streams these Submissions to a file, as a JSON array in the songs.json format. Returns the number written.
+
+        Each record is encoded and written on its own, so the output is never held in memory as a whole. The output is
+        byte-for-byte the same as printing "[", then ", ".join() of every Submission's as_JSON(), then "]".
+        """
+
+        count = 0
+        file.write('[\n')
+
+        for submission in submissions:
+            if (count > 0):
+                file.write(', ')
+            file.write(submission.as_JSON())
+            count += 1
+
+        file.write('\n]\n')
+        return count
+
 class Title:
     """Helper class for parsing Submission titles.
     
@@ -132,6 +243,8 @@ class Title:
     All of this parsing / interpretation is handled in this class.
     """
 
+    __slots__ = ('artist', 'song_title', 'featuring', 'subgenre', 'year')
+
     def __init__(self, artist: str, song_title: str, featuring: List[str] = [], subgenre: Optional[str] = None, year: Optional[str] = None) -> None:
         self.artist = artist
         self.song_title = song_title
@@ -148,6 +261,26 @@ class Title:
             and obj.year == self.year
         )
 
+    # regular expressions used by Title.parse(), compiled once
+
+    # the mandatory " - " separator between artist(s) and song
+    re_dash = re.compile(r"\s+[—-]+\s+")
+
+    # separators between the primary and any additional artists: "feat.", "ft.", ",", "&"
+    re_artists = re.compile(r"\s*feat\.?\s*|\s*ft\.?\s*|\s*,\s*|\s*&\s*")
+
+    # a [tag], or a (year) in parentheses instead of square brackets
+    re_tag = re.compile(r"\[([^\[\]]+)\]|\(([0-9]{4})\)")
+    re_year_paren = re.compile(r"\(([0-9]{4})\)")
+
+    # a tag which starts with a year 1900-2021
+    re_year = re.compile(r'19[0-9]{2}|20[01][0-9]|202[01]')
+
+    # "paste together" compound artist names which should not have been separated
+    compound_artists = [
+        (["Stephen Malkmus", "The Jicks"], "Stephen Malkmus and the Jicks")
+    ]
+
     @staticmethod
     def parse(raw: str) -> None:
 
@@ -156,10 +289,9 @@ class Title:
         # ...with no sections parsed / extracted at all.
 
         # STEP 1: First, we split the title on the mandatory " - " separator.
+        #         (Anything after a second separator is ignored, so we stop splitting there.)
 
-        re_dash = r"\s+[—-]+\s+"
-
-        rawartists_rawsong = re.split(re_dash, raw)
+        rawartists_rawsong = Title.re_dash.split(raw, 2)
 
         if len(rawartists_rawsong) < 2:
             raise ValueError(f'Error parsing title: missing mandatory " - " separator between artist(s) and song:\n  > {raw}')
@@ -173,18 +305,9 @@ class Title:
 
         # STEP 2: Next, we split the raw_artist into the primary (first) and secondary (additional) artists
 
-        re_feat = r"\s*feat\.?\s*|\s*ft\.?\s*"
-        re_comma = r"\s*,\s*"
-        re_and = r'\s*&\s*'
-
-        artists = re.split(f'{re_feat}|{re_comma}|{re_and}', raw_artists)
+        artists = Title.re_artists.split(raw_artists)
 
-        # "paste together" compound artist names which should not have been separated
-        compound_artists = [
-            (["Stephen Malkmus", "The Jicks"], "Stephen Malkmus and the Jicks")
-        ]
-
-        for separate, together in compound_artists:
+        for separate, together in Title.compound_artists:
             if all(map(lambda pair: pair[0] == pair[1], zip(separate, artists))):
                 artists = artists[len(separate):]
                 artists.insert(0, together)
@@ -198,45 +321,402 @@ class Title:
         #     featuring: ["Bob Dylan", "Bob Barker"]
         #     raw_song:           "We're All Named Bob [rap metal] [1972]"
 
-        # STEP 3: Lastly, we parse any [tags] from raw_song and categorise the tags
+        # STEP 3: Lastly, we parse any [tags] from raw_song (in a single scan) and categorise the tags.
+        #         All [tags] come first, followed by any (years) in parentheses.
+
+        tags = []
+        paren_years = []
+        song_title = None
 
-        re_tag = r"\[([^\[\]]+)\]"
+        for match in Title.re_tag.finditer(raw_song):
+            tag, paren_year = match.groups()
 
-        tags = re.compile(re_tag).findall(raw_song)
+            if tag is None:
+                paren_years.append(paren_year)
+                continue
 
-        re_year_paren = r"\(([0-9]{4})\)"
+            # the final title is everything before the first [tag]
+            if song_title is None:
+                song_title = raw_song[:match.start()].strip()
 
-        tags = tags + re.compile(re_year_paren).findall(raw_song)
+            tags.append(tag)
+
+            # a (year) can also hide inside of a [tag]
+            if '(' in tag:
+                paren_years.extend(Title.re_year_paren.findall(tag))
+
+        tags.extend(paren_years)
+
+        # if there are no tags, the raw_song is the song_title and the subgenre and year are None
+        if len(tags) < 1:
+            return Title(artist, raw_song, featuring, None, None)
+
+        # if there are only (years), the final title is the whole raw_song
+        if song_title is None:
+            song_title = raw_song.strip()
+
+        # if any tag matches a year 1900-2021, consider that a 'year' tag
+
+        year = None
+        for index, tag in enumerate(tags):
+            if Title.re_year.match(tag):
+                year = int(tag)
+                del tags[index]
+                break
+
+        # if there is any remaining tag, it must be the subgenre
 
-        # if there are any tags at all...
         if len(tags) > 0:
+            subgenre = str(tags[0])
+        else:
+            subgenre = None
 
-            # ...then the final title is everything before the first tag
-            song_title = raw_song.split(f'[{tags[0]}]')[0].strip()
+        return Title(artist, song_title, featuring, subgenre, year)
 
-            # if any tag matches a year 1900-2021, consider that a 'year' tag
+    @staticmethod
+    def parse_chunk(raws: List[str]) -> List[Union['Title', ValueError]]:
+        """Parse each raw title, returning the ValueError in place of any title which cannot be parsed."""
 
-            re_year = re.compile(r'19[0-9]{2}|20[01][0-9]|202[01]')
-            years = list(filter(lambda tag: re_year.match(tag), tags))
+        results = []
+        for raw in raws:
+            try:
+                results.append(Title.parse(raw))
+            except ValueError as error:
+                results.append(error)
+        return results
 
-            if len(years) > 0:
-                year = int(years[0])
-                tags.remove(years[0])
-            else:
-                year = None
-            
-            # if there is any remaining tag, it must be the subgenre
+    @staticmethod
+    def parse_many(raws: Iterable[str], workers: Optional[int] = None, chunksize: int = 1000) -> List[Union['Title', ValueError]]:
+        """Parse many raw titles, in chunks, on a pool of 'workers' processes (default: one per CPU).
 
-            if len(tags) > 0:
-                subgenre = str(tags[0])
-            else:
-                subgenre = None
+        Results are returned in the same order as 'raws'. A title which cannot be parsed does not abort the batch;
+        its ValueError is returned in its place instead.
+        """
 
-            return Title(artist, song_title, featuring, subgenre, year)
+        raws = list(raws)
+        chunks = [raws[i:i+chunksize] for i in range(0, len(raws), chunksize)]
 
-        # if there are no tags, the raw_song is the song_title and the subgenre and year are None
+        # don't start a pool of processes just to parse a single chunk
+        if (workers == 1 or len(chunks) < 2):
+            return [title for chunk in chunks for title in Title.parse_chunk(chunk)]
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return [title for chunk in pool.map(Title.parse_chunk, chunks) for title in chunk]
+
+class ParseCache:
+    """Caches parsed Titles, keyed by raw title and parser version.
+
+    Recently-used Titles are kept in memory (at most 'size' of them). If a 'path' is given, every parsed Title is also
+    stored in an SQLite file there, so later runs only need to parse new titles. The version is a hash of the parsing rules
+    only: the source of Title.parse() plus the regular expressions and compound artist names it uses. Any change to the
+    rules invalidates all previously cached Titles automatically, while unrelated edits to the Title class do not.
+    """
+
+    def __init__(self, path: Optional[Path] = None, size: int = 4096, version: Optional[str] = None) -> None:
+        self.size = size
+        self.version = version or ParseCache.parser_version()
+        self.memory: OrderedDict = OrderedDict()
+        self.parsed = 0
+
+        # titles parsed since the last commit to disk
+        self.pending = 0
+
+        self.db: Optional[sqlite3.Connection] = None
+        if (path is not None):
+            self.db = sqlite3.connect(str(path))
+            self.db.execute('CREATE TABLE IF NOT EXISTS titles (raw_title TEXT, version TEXT, parsed TEXT, PRIMARY KEY (raw_title, version))')
+
+            # titles parsed by any other version of the parser will never be used again
+            self.db.execute('DELETE FROM titles WHERE version != ?', (self.version,))
+            self.db.commit()
+
+    @staticmethod
+    def parser_version() -> str:
+        """Returns a hash of the parsing rules: the source of Title.parse() and every class-level rule it uses."""
+
+        rules = [inspect.getsource(Title.parse), repr(Title.compound_artists)]
+        rules += [f'{name}={value.pattern!r}/{value.flags}' for name, value in sorted(vars(Title).items()) if isinstance(value, re.Pattern)]
+
+        return hashlib.sha1('\n'.join(rules).encode('utf-8')).hexdigest()[:12]
+
+    def lookup(self, raw: str) -> Optional[Title]:
+        """Returns the cached Title for this raw title, or None if it hasn't been parsed yet."""
+
+        if (raw in self.memory):
+            self.memory.move_to_end(raw)
+            return ParseCache.copy(self.memory[raw])
+
+        if (self.db is not None):
+            row = self.db.execute('SELECT parsed FROM titles WHERE raw_title = ? AND version = ?', (raw, self.version)).fetchone()
+            if (row is not None):
+                artist, song_title, featuring, subgenre, year = json.loads(row[0])
+                self.remember(raw, Title(artist, song_title, featuring, subgenre, year))
+                return Title(artist, song_title, featuring, subgenre, year)
+
+        return None
+
+    def remember(self, raw: str, title: Title) -> None:
+        self.memory[raw] = title
+        if (len(self.memory) > self.size):
+            self.memory.popitem(last=False)
+
+    def store(self, raw: str, title: Title) -> None:
+        """Caches a newly-parsed Title, in memory and on disk."""
+
+        self.parsed += 1
+        self.remember(raw, ParseCache.copy(title))
+
+        if (self.db is not None):
+            parsed = json.dumps([title.artist, title.song_title, title.featuring, title.subgenre, title.year], ensure_ascii=False)
+            self.db.execute('INSERT OR REPLACE INTO titles VALUES (?, ?, ?)', (raw, self.version, parsed))
+            self.pending += 1
+            if (self.pending >= 1000):
+                self.flush()
+
+    def parse(self, raw: str) -> Title:
+        """Returns Title.parse(raw), from the cache if possible. Parsing errors are raised, and never cached."""
+
+        title = self.lookup(raw)
+
+        if (title is None):
+            title = Title.parse(raw)
+            self.store(raw, title)
+
+        return title
+
+    def parse_many(self, raws: Iterable[str], workers: Optional[int] = None) -> List[Union[Title, ValueError]]:
+        """Like Title.parse_many(), but only titles which aren't already cached are parsed (each only once)."""
+
+        raws = list(raws)
+        results = [self.lookup(raw) for raw in raws]
+
+        misses = list(dict.fromkeys(raw for raw, title in zip(raws, results) if title is None))
+        parsed = dict(zip(misses, Title.parse_many(misses, workers)))
+
+        for raw, title in parsed.items():
+            if not isinstance(title, ValueError):
+                self.store(raw, title)
+
+        return [title if title is not None else ParseCache.copy_result(parsed[raw]) for raw, title in zip(raws, results)]
+
+    @staticmethod
+    def copy_result(result: Union[Title, ValueError]) -> Union[Title, ValueError]:
+        return result if isinstance(result, ValueError) else ParseCache.copy(result)
+
+    @staticmethod
+    def copy(title: Title) -> Title:
+        # callers get their own 'featuring' list, so they can't modify the cached Title
+        return Title(title.artist, title.song_title, list(title.featuring), title.subgenre, title.year)
+
+    def flush(self) -> None:
+        """Write any newly-parsed Titles to disk."""
+
+        if (self.db is not None):
+            self.db.commit()
+        self.pending = 0
+
+    def close(self) -> None:
+        self.flush()
+        if (self.db is not None):
+            self.db.close()
+            self.db = None
+
+class Interned:
+    """A column of (mostly repeated) strings, each distinct string stored once and referred to by a small integer code."""
+
+    def __init__(self) -> None:
+        self.values: List[Optional[str]] = []
+        self.index: Dict[Optional[str], int] = {}
+        self.codes = array('I')
+
+    def code(self, value: Optional[str]) -> int:
+        code = self.index.get(value)
+        if (code is None):
+            code = self.index[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def append(self, value: Optional[str]) -> None:
+        self.codes.append(self.code(value))
+
+    def pop(self) -> Optional[str]:
+        return self.values[self.codes.pop()]
+
+    def __getitem__(self, index: int) -> Optional[str]:
+        return self.values[self.codes[index]]
+
+    def __setitem__(self, index: int, value: Optional[str]) -> None:
+        self.codes[index] = self.code(value)
+
+    def take(self, indices: List[int]) -> 'Interned':
+        """Returns a new column of the strings at these indices (sharing this column's distinct strings)."""
+
+        column = Interned()
+        column.values = self.values
+        column.index = self.index
+        column.codes = array('I', SubmissionBatch.pick(self.codes, indices))
+        return column
+
+class SubmissionBatch:
+    """A columnar batch of Submissions, for holding (and sorting / filtering) very many of them at once.
+
+    Timestamps, scores and upvote ratios are kept in typed arrays, flairs and subgenres are interned (see Interned), and
+    every other field is kept in a column of its own, so that no per-Submission objects are kept at all. Indexing or
+    iterating over a batch creates Submission objects on demand, with the same public attributes as the Submissions
+    which were added to it. Rows can be overwritten in place, and titles parsed in place (see process()), so that a
+    batch can hold all known songs (see SongStore) through a whole update.
+    """
+
+    # shared by every Submission without featured artists
+    no_featuring: Tuple[str, ...] = ()
+
+    def __init__(self, submissions: Iterable[Submission] = ()) -> None:
+        self.timestamps = array('q')
+        self.scores = array('q')
+        self.upvote_ratios = array('d')
+        self.flairs = Interned()
+        self.raw_titles: List[str] = []
+        self.fullnames: List[Optional[str]] = []
+
+        # parsed fields (see Title), only meaningful where 'processed' is 1
+        self.processed = bytearray()
+        self.artists: List[Optional[str]] = []
+        self.song_titles: List[Optional[str]] = []
+        self.featuring: List[Tuple[str, ...]] = []
+        self.subgenres = Interned()
+        self.years: List[Any] = []
+
+        self.extend(submissions)
+
+    def append(self, submission: Submission) -> None:
+        self.timestamps.append(submission.timestamp)
+        self.scores.append(submission.score)
+        self.upvote_ratios.append(submission.upvote_ratio)
+        self.flairs.append(submission.flair)
+        self.raw_titles.append(submission.raw_title)
+        self.fullnames.append(submission.fullname)
+
+        # only processed songs have 'artist', 'song_title', etc.
+        processed = hasattr(submission, 'artist')
+        self.processed.append(processed)
+        self.artists.append(submission.artist if processed else None)
+        self.song_titles.append(submission.song_title if processed else None)
+        self.featuring.append(tuple(submission.featuring) if processed and submission.featuring else SubmissionBatch.no_featuring)
+        self.subgenres.append(submission.subgenre if processed else None)
+        self.years.append(submission.year if processed else None)
+
+    def __setitem__(self, index: int, submission: Submission) -> None:
+        """Overwrites the row at this index with this Submission."""
+
+        self.timestamps[index] = submission.timestamp
+        self.scores[index] = submission.score
+        self.upvote_ratios[index] = submission.upvote_ratio
+        self.flairs[index] = submission.flair
+        self.raw_titles[index] = submission.raw_title
+        self.fullnames[index] = submission.fullname
+
+        processed = hasattr(submission, 'artist')
+        self.processed[index] = processed
+        if (processed):
+            self.assign(index, submission)
         else:
-            return Title(artist, raw_song, featuring, None, None)
+            self.artists[index] = self.song_titles[index] = self.years[index] = None
+            self.featuring[index] = SubmissionBatch.no_featuring
+            self.subgenres[index] = None
+
+    def assign(self, index: int, parsed: Union[Submission, 'Title']) -> None:
+        """Sets the parsed fields of the row at this index (from a Title, or a processed Submission)."""
+
+        self.processed[index] = True
+        self.artists[index] = parsed.artist
+        self.song_titles[index] = parsed.song_title
+        self.featuring[index] = tuple(parsed.featuring) if parsed.featuring else SubmissionBatch.no_featuring
+        self.subgenres[index] = parsed.subgenre
+        self.years[index] = parsed.year
+
+    def pop(self) -> Submission:
+        """Removes (and returns) the last row."""
+
+        submission = self[len(self) - 1]
+
+        for column in (self.timestamps, self.scores, self.upvote_ratios, self.flairs, self.raw_titles, self.fullnames,
+                       self.processed, self.artists, self.song_titles, self.featuring, self.subgenres, self.years):
+            column.pop()
+
+        return submission
+
+    def process(self, cache: Optional[ParseCache] = None) -> None:
+        """Parses the titles of the songs in this batch which have not been parsed yet, in place (see Submission.process())."""
+
+        for index in range(len(self)):
+            raw = self.raw_titles[index]
+            if (not self.processed[index] and Submission.is_song_flair(self.flairs[index]) and Submission.is_song_title(raw)):
+                self.assign(index, cache.parse(raw) if cache else Title.parse(raw))
+
+    def extend(self, submissions: Iterable[Submission]) -> None:
+        for submission in submissions:
+            self.append(submission)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __getitem__(self, index: int) -> Submission:
+        submission = Submission(self.timestamps[index], self.flairs[index], self.raw_titles[index],
+                                self.scores[index], self.upvote_ratios[index], self.fullnames[index])
+
+        if (self.processed[index]):
+            submission._assign(Title(self.artists[index], self.song_titles[index], list(self.featuring[index]),
+                                     self.subgenres[index], self.years[index]))
+
+        return submission
+
+    def __iter__(self) -> Iterator[Submission]:
+        return map(self.__getitem__, range(len(self)))
+
+    @staticmethod
+    def pick(column: Any, indices: List[int]) -> List[Any]:
+        """Returns the values in this column at these indices, as a list."""
+
+        if (len(indices) == 0):
+            return []
+        elif (len(indices) == 1):
+            return [column[indices[0]]]
+        return list(operator.itemgetter(*indices)(column))
+
+    def take(self, indices: Iterable[int]) -> 'SubmissionBatch':
+        """Returns a new batch of the Submissions at these indices, in this order (without creating any Submissions)."""
+
+        indices = list(indices)
+        pick = SubmissionBatch.pick
+
+        batch = SubmissionBatch()
+        batch.timestamps = array('q', pick(self.timestamps, indices))
+        batch.scores = array('q', pick(self.scores, indices))
+        batch.upvote_ratios = array('d', pick(self.upvote_ratios, indices))
+        batch.flairs = self.flairs.take(indices)
+        batch.raw_titles = pick(self.raw_titles, indices)
+        batch.fullnames = pick(self.fullnames, indices)
+        batch.processed = bytearray(pick(self.processed, indices))
+        batch.artists = pick(self.artists, indices)
+        batch.song_titles = pick(self.song_titles, indices)
+        batch.featuring = pick(self.featuring, indices)
+        batch.subgenres = self.subgenres.take(indices)
+        batch.years = pick(self.years, indices)
+        return batch
+
+    def songs(self) -> 'SubmissionBatch':
+        """Returns a new batch of only the songs in this batch (see Submission.is_song())."""
+
+        # check each distinct flair once
+        song_flairs = [Submission.is_song_flair(flair) for flair in self.flairs.values]
+        codes, raw_titles = self.flairs.codes, self.raw_titles
+
+        return self.take([i for i in range(len(self)) if song_flairs[codes[i]] and Submission.is_song_title(raw_titles[i])])
+
+    def sorted(self, newest_first: bool = False) -> 'SubmissionBatch':
+        """Returns a new batch of these Submissions, sorted by timestamp (oldest first, by default)."""
+
+        return self.take(sorted(range(len(self)), key = self.timestamps.__getitem__, reverse = newest_first))
 
 class Fetcher:
     """Fetches up to 'limit' Submissions, posted 'since' the given UTC UNIX timestamp."""
@@ -246,3 +726,37 @@ class Fetcher:
 
     def fetch(self, since: int, limit: int) -> Iterator[Submission]:
         return filter(lambda s: s.timestamp >= since, self.fetcher(limit))
+
+
+class Pager:
+    """Fetches pages of up to 'limit' Submissions from a newest-first listing, starting 'after' the given fullname cursor.
+
+    The cursor is None for the first (newest) page. Each call to the wrapped function is one request.
+    """
+
+    def __init__(self, pager: Callable[[Optional[str], int], Iterable[Submission]]):
+        self.pager = pager
+
+    def stream(self, since: int, page_size: int = 100, max_pages: Optional[int] = None) -> Iterator[Submission]:
+        """Lazily yields Submissions (newest first) posted 'since' the given UTC UNIX timestamp.
+
+        Stops at the first Submission older than 'since', at the end of the listing, or after 'max_pages' requests.
+        """
+
+        after: Optional[str] = None
+        pages = 0
+
+        while (max_pages is None or pages < max_pages):
+            page = list(self.pager(after, page_size))
+            pages += 1
+
+            for submission in page:
+                if (submission.timestamp < since):
+                    return
+                yield submission
+
+            # a short (or empty) page means we've reached the end of the listing
+            if (len(page) < page_size or page[-1].fullname is None):
+                return
+
+            after = page[-1].fullname
@@ -1,4 +1,8 @@
-from submission import Title
+import io
+from pathlib import Path
+import pytest
+import re
+from submission import ParseCache, Submission, SubmissionBatch, Title
 from typing import List, Tuple
 
 def test_title_parsing():
@@ -31,6 +35,8 @@ def test_title_parsing():
 #       ("Steven Bryant - Concerto for Wind Ensemble: V (UT Wind Ensemble, Jerry Junkin)", Title()), # special case
         ("Melt-Banana - Lost Parts Stinging Me so Cold", Title("Melt-Banana", "Lost Parts Stinging Me so Cold")),
         ("ÄTNA - Won't Stop [Avantgarde/Pop] (2020)", Title("ÄTNA", "Won't Stop", [], "Avantgarde/Pop", 2020)),
+        ("Yes - Roundabout (1971)", Title("Yes", "Roundabout (1971)", [], None, 1971)),
+        ("Sleepytime Gorilla Museum - Helpless Corpses Enactment [avant-rock (2001)]", Title("Sleepytime Gorilla Museum", "Helpless Corpses Enactment", [], "avant-rock (2001)", 2001)),
         # ... above here are weirder cases
 
         # documentation test case
@@ -46,4 +52,179 @@ def test_title_parsing():
         assert parsed.subgenre == expected.subgenre
         assert parsed.year == expected.year
 
-        assert Title.parse(actual) == expected
\ No newline at end of file
+        assert Title.parse(actual) == expected
+
+def test_parse_cache_memory():
+    """Test that ParseCache.parse() returns the same Titles as Title.parse(), parsing each raw title only once."""
+
+    cache = ParseCache(size = 2)
+    raws = ["Lama - More Than You Are", "Art of Noise - Yebo", "Lama - More Than You Are", "Bicurious - T.O.I [indie / math rock]"]
+
+    for raw in raws:
+        assert cache.parse(raw) == Title.parse(raw)
+
+    assert cache.parsed == 3
+    assert len(cache.memory) == 2
+
+def test_parse_cache_disk(tmp_path: Path):
+    """Test that ParseCache persists parsed Titles between runs, and only for the same parser version."""
+
+    raw = "Estradasphere - The Bounty Hunter [jazz / avant-garde metal] [2001]"
+    path = tmp_path / 'parse_cache.db'
+
+    cache = ParseCache(path)
+    cache.parse(raw)
+    cache.close()
+
+    cache = ParseCache(path)
+    assert cache.parse(raw) == Title.parse(raw)
+    assert cache.parsed == 0
+    cache.close()
+
+    cache = ParseCache(path, version = 'some other parser')
+    assert cache.parse(raw) == Title.parse(raw)
+    assert cache.parsed == 1
+    cache.close()
+
+def test_parser_version(monkeypatch: pytest.MonkeyPatch):
+    """Test that the parser version changes with the parsing rules, but not with unrelated edits to the Title class."""
+
+    version = ParseCache.parser_version()
+
+    monkeypatch.setattr(Title, 'describe', lambda self: self.artist, raising = False)
+    assert ParseCache.parser_version() == version
+
+    monkeypatch.setattr(Title, 'compound_artists', Title.compound_artists + [(["Simon", "Garfunkel"], "Simon & Garfunkel")])
+    assert ParseCache.parser_version() != version
+
+    monkeypatch.undo()
+    monkeypatch.setattr(Title, 're_year', re.compile(r'19[0-9]{2}|20[0-9]{2}'))
+    assert ParseCache.parser_version() != version
+
+def test_parse_cache_errors():
+    """Test that ParseCache.parse() raises (and does not cache) parsing errors."""
+
+    cache = ParseCache()
+
+    with pytest.raises(ValueError):
+        cache.parse("No separator here")
+    assert len(cache.memory) == 0
+
+def test_process_with_cache():
+    """Test that Submission.process() gives the same results with and without a ParseCache."""
+
+    cache = ParseCache()
+    cached = Submission(0, 'Rock', "John Cale & Terry Riley - The Hall of Mirrors in the Palace of Versailles")
+    uncached = Submission(0, 'Rock', "John Cale & Terry Riley - The Hall of Mirrors in the Palace of Versailles")
+
+    cached.process(cache)
+    uncached.process()
+
+    assert cached.as_JSON() == uncached.as_JSON()
+
+def test_parse_many():
+    """Test that Title.parse_many() parses on a process pool, keeps the original order, and reports errors in place."""
+
+    raws = ["Lama - More Than You Are", "No separator here", "Art of Noise - Yebo"] * 5
+
+    parsed = Title.parse_many(raws, workers = 2, chunksize = 4)
+
+    assert len(parsed) == len(raws)
+    for raw, title in zip(raws, parsed):
+        if raw == "No separator here":
+            assert isinstance(title, ValueError)
+        else:
+            assert title == Title.parse(raw)
+
+def test_process_many():
+    """Test that Submission.process_many() processes songs, skips non-songs, and returns unparseable Submissions."""
+
+    good = Submission(0, 'Rock', "Lama - More Than You Are")
+    bad = Submission(1, 'Rock', "No separator here")
+    discussion = Submission(2, 'Discussion', "What are you listening to?")
+
+    cache = ParseCache()
+    errors = Submission.process_many([good, bad, discussion], workers = 1, cache = cache)
+
+    assert [submission for submission, _ in errors] == [bad]
+    assert isinstance(errors[0][1], ValueError)
+    assert good.artist == "Lama"
+    assert not hasattr(discussion, 'artist')
+    assert cache.parse_many([good.raw_title]) == [Title.parse(good.raw_title)]
+    assert cache.parsed == 1
+
+def test_write_JSON():
+    """Test that Submission.write_JSON() writes exactly what update_songs.py used to print, including non-ASCII and None fields."""
+
+    submissions = [
+        Submission(300, 'Math Rock', 'Bicurious - T.O.I [indie / math rock]', 12, 0.95, 't3_c'),
+        Submission(200, None, 'Sigur Rós feat. Jónsi - Hoppípolla "live" [post-rock] [2005]', 8, 0.9),
+        Submission(100, 'Discussion', 'What are you listening to?\n', 3, 1.0, 't3_a')
+    ]
+
+    expected = io.StringIO()
+    print("[", file=expected)
+    print(", ".join(map(lambda s: s.as_JSON(), submissions)), file=expected)
+    print("]", file=expected)
+
+    written = io.StringIO()
+    assert Submission.write_JSON(submissions, written) == 3
+    assert written.getvalue() == expected.getvalue()
+    assert '"flair"       : null' in written.getvalue()
+    assert 'Sigur Rós' in written.getvalue()
+
+def test_slots():
+    """Test that Submissions and Titles have no per-instance __dict__, and that unprocessed Submissions have no parsed fields."""
+
+    submission = Submission(0, 'Rock', "Lama - More Than You Are")
+    assert not hasattr(submission, '__dict__')
+    assert not hasattr(submission, 'artist')
+    assert not hasattr(Title.parse(submission.raw_title), '__dict__')
+
+    submission.process()
+    assert submission.artist == "Lama"
+
+    with pytest.raises(AttributeError):
+        submission.genre = "Rock"
+
+def test_submission_batch():
+    """Test that a SubmissionBatch returns the same Submissions that were added to it, and sorts and filters them."""
+
+    submissions = [
+        Submission(300, 'Math Rock', 'Bicurious - T.O.I [indie / math rock]', 12, 0.95, 't3_c'),
+        Submission(100, 'Discussion', 'What are you listening to?', 3, 1.0, 't3_a'),
+        Submission(200, 'Math Rock', 'Lama - More Than You Are', -2, 0.25),
+        Submission(150, 'Jazz', '[Discussion] Best jazz album?', 1, 1.0, 't3_d')
+    ]
+    submissions[0].process()
+
+    batch = SubmissionBatch(submissions)
+
+    assert len(batch) == 4
+    assert batch.flairs.values == ['Math Rock', 'Discussion', 'Jazz']
+    assert [s.serialise() for s in batch] == [s.serialise() for s in submissions]
+    assert not hasattr(batch[2], 'artist')
+
+    assert [s.timestamp for s in batch.songs()] == [300, 200]
+    assert [s.timestamp for s in batch.sorted()] == [100, 150, 200, 300]
+    assert [s.fullname for s in batch.songs().sorted(newest_first = True)] == ['t3_c', None]
+
+def test_submission_batch_in_place():
+    """Test that a SubmissionBatch's rows can be overwritten, removed, and parsed in place."""
+
+    batch = SubmissionBatch([
+        Submission(100, 'Math Rock', 'Lama - More Than You Are', -2, 0.25, 't3_a'),
+        Submission(200, 'Discussion', 'What are you listening to?', 3, 1.0, 't3_b')
+    ])
+
+    batch.process()
+    assert (batch[0].artist, batch[0].song_title) == ('Lama', 'More Than You Are')
+    assert not hasattr(batch[1], 'artist')
+
+    batch[0] = Submission(100, 'Jazz', 'Bicurious - T.O.I', 5, 0.9, 't3_a')
+    assert (batch[0].flair, batch[0].score) == ('Jazz', 5)
+    assert not hasattr(batch[0], 'artist')
+
+    assert batch.pop().fullname == 't3_b'
+    assert len(batch) == 1
+    assert batch.flairs.codes.tolist() == [batch.flairs.index['Jazz']]
@@ -0,0 +1,35 @@
+import random
+from typing import Callable, Iterator, List, Optional
+
+from core.submission import Submission
+from core.timestamp import Timestamp, hour
+
+class Fixture:
+
+    @staticmethod
+    def fetcher(limit: int) -> Iterator[Submission]:
+        # assume 1 submission every ~6 hours on average
+        end_time = int(Timestamp.now())
+        start_time = int(end_time - limit * 6*hour)
+        timestamps = sorted(random.sample(range(start_time, end_time), limit))
+        return iter(Submission(timestamp) for timestamp in timestamps)
+
+    @staticmethod
+    def listing(size: int) -> List[Submission]:
+        # a fixed "new" listing (newest first), with 1 submission every ~6 hours on average
+        end_time = int(Timestamp.now())
+        start_time = int(end_time - size * 6*hour)
+        timestamps = sorted(random.sample(range(start_time, end_time), size), reverse=True)
+        return [Submission(timestamp, fullname=f't3_{index:x}') for index, timestamp in enumerate(timestamps)]
+
+    @staticmethod
+    def pager(listing: List[Submission], requests: List[int]) -> Callable[[Optional[str], int], List[Submission]]:
+        # serve pages of the given listing after the 'after' cursor, recording the size of each request
+        positions = {submission.fullname: index for index, submission in enumerate(listing)}
+
+        def page(after: Optional[str], limit: int) -> List[Submission]:
+            requests.append(limit)
+            start = 0 if after is None else positions[after] + 1
+            return listing[start:start + limit]
+
+        return page
@@ -0,0 +1,84 @@
+import json
+import re
+from typing import Any, Iterator, TextIO
+
+# JSON whitespace, skipped between the tokens of the top-level array
+re_whitespace = re.compile(r'[ \t\n\r]*')
+
+decoder = json.JSONDecoder()
+
+# the longest token which can fail to decode at its start when cut short: "-Infinity"
+longest_token = 9
+
+def truncated(buffer: str, error: json.JSONDecodeError) -> bool:
+    """Returns True if this decoding error may just be the end of the buffer cutting an element short."""
+
+    # an unterminated string runs to the end of the buffer, but is reported at its opening quote
+    return (error.pos > len(buffer) - longest_token or error.msg.startswith('Unterminated string'))
+
+def iterate(file: TextIO, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Yields the elements of the top-level JSON array in this file, one at a time.
+
+    Only one element (plus one chunk of the file) is held in memory at a time, so this works on arrays far larger than
+    RAM. Raises ValueError if the file does not contain a JSON array.
+    """
+
+    buffer = ''
+    position = 0
+    eof = False
+
+    def refill() -> bool:
+        """Reads the next chunk of the file, dropping what we've already consumed. Returns False at the end of the file."""
+
+        nonlocal buffer, position, eof
+        if (eof):
+            return False
+
+        chunk = file.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+        return not eof
+
+    def next_token() -> str:
+        """Skips whitespace, and returns the next character (or '' at the end of the file)."""
+
+        nonlocal position
+        while True:
+            position = re_whitespace.match(buffer, position).end()
+            if (position < len(buffer) or not refill()):
+                return buffer[position:position+1]
+
+    if (next_token() != '['):
+        raise ValueError('Expected a JSON array')
+    position += 1
+
+    if (next_token() == ']'):
+        return
+
+    while True:
+        next_token()
+
+        try:
+            element, end = decoder.raw_decode(buffer, position)
+
+            # a number at the end of the buffer may continue in the next chunk (even "1.5e" decodes, as 1.5)
+            if ((end == len(buffer) or buffer[end] in '.eE') and refill()):
+                continue
+
+        except json.JSONDecodeError as error:
+            # only an element cut off by the end of the buffer can be completed by reading more of the file; anything
+            # else is malformed, so raise at once rather than buffering (and re-decoding) the rest of the file
+            if (truncated(buffer, error) and refill()):
+                continue
+            raise ValueError(f'Malformed JSON array element: {error}')
+
+        position = end
+        yield element
+
+        token = next_token()
+        if (token == ']'):
+            return
+        elif (token != ','):
+            raise ValueError(f"Expected ',' or ']' after a JSON array element, found {token!r}")
+        position += 1
@@ -0,0 +1,11 @@
+from pathlib import Path
+from typing import Iterator
+
+from core.submission import Submission
+from jsonarray import iterate
+
+def submissions(path: Path) -> Iterator[Submission]:
+    """Yields the Submissions in this songs.json file, one at a time."""
+
+    with path.open('r', encoding='utf-8') as songs:
+        yield from map(Submission.deserialise, iterate(songs))
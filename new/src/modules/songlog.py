@@ -0,0 +1,121 @@
+import json
+import os
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from core.submission import Submission
+import records
+from store import SongStore
+
+class SongLog:
+    """Known songs, kept as a snapshot (in the songs.json format) plus an append-only JSON-lines log of upserts.
+
+    A run appends only the songs it pulled to the log, in a single sequential write. Compaction folds the log into a
+    new snapshot, which is written to a temporary file and atomically renamed over the old one, so a crash at any point
+    leaves either the old or the new snapshot (and the log entries which have not been folded into it yet) intact.
+    Readers rebuild the current state by replaying the snapshot, then the log.
+
+    Compaction first rotates the live log aside (to songs.jsonl.1), so that a compaction interrupted after the rotation
+    can be finished by the next one. Replaying a log entry twice is harmless, as each entry is an upsert.
+
+    Writers which replace the whole snapshot must go through SongLog.rewrite(), which also empties the log: otherwise,
+    replaying older upserts from the log would overwrite the newer songs in the snapshot.
+    """
+
+    def __init__(self, snapshot: Path, log: Optional[Path] = None) -> None:
+        self.snapshot = snapshot
+        self.log = log or snapshot.with_suffix('.jsonl')
+        self.rotated = self.log.with_name(self.log.name + '.1')
+
+    def append(self, submissions: Iterable[Submission]) -> int:
+        """Appends an upsert of each of these Submissions to the log. Returns the number of Submissions appended."""
+
+        lines = [json.dumps(s.serialise(), ensure_ascii=False) + '\n' for s in submissions]
+        appended = len(lines)
+
+        # start on a fresh line if a crash mid-append left a torn last line
+        if (self.log.exists() and self.log.stat().st_size > 0):
+            with self.log.open('rb') as log:
+                log.seek(-1, os.SEEK_END)
+                if (log.read(1) != b'\n'):
+                    lines.insert(0, '\n')
+
+        with self.log.open('a', encoding='utf-8') as log:
+            log.write(''.join(lines))
+            log.flush()
+            os.fsync(log.fileno())
+
+        return appended
+
+    @staticmethod
+    def replay(path: Path) -> Iterator[Submission]:
+        """Yields the Submissions upserted in this log, oldest first."""
+
+        if (not path.exists()):
+            return
+
+        with path.open('r', encoding='utf-8') as log:
+            for line in log:
+                try:
+                    serialised = json.loads(line)
+                except json.JSONDecodeError:
+                    # a crash mid-append can leave a torn line, which was never acknowledged
+                    continue
+                yield Submission.deserialise(serialised)
+
+    def read_snapshot(self) -> Iterator[Submission]:
+        if (not self.snapshot.exists()):
+            return iter([])
+
+        return records.submissions(self.snapshot)
+
+    def read(self) -> SongStore:
+        """Returns the current known songs: the snapshot, updated by the rotated log (if any) and then the live log."""
+
+        store = SongStore(self.read_snapshot())
+        store.upsert_many(SongLog.replay(self.rotated))
+        store.upsert_many(SongLog.replay(self.log))
+        return store
+
+    def needs_compaction(self, ratio: float = 0.25) -> bool:
+        """Returns True if the log has grown to more than 'ratio' times the size of the snapshot."""
+
+        log = self.log.stat().st_size if self.log.exists() else 0
+        snapshot = self.snapshot.stat().st_size if self.snapshot.exists() else 0
+        return log > ratio * snapshot
+
+    def compact(self) -> None:
+        """Folds the log into a new snapshot."""
+
+        # a rotated log left behind by an interrupted compaction is folded in first, before rotating again
+        if (not self.rotated.exists()):
+            if (not self.log.exists()):
+                return
+            os.replace(self.log, self.rotated)
+
+        store = SongStore(self.read_snapshot())
+        store.upsert_many(SongLog.replay(self.rotated))
+
+        self.write_snapshot(store.newest_first())
+        self.rotated.unlink()
+
+    def rewrite(self, songs: Iterable[Submission]) -> None:
+        """Replaces the snapshot with these songs, and empties the log. The songs must already include every upsert in
+        the log (see SongLog.read())."""
+
+        self.write_snapshot(songs)
+
+        for log in (self.rotated, self.log):
+            if (log.exists()):
+                log.unlink()
+
+    def write_snapshot(self, songs: Iterable[Submission]) -> None:
+        """Writes a temporary file and renames it over the snapshot, so a crash leaves either the old or the new one."""
+
+        temporary = self.snapshot.with_name(self.snapshot.name + '.tmp')
+        with temporary.open('w', encoding='utf-8') as outfile:
+            Submission.write_JSON(songs, outfile)
+            outfile.flush()
+            os.fsync(outfile.fileno())
+
+        os.replace(temporary, self.snapshot)
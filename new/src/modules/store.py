@@ -0,0 +1,90 @@
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from core.submission import Submission, SubmissionBatch
+
+class SongStore:
+    """Known songs, indexed by Reddit fullname.
+
+    Songs are held as the rows of a SubmissionBatch, so a store of a million songs keeps a few array slots and string
+    references per song, rather than a Submission object each. Songs archived before fullnames were recorded are keyed
+    by their timestamp instead, until they are replaced by a freshly-pulled copy of the same song (which has a
+    fullname). Upserting a song costs O(1), no matter how many songs are already in the store.
+    """
+
+    def __init__(self, songs: Iterable[Submission] = ()) -> None:
+        self.batch = SubmissionBatch()
+        self.rows: Dict[str, int] = {}
+        self.upsert_many(songs)
+
+    @staticmethod
+    def key(song: Submission) -> str:
+        """Returns the primary key of this song: its fullname, or its timestamp if it has no fullname."""
+
+        return song.fullname or SongStore.legacy_key(song.timestamp)
+
+    @staticmethod
+    def legacy_key(timestamp: int) -> str:
+        return f'timestamp:{timestamp}'
+
+    def upsert(self, song: Submission) -> bool:
+        """Adds this song to the store, replacing any known copy of it. Returns True if the song is new."""
+
+        key = SongStore.key(song)
+        row = self.rows.get(key)
+
+        # replace a copy of this song archived before we recorded fullnames
+        if (row is None and song.fullname is not None):
+            row = self.rows.pop(SongStore.legacy_key(song.timestamp), None)
+            if (row is not None):
+                self.rows[key] = row
+
+        if (row is None):
+            self.rows[key] = len(self.batch)
+            self.batch.append(song)
+            return True
+
+        self.batch[row] = song
+        return False
+
+    def upsert_many(self, songs: Iterable[Submission]) -> int:
+        """Upserts each of these songs. Returns the number of new songs."""
+
+        return sum(self.upsert(song) for song in songs)
+
+    def remove(self, key: str) -> Optional[Submission]:
+        """Removes (and returns) the song with this key, or returns None if there is no such song."""
+
+        row = self.rows.pop(key, None)
+
+        if (row is None):
+            return None
+
+        song = self.batch[row]
+
+        # fill the hole with the last row, so the batch stays dense
+        last = self.batch.pop()
+        if (row < len(self.batch)):
+            self.batch[row] = last
+            self.rows[SongStore.key(last)] = row
+
+        return song
+
+    def get(self, fullname: str) -> Optional[Submission]:
+        """Returns the song with this fullname, or None if there is no such song."""
+
+        row = self.rows.get(fullname)
+        return None if row is None else self.batch[row]
+
+    def at(self, timestamp: int) -> List[Submission]:
+        """Returns all songs posted at this UTC UNIX timestamp (by a scan of the timestamp column)."""
+
+        return [self.batch[row] for row, posted in enumerate(self.batch.timestamps) if posted == timestamp]
+
+    def newest_first(self) -> SubmissionBatch:
+        return self.batch.sorted(newest_first = True)
+
+    def __len__(self) -> int:
+        return len(self.batch)
+
+    def __iter__(self) -> Iterator[Submission]:
+        return iter(self.batch)
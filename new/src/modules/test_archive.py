@@ -0,0 +1,58 @@
+from pathlib import Path
+
+from archive import SongArchive
+from core.submission import Submission
+
+def songs():
+    submissions = [
+        Submission(300, 'Math Rock', 'Bicurious - T.O.I [indie / math rock]', 12, 0.95, 't3_c'),
+        Submission(200, 'Jazz', 'Al Di Meola - Egyptian Danza [oriental jazz-rock]', 8, 0.9, 't3_b'),
+        Submission(100, 'Discussion', 'What are you listening to?', 3, 1.0, 't3_a')
+    ]
+    for submission in submissions:
+        submission.process()
+    return submissions
+
+def test_upsert_and_query(tmp_path: Path):
+    """Test that SongArchive stores Submissions, and answers range and index queries newest-first."""
+
+    archive = SongArchive(tmp_path / 'songs.db')
+    assert archive.upsert_many(songs()) == 3
+
+    assert len(archive) == 3
+    assert [s.fullname for s in archive.between(150, 300)] == ['t3_b']
+    assert [s.fullname for s in archive.between(150)] == ['t3_c', 't3_b']
+    assert [s.fullname for s in archive.by_flair('Jazz')] == ['t3_b']
+    assert [s.fullname for s in archive.by_artist('Bicurious')] == ['t3_c']
+    assert [s.fullname for s in archive.by_subgenre('oriental jazz-rock')] == ['t3_b']
+
+    # upserting an updated copy replaces the archived one
+    archive.upsert_many([Submission(200, 'Jazz', 'Al Di Meola - Egyptian Danza [oriental jazz-rock]', 20, 0.9, 't3_b')])
+    assert len(archive) == 3
+    assert [s.score for s in archive.by_flair('Jazz')] == [20]
+
+def test_legacy_songs(tmp_path: Path):
+    """Test that songs archived without a fullname are replaced by a pulled copy with the same timestamp."""
+
+    archive = SongArchive(tmp_path / 'songs.db')
+    archive.upsert_many([Submission(200, 'Jazz', 'Al Di Meola - Egyptian Danza', 8, 0.9)])
+    archive.upsert_many([Submission(200, 'Jazz', 'Al Di Meola - Egyptian Danza', 9, 0.9, 't3_b')])
+
+    assert [(s.fullname, s.score) for s in archive] == [('t3_b', 9)]
+
+def test_json_round_trip(tmp_path: Path):
+    """Test that a songs.json file survives an import into, and export out of, a SongArchive."""
+
+    original = tmp_path / 'songs.json'
+    exported = tmp_path / 'exported.json'
+
+    with original.open('w') as outfile:
+        print("[", file=outfile)
+        print(", ".join(map(lambda s: s.as_JSON(), songs())), file=outfile)
+        print("]", file=outfile)
+
+    archive = SongArchive(tmp_path / 'songs.db')
+    assert archive.import_JSON(original) == 3
+    archive.export_JSON(exported)
+
+    assert exported.read_text() == original.read_text()
@@ -1,12 +1,12 @@
 from pathlib import Path
 import pytest
-import random
-from typing import Iterator
+from typing import List
 
 from connection import Connection
 from core.config import Config
-from core.submission import Submission, Fetcher
+from core.submission import Submission, Fetcher, Pager
 from core.timestamp import Timestamp, week, hour, day
+from fixtures import Fixture
 
 def get_config() -> Config:
     """Some tests in this suite connect to Reddit, and so require a valid config.json file."""
@@ -110,12 +110,53 @@ def test_fetch_submissions_ordering():
     assert submissions[0].timestamp < submissions[1].timestamp
     assert submissions[1].timestamp < submissions[2].timestamp
 
-class Fixture:
+def test_stream_submissions_since():
+    """Test that Connection.stream_submissions() yields only submissions since the given timestamp, newest first."""
 
-    @staticmethod
-    def fetcher(limit: int) -> Iterator[Submission]:
-        # assume 1 submission every ~6 hours on average
-        end_time = int(Timestamp.now())
-        start_time = int(end_time - limit * 6*hour)
-        timestamps = sorted(random.sample(range(start_time, end_time), limit))
-        return iter(Submission(timestamp) for timestamp in timestamps)
+    connection: Connection = Connection(Config('my_client_id', 'my_client_secret', 'my_username', 'my_password'))
+
+    listing = Fixture.listing(1000)
+    since = Timestamp.now() - 30*day
+    submissions = list(connection.stream_submissions(pager = Pager(Fixture.pager(listing, [])), since = since))
+
+    assert submissions == [s for s in listing if s.timestamp >= since]
+    assert all(a.timestamp > b.timestamp for a, b in zip(submissions, submissions[1:]))
+
+def test_stream_submissions_requests():
+    """Test that Connection.stream_submissions() downloads each page once, and stops at the first page older than 'since'."""
+
+    connection: Connection = Connection(Config('my_client_id', 'my_client_secret', 'my_username', 'my_password'))
+
+    listing = Fixture.listing(1000)
+    since = listing[349].timestamp
+    requests: List[int] = []
+    submissions = list(connection.stream_submissions(pager = Pager(Fixture.pager(listing, requests)), since = since))
+
+    # 350 submissions in pages of 100 => 4 requests, and no submission is downloaded twice
+    assert len(submissions) == 350
+    assert requests == [100, 100, 100, 100]
+
+def test_stream_submissions_limit():
+    """Test that Connection.stream_submissions() makes a bounded number of requests."""
+
+    connection: Connection = Connection(Config('my_client_id', 'my_client_secret', 'my_username', 'my_password'))
+
+    listing = Fixture.listing(1000)
+    requests: List[int] = []
+    submissions = list(connection.stream_submissions(pager = Pager(Fixture.pager(listing, requests)), since = 0, limit = 250))
+
+    assert submissions == listing[:250]
+    assert len(requests) == 3
+
+def test_stream_submissions_lazy():
+    """Test that Connection.stream_submissions() only requests pages as they are consumed."""
+
+    connection: Connection = Connection(Config('my_client_id', 'my_client_secret', 'my_username', 'my_password'))
+
+    listing = Fixture.listing(1000)
+    requests: List[int] = []
+    stream = connection.stream_submissions(pager = Pager(Fixture.pager(listing, requests)), since = 0)
+
+    assert requests == []
+    next(stream)
+    assert requests == [100]
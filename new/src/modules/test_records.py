@@ -0,0 +1,66 @@
+import io
+import json
+from pathlib import Path
+import random
+
+import pytest
+
+from core.submission import Submission
+import records
+
+def test_iterate():
+    """Test that records.iterate() yields the same elements as json.load(), whatever the chunk size."""
+
+    random.seed(13)
+    elements = [{'timestamp': i, 'title': 'ü' * random.randrange(20), 'score': random.randrange(-10**9, 10**9)} for i in range(200)]
+    elements += [12345678901234567890, 1.5e300, True, None, 'string', [], {}, [[1], {'a': [2]}]]
+    text = json.dumps(elements)
+
+    for chunk_size in [1, 7, 100, 1 << 16]:
+        assert list(records.iterate(io.StringIO(text), chunk_size)) == elements
+
+    # the non-standard layout written by pull_data.posts
+    layout = '[{\n  "score"   : 5,\n  "author"  : "a"\n}, {\n  "score"   : 6,\n  "author"  : "b"\n}]\n'
+    assert list(records.iterate(io.StringIO(layout), 4)) == json.loads(layout)
+
+    assert list(records.iterate(io.StringIO(' [ ] '))) == []
+
+def test_malformed():
+    """Test that records.iterate() rejects files which don't hold a (complete) JSON array."""
+
+    for text in ['', '{}', '[1, 2', '[1 2]', '[{"a": }]']:
+        with pytest.raises(ValueError):
+            list(records.iterate(io.StringIO(text), 2))
+
+def test_malformed_fails_fast():
+    """Test that records.iterate() raises on a malformed element without reading the rest of the file."""
+
+    class Counting(io.StringIO):
+        reads = 0
+
+        def read(self, size: int = -1) -> str:
+            Counting.reads += 1
+            return super().read(size)
+
+    text = '[{"a": 1}, {"a": nope}, ' + ', '.join(['{"a": 2}'] * 10000) + ']'
+    with pytest.raises(ValueError):
+        list(records.iterate(Counting(text), 64))
+    assert Counting.reads < 5
+
+def test_iterate_truncated_tokens():
+    """Test that strings, escapes and literals cut off at any chunk boundary are completed, not rejected."""
+
+    elements = ['a "quoted" \\ string \u00fc\U0001f600', True, False, None, -1.25e-7, {'key': ['x' * 30]}]
+    text = json.dumps(elements)
+
+    for chunk_size in range(1, 12):
+        assert list(records.iterate(io.StringIO(text), chunk_size)) == elements
+
+def test_submissions(tmp_path: Path):
+    """Test that records.submissions() yields the Submissions in a songs.json file."""
+
+    songs = [Submission(200, 'Jazz', 'Al Di Meola - Egyptian Danza', 8, 0.9, 't3_b'), Submission(100, 'Discussion', 'Hi', 3, 1.0)]
+    path = tmp_path / 'songs.json'
+    path.write_text('[\n' + ', '.join(s.as_JSON() for s in songs) + '\n]\n')
+
+    assert [s.serialise() for s in records.submissions(path)] == [s.serialise() for s in songs]
@@ -0,0 +1,75 @@
+import json
+import os
+from pathlib import Path
+
+from core.submission import Submission
+from songlog import SongLog
+
+def song(timestamp: int, score: int) -> Submission:
+    return Submission(timestamp, 'Math Rock', 'Bicurious - T.O.I [indie / math rock]', score, 0.95, f't3_{timestamp}')
+
+def test_replay(tmp_path: Path):
+    """Test that SongLog.read() replays the log over the snapshot, with later upserts winning."""
+
+    log = SongLog(tmp_path / 'songs.json')
+    log.append([song(100, 1), song(200, 1)])
+    log.append([song(100, 5)])
+
+    store = log.read()
+    assert len(store) == 2
+    assert store.get('t3_100').score == 5
+
+def test_compaction(tmp_path: Path):
+    """Test that SongLog.compact() folds the log into a snapshot in the songs.json format, and empties the log."""
+
+    log = SongLog(tmp_path / 'songs.json')
+    log.append([song(100, 1), song(200, 1)])
+    log.compact()
+
+    assert not log.log.exists() and not log.rotated.exists()
+    assert [s['timestamp'] for s in json.loads(log.snapshot.read_text())] == [200, 100]
+
+    log.append([song(100, 7)])
+    assert log.read().get('t3_100').score == 7
+
+def test_rewrite(tmp_path: Path):
+    """Test that SongLog.rewrite() replaces the snapshot and empties the log, so older upserts are never replayed over it."""
+
+    log = SongLog(tmp_path / 'songs.json')
+    log.append([song(100, 1), song(200, 1)])
+
+    store = log.read()
+    store.upsert_many([song(100, 9)])
+    log.rewrite(store.newest_first())
+
+    assert not log.log.exists() and not log.rotated.exists()
+    log.compact()
+    assert log.read().get('t3_100').score == 9
+    assert [s['timestamp'] for s in json.loads(log.snapshot.read_text())] == [200, 100]
+
+def test_serialise():
+    """Test that Submission.serialise() has the same fields and values as Submission.as_JSON()."""
+
+    s = song(100, 1)
+    assert s.serialise() == json.loads(s.as_JSON())
+
+def test_crash_recovery(tmp_path: Path):
+    """Test that a torn last log line is ignored, and that a compaction interrupted after rotating the log is finished."""
+
+    log = SongLog(tmp_path / 'songs.json')
+    log.append([song(100, 1)])
+    os.replace(log.log, log.rotated)
+    log.append([song(200, 1)])
+
+    with log.log.open('a') as torn:
+        torn.write('{"timestamp": 300, "fla')
+
+    assert sorted(s.timestamp for s in log.read()) == [100, 200]
+
+    log.append([song(400, 1)])
+    assert sorted(s.timestamp for s in log.read()) == [100, 200, 400]
+
+    # the rotated log is folded in first; the live log stays put until the next compaction
+    log.compact()
+    assert not log.rotated.exists()
+    assert sorted(s.timestamp for s in log.read()) == [100, 200, 400]
@@ -0,0 +1,59 @@
+import json
+
+from core.submission import Submission
+from store import SongStore
+
+def test_upsert():
+    """Test that SongStore.upsert() adds new songs and replaces known songs, keyed by fullname."""
+
+    store = SongStore([Submission(100, 'Rock', 'A - B', 1, 1.0, 't3_a')])
+
+    assert store.upsert(Submission(200, 'Jazz', 'C - D', 1, 1.0, 't3_b')) == True
+    assert store.upsert(Submission(100, 'Rock', 'A - B', 5, 0.9, 't3_a')) == False
+
+    assert len(store) == 2
+    assert store.get('t3_a').score == 5
+
+def test_same_second():
+    """Test that two songs posted in the same second don't collide."""
+
+    store = SongStore()
+    store.upsert_many([Submission(100, 'Rock', 'A - B', 1, 1.0, 't3_a'), Submission(100, 'Jazz', 'C - D', 1, 1.0, 't3_b')])
+
+    assert len(store) == 2
+    assert sorted(s.fullname for s in store.at(100)) == ['t3_a', 't3_b']
+
+def test_legacy_songs():
+    """Test that songs archived without a fullname are replaced by a pulled copy with the same timestamp."""
+
+    store = SongStore([Submission(100, 'Rock', 'A - B', 1, 1.0), Submission(50, 'Rock', 'E - F', 1, 1.0)])
+
+    assert store.upsert(Submission(100, 'Rock', 'A - B', 7, 1.0, 't3_a')) == False
+
+    assert len(store) == 2
+    assert store.at(100)[0].fullname == 't3_a'
+    assert [s.timestamp for s in store.newest_first()] == [100, 50]
+
+def test_remove():
+    """Test that SongStore.remove() removes only the song with that key, keeping every other song reachable."""
+
+    store = SongStore([Submission(100, 'Rock', 'A - B', 1, 1.0, 't3_a'), Submission(200, 'Jazz', 'C - D', 1, 1.0, 't3_b'),
+                       Submission(300, 'Folk', 'E - F', 1, 1.0)])
+
+    assert store.remove('t3_a').timestamp == 100
+    assert store.remove('t3_a') is None
+
+    assert len(store) == 2
+    assert store.get('t3_b').flair == 'Jazz'
+    assert store.at(300)[0].flair == 'Folk'
+    assert store.upsert(Submission(300, 'Folk', 'E - F', 4, 1.0, 't3_c')) == False
+    assert [s.fullname for s in store.newest_first()] == ['t3_c', 't3_b']
+
+def test_fullname_serialisation():
+    """Test that a Submission's fullname survives a round-trip through as_JSON(), and is omitted when unknown."""
+
+    song = Submission(100, 'Discussion', 'What are you listening to?', 1, 1.0, 't3_a')
+    legacy = Submission(100, 'Discussion', 'What are you listening to?', 1, 1.0)
+
+    assert Submission.deserialise(json.loads(song.as_JSON())).fullname == 't3_a'
+    assert 'fullname' not in legacy.as_JSON()
@@ -2,7 +2,7 @@ from pathlib import Path
 from typing import Iterator
 
 from src.modules.core.config import Config
-from src.modules.core.submission import Submission
+from src.modules.core.submission import Submission, SubmissionBatch
 from src.modules.connection import Connection
 
 class Pull:
@@ -19,7 +19,6 @@ class Pull:
         config = Config.read((path / to / file).resolve())
         connection = Connection(config)
         submissions: Iterator[Submission] = connection.fetch_submissions(since=since, limit=limit)
-        songs = filter(lambda s: s.is_song(), submissions)
 
-        # sort old-to-new by timestamp (use timestamp as primary key)
-        return sorted(songs, key = lambda s: s.timestamp)
+        # keep only the songs, as columns, sorted old-to-new by timestamp (use timestamp as primary key)
+        return SubmissionBatch(submissions).songs().sorted()
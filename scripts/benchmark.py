@@ -0,0 +1,248 @@
+import sys, time, random, argparse, tempfile, tracemalloc
+from types import SimpleNamespace
+from typing import Callable, Iterator, List
+
+from tools import reddit
+from tools import defuzz
+from tools import traffic_store
+
+#===============================================================================
+#
+#  benchmarks for the scripts in this directory, run against fake data
+#
+#-------------------------------------------------------------------------------
+#
+#  run with
+#    $ python3 path/to/benchmark.py <benchmark> [-h]
+#
+#  No connection to Reddit is needed: every benchmark runs against a fake
+#  listing, and network latency is either estimated from the number of
+#  requests made, or simulated by sleeping for each request.
+#
+#===============================================================================
+
+# Reddit serves listings in pages of (at most) 100 submissions
+page_size = 100
+
+class FakeListing:
+    """Stands in for a praw Reddit connection, serving a fixed "new" listing and counting requests."""
+
+    def __init__(self, size: int, songs: float = 0.9) -> None:
+        now = int(time.time())
+        flairs = ["Rock", "Jazz", "Electronic", "Math Rock", "Discussion"]
+        weights = [songs / 4] * 4 + [1 - songs]
+
+        # one submission every ~6 hours on average, newest first
+        self.submissions = [
+            SimpleNamespace(
+                id = f'{index:x}',
+                created_utc = float(now - index * 6 * 3600 - random.randrange(6 * 3600)),
+                link_flair_text = random.choices(flairs, weights)[0],
+                title = f'Artist {index} - Song {index}')
+            for index in range(size)]
+
+        self.requests = 0
+        self.transferred = 0
+        self.latency = 0.0
+
+    def info(self, fullnames: List[str]) -> Iterator[SimpleNamespace]:
+        time.sleep(self.latency)
+        self.requests += 1
+        self.transferred += len(fullnames)
+        return iter([SimpleNamespace(fullname = fullname, score = 10 + random.randint(-2, 2)) for fullname in fullnames])
+
+    def subreddit(self, name: str):
+        return self
+
+    def new(self, limit: int = 100) -> Iterator[SimpleNamespace]:
+        limit = len(self.submissions) if limit is None else limit
+        for start in range(0, limit, page_size):
+            page = self.submissions[start:min(start + page_size, limit)]
+            self.requests += 1
+            self.transferred += len(page)
+            yield from page
+            if (len(page) < page_size):
+                return
+
+def doubling_fetch_songs_since(connection, utc_timestamp: int) -> List:
+    """The previous implementation of reddit.fetch_songs_since(), which re-requests 100, 200, 400, ... posts."""
+
+    def fetch_n_most_recent_posts(n: int) -> List:
+        return sorted(list(connection.subreddit("nearprog").new(limit=n)),
+            key = lambda x: x.created_utc)
+
+    earliest_post_timestamp = utc_timestamp + 1
+    fetch_multiplier = -1
+
+    while (earliest_post_timestamp > utc_timestamp):
+        fetch_multiplier += 1
+        n_to_fetch = 2**fetch_multiplier * 100
+        most_recent_posts = fetch_n_most_recent_posts(n_to_fetch)
+        earliest_post_timestamp = most_recent_posts[0].created_utc
+
+    return [x for x in most_recent_posts if x.created_utc >= utc_timestamp and reddit.is_song(x)]
+
+def fetch(days: int, size: int, latency: float):
+    """Compare the doubling and streaming fetch_songs_since() on the same fake listing."""
+
+    since = int(time.time()) - days * 24 * 3600
+
+    def run(name: str, connection: FakeListing, f: Callable) -> None:
+        start = time.perf_counter()
+        songs = f(connection, since)
+        elapsed = time.perf_counter() - start
+        print(f"  {name:9s} | {len(songs):5d} | {connection.requests:8d} | {connection.transferred:11d} | {connection.requests*latency:11.1f}s | {elapsed*1000:.2f}ms")
+
+    listing = FakeListing(size)
+
+    print(f"\nsongs posted in the last {days} days (listing of {size}, {latency}s per request)\n")
+    print(f"  strategy  | songs | requests | transferred | est. latency | cpu")
+
+    run("doubling", listing, doubling_fetch_songs_since)
+    listing.requests = listing.transferred = 0
+    run("streaming", listing, reddit.fetch_songs_since)
+
+def defuzz_scores(songs: int, iterations: int, workers: int, latency: float):
+    """Time serial vs. concurrent defuzzing rounds, with a real (slept) latency per /api/info request."""
+
+    listing = FakeListing(songs)
+    listing.latency = latency
+    fullnames = [f't3_{submission.id}' for submission in listing.submissions]
+
+    print(f"\ndefuzzing {songs} songs {iterations} times ({latency}s per request)\n")
+    print(f"  workers | requests | wall time")
+
+    for n in sorted(set([1, workers])):
+        listing.requests = 0
+        start = time.perf_counter()
+        defuzz.sample_scores(listing, lambda: listing, fullnames, iterations, n, defuzz.RateLimiter(burst=10**6))
+        print(f"  {n:7d} | {listing.requests:8d} | {time.perf_counter() - start:.2f}s")
+
+def adaptive_defuzz(songs: int, places: int, iterations: int):
+    """Compare fixed and adaptive defuzzing: API requests made, and whether the top 'places' songs agree."""
+
+    # true scores are spread out like a month of r/nearprog; Reddit's fuzzing adds noise to each sample
+    true_scores = { f't3_{index:x}' : max(1, int(random.expovariate(1 / 12))) for index in range(songs) }
+
+    class FuzzedInfo:
+        requests = 0
+        def info(self, fullnames: List[str]) -> Iterator[SimpleNamespace]:
+            self.requests += 1
+            return iter([SimpleNamespace(fullname = f, score = true_scores[f] + random.randint(-3, 3)) for f in fullnames])
+
+    # a song is misplaced if it made the cut with a true score below the true cutoff (ties can go either way)
+    cutoff = sorted(true_scores.values(), reverse = True)[places-1]
+
+    def misplaced(samples) -> int:
+        means = sorted(samples.items(), key = lambda x: sum(x[1]) / len(x[1]), reverse = True)
+        return len([f for f, _ in means[:places] if true_scores[f] < cutoff])
+
+    limiter = defuzz.RateLimiter(burst=10**6)
+
+    fixed = FuzzedInfo()
+    fixed_samples = defuzz.sample_scores(fixed, lambda: fixed, list(true_scores), iterations, 1, limiter)
+
+    adaptive = FuzzedInfo()
+    adaptive_samples, requests, saved = defuzz.adaptive_scores(adaptive, lambda: adaptive, list(true_scores), places, iterations, limiter=limiter)
+
+    print(f"\ntop {places} of {songs} songs, up to {iterations} defuzz iterations\n")
+    print(f"  strategy | requests | samples | misplaced")
+    print(f"  fixed    | {fixed.requests:8d} | {sum(map(len, fixed_samples.values())):7d} | {misplaced(fixed_samples):9d}")
+    print(f"  adaptive | {requests:8d} | {sum(map(len, adaptive_samples.values())):7d} | {misplaced(adaptive_samples):9d}")
+    print(f"\n  adaptive defuzzing saved {saved} requests")
+
+def traffic_output(years: int):
+    """Compare print(dumps()) (json.dumps + 3 regex passes) against the streaming traffic writer."""
+
+    now = int(time.time()) // 3600 * 3600
+    hours = years * 365 * 24
+    traffic = {
+        "day":   [[now - i * 86400, random.randrange(1000), random.randrange(5000), random.randrange(20)] for i in range(hours // 24)],
+        "hour":  [[now - i * 3600, random.randrange(100), random.randrange(500)] for i in range(hours)],
+        "month": [[now - i * 30 * 86400, random.randrange(10**4), random.randrange(10**5), 0] for i in range(years * 12)]}
+
+    def regex(outfile):
+        print(traffic_store.dumps(traffic), file=outfile)
+
+    def stream(outfile):
+        traffic_store.write(traffic, outfile)
+
+    print(f"\nwriting {years} years of hourly traffic ({hours} hourly rows)\n")
+    print(f"  writer    | time    | peak traced memory")
+
+    for name, write in [("regex", regex), ("streaming", stream)]:
+        with tempfile.TemporaryFile('w+') as outfile:
+            start = time.perf_counter()
+            write(outfile)
+            elapsed = time.perf_counter() - start
+
+            outfile.seek(0)
+            outfile.truncate()
+            tracemalloc.start()
+            write(outfile)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        print(f"  {name:9s} | {elapsed*1000:5.0f}ms | {peak / 2**20:.1f}MiB")
+
+# command-line testing
+if ("benchmark.py" in sys.argv[0]):
+
+    desc = "Benchmarks for the r/nearprog scripts, run against fake data."
+    parser = argparse.ArgumentParser(description=desc)
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    fetch_parser = subparsers.add_parser("fetch", help="doubling vs. streaming fetch_songs_since()")
+
+    fetch_parser.add_argument('-d', dest="days", type=int, default=100,
+        help="days of submissions to fetch from today backward: default 100")
+
+    fetch_parser.add_argument('-n', dest="size", type=int, default=1000,
+        help="number of submissions in the fake listing: default 1000")
+
+    fetch_parser.add_argument('-l', dest="latency", type=float, default=0.5,
+        help="assumed seconds per request to Reddit: default 0.5")
+
+    defuzz_parser = subparsers.add_parser("defuzz", help="serial vs. concurrent score defuzzing")
+
+    defuzz_parser.add_argument('-n', dest="songs", type=int, default=200,
+        help="number of songs to defuzz: default 200")
+
+    defuzz_parser.add_argument('-i', dest="iterations", type=int, default=100,
+        help="number of defuzzing iterations: default 100")
+
+    defuzz_parser.add_argument('-w', dest="workers", type=int, default=8,
+        help="number of concurrent workers: default 8")
+
+    defuzz_parser.add_argument('-l', dest="latency", type=float, default=0.05,
+        help="seconds slept per request: default 0.05")
+
+    adaptive_parser = subparsers.add_parser("adaptive", help="fixed vs. adaptive score defuzzing")
+
+    adaptive_parser.add_argument('-n', dest="songs", type=int, default=250,
+        help="number of songs to defuzz: default 250")
+
+    adaptive_parser.add_argument('-p', dest="places", type=int, default=60,
+        help="number of songs in the playlist: default 60")
+
+    adaptive_parser.add_argument('-i', dest="iterations", type=int, default=100,
+        help="(maximum) number of defuzzing iterations: default 100")
+
+    traffic_parser = subparsers.add_parser("traffic", help="regex vs. streaming traffic JSON output")
+
+    traffic_parser.add_argument('-y', dest="years", type=int, default=3,
+        help="years of hourly traffic to write: default 3")
+
+    args = parser.parse_args()
+
+    if (args.benchmark == "fetch"):
+        fetch(args.days, args.size, args.latency)
+
+    elif (args.benchmark == "defuzz"):
+        defuzz_scores(args.songs, args.iterations, args.workers, args.latency)
+
+    elif (args.benchmark == "adaptive"):
+        adaptive_defuzz(args.songs, args.places, args.iterations)
+
+    elif (args.benchmark == "traffic"):
+        traffic_output(args.years)
@@ -4,6 +4,7 @@ from statistics import mean, stdev
 from random import randrange, random
 
 from tools import reddit
+from tools import defuzz
 
 #===============================================================================
 #
@@ -19,6 +20,12 @@ from tools import reddit
 #    -m       multi-comment mode: all of the user's comments' scores are summed
 #             and then the number of posts is subtracted from that value; in
 #             contrast to the default ranking, which is the top comment score
+#    -w <W>   number of sampling rounds to run concurrently; 4 by default
+#    -a <P>   adaptive mode: stop sampling a comment once it is clearly inside
+#             or outside of the top P comments; N becomes the maximum number
+#             of iterations (single-comment mode only); rounds then run one at
+#             a time, with up to W of each round's requests run concurrently,
+#             and comments are ranked by their mean score (see rank_comments)
 #
 #  This script will search the r/nearprog subreddit for a post with a title that
 #  matches the search <term>, which is mandatory. Note that you can enter
@@ -33,7 +40,21 @@ from tools import reddit
 #
 #===============================================================================
 
-def findAndEvaluate (search_term, multi_comment_mode = False, iterations = 5, debug_mode = False):
+def rank_comments(tuples, adaptive = False):
+    """Sorts {comment_id: (average, stdev)} high-to-low, by the rounded (average
+       + stdev) value, then randomly (if rounded scores are equal).
+
+       Adaptive sampling stops sampling a comment once its average is clearly
+       inside or outside of the top places (see defuzz.unsettled), so adaptive
+       runs are ranked by the average alone: adding the (still noisy) stdev of
+       a comment which stopped early could move it across that boundary."""
+
+    if (adaptive):
+        return sorted(tuples.items(), key = lambda x: (x[1][0], random()), reverse = True)
+
+    return sorted(tuples.items(), key = lambda x: (round(x[1][0] + x[1][1]), random()), reverse = True)
+
+def findAndEvaluate (search_term, multi_comment_mode = False, iterations = 5, debug_mode = False, workers = 1, adaptive_places = 0):
 
     if (iterations < 2):
         print(f"  Note: 'iterations' must be >= 2 at minimum. Set to 2.")
@@ -82,31 +103,48 @@ def findAndEvaluate (search_term, multi_comment_mode = False, iterations = 5, de
         print(f" ! Top-level comments from mods {mods} will be ignored\n")
 
     connection = reddit.connect()
-    for i in range(iterations):
-        print(f"Collecting data ({i+1}/{iterations})...", end="\r")
-
-        # pull the submission in every loop so Reddit refreshes the fuzzed votes
-        contest = connection.submission(url=submission.url)
-
-        # remove second-level comments and "More Comments" messages
-        contest.comments.replace_more(limit=None)
-
-        # loop over all top-level comments
-        for comment in contest.comments:
-            author = str(comment.author)
-            if (author not in mods):
-                link = comment.permalink
-                id = link.split('/')[-2]
-                username.setdefault(id, author)
-                scores[id].append(comment.score)
-                if (debug_mode):
-                    print(f" ! Comment @ https://www.reddit.com{link}")
-                    print(f" !   posted by u/{author}")
-                    print(f" !   has a score of {comment.score}\n")
+
+    # resolve the full comment tree once, to find all top-level comments
+    contest = connection.submission(url=submission.url)
+
+    # remove second-level comments and "More Comments" messages
+    contest.comments.replace_more(limit=None)
+
+    fullnames = [] # [t1_<comment_id>] for each top-level comment
+    for comment in contest.comments:
+        author = str(comment.author)
+        if (author not in mods):
+            link = comment.permalink
+            id = link.split('/')[-2]
+            username.setdefault(id, author)
+            fullnames.append(comment.fullname)
+            if (debug_mode):
+                print(f" ! Comment @ https://www.reddit.com{link}")
+                print(f" !   posted by u/{author}\n")
+
+    # then only re-sample the (fuzzed) comment scores, up to 100 comments per request
+    if (adaptive_places > 0 and not multi_comment_mode):
+        print(f"Collecting data (up to {iterations} rounds, adaptively, {workers} requests at a time)...", end="\r")
+        samples, requests, saved = defuzz.adaptive_scores(connection, reddit.open_connection, fullnames, adaptive_places, iterations, workers=workers)
+        print(f"Adaptive sampling made {requests} API requests (saved {saved} of {requests + saved}).")
+
+    else:
+        print(f"Collecting data ({iterations} rounds, {workers} at a time)...", end="\r")
+        samples = defuzz.sample_scores(connection, reddit.open_connection, fullnames, iterations, workers)
+
+    for fullname, values in samples.items():
+        scores[fullname[len('t1_'):]].extend(values)
+        if (debug_mode):
+            print(f" ! Comment {fullname} has scores {values}")
 
     # clear the "Collecting data" line
     print("                                                         ", end="\r")
 
+    # a stdev needs 2 samples; /api/info returns nothing for a comment deleted since the tree was resolved
+    for comment_id in [cid for cid, values in scores.items() if len(values) < 2]:
+        print(f"  Skipping comment {comment_id}: only {len(scores[comment_id])} score sample(s)")
+        del scores[comment_id]
+
     def average_and_stdev(permalink_and_values):
         return (permalink_and_values[0], (mean(permalink_and_values[1]), stdev(permalink_and_values[1])))
 
@@ -117,10 +155,10 @@ def findAndEvaluate (search_term, multi_comment_mode = False, iterations = 5, de
     if multi_comment_mode:
         user_scores = defaultdict(list) # {username: [(avg, stdev)]} for each participant
 
-        # collect all (avg, stdev) upvote tuples for each user
-        for cid in username.keys():
+        # collect all (avg, stdev) upvote tuples for each user (of the comments which weren't skipped)
+        for cid, stats in tuples.items():
             user = username[cid]
-            user_scores[user].append(tuples[cid])
+            user_scores[user].append(stats)
 
         final_scores = {} # {username: overall_score} for each participant
 
@@ -142,8 +180,7 @@ def findAndEvaluate (search_term, multi_comment_mode = False, iterations = 5, de
 
     # single-comment ("normal") mode
     else:
-        # sort comments by rounding (mean+stdev) value, then randomly (if rounded scores are equal)
-        ranked = sorted(tuples.items(), key = lambda x: (round(x[1][0] + x[1][1]), random()), reverse = True)
+        ranked = rank_comments(tuples, adaptive = adaptive_places > 0)
 
         # print out the rankings
         rank = 1
@@ -166,8 +203,14 @@ if (len(sys.argv) > 1 and "contest_winner.py" in sys.argv[0]):
     parser.add_argument('-m', dest="multi", action='store_true',
         help="enable multi-comment mode (see comments in source)")
 
+    parser.add_argument('-w', dest="workers", type=int, default=4,
+        help="number of sampling rounds to run concurrently (with '-a', requests per round): default 4, minimum 1")
+
+    parser.add_argument('-a', dest="places", type=int, default=0,
+        help="adaptive mode: stop sampling comments clearly in / out of the top P places (single-comment mode only; '-w' applies per round)")
+
     parser.add_argument('--debug', dest="debug", action='store_true',
         help="run in 'debug' mode (lots of output)")
 
     args = parser.parse_args()
-    findAndEvaluate(args.term, args.multi, max(2, args.num), args.debug)
+    findAndEvaluate(args.term, args.multi, max(2, args.num), args.debug, max(1, args.workers), max(0, args.places))
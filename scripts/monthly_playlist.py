@@ -15,7 +15,7 @@ basedir = pathlib.Path(__file__).parent
 # TODO add 'until' as well as since?
 #      will require disabling removing songs which appear in older playlists
 
-def top_songs(n: int, since: int, defuzz_iterations: int) -> List[Tuple[Submission, float]]:
+def top_songs(n: int, since: int, defuzz_iterations: int, workers: int = 1, adaptive: bool = False) -> List[Tuple[Submission, float]]:
     """Returns the top n song Submissions posted since the cutoff time.
 
     Songs are filtered out and removed if they appear in recent monthly
@@ -33,6 +33,12 @@ def top_songs(n: int, since: int, defuzz_iterations: int) -> List[Tuple[Submissi
       defuzz_iterations:
         The number of times to request the score of each Submission, in order to
         undo Reddit's "score fuzzing" by finding the average score.
+      workers:
+        The number of defuzzing rounds to run concurrently (if adaptive, the
+        number of batched requests within each round to run concurrently).
+      adaptive:
+        If True, stop requesting the score of each Submission once it is clearly
+        inside or outside of the top n, so defuzz_iterations becomes a maximum.
 
     Returns:
       A dict mapping Submissions to their "de-fuzzed" scores, sorted high-to-low by score.
@@ -129,16 +135,20 @@ def top_songs(n: int, since: int, defuzz_iterations: int) -> List[Tuple[Submissi
     #---------------------------------------------------------------------------
 
     def defuzzed_scores(submissions: List[Submission]) -> Mapping[Submission, List[int]]:
-        return reddit.defuzzed_submissions_scores(connection, submissions, defuzz_iterations)
+        if (adaptive):
+            scores, requests, saved = reddit.adaptively_defuzzed_submissions_scores(connection, submissions, n, defuzz_iterations, workers)
+            print(f"Adaptive defuzzing made {requests} API requests (saved {saved} of {requests + saved}).")
+            return scores
+        return reddit.defuzzed_submissions_scores(connection, submissions, defuzz_iterations, workers)
 
     posts_and_scores = { post : sum(scores)/len(scores) for post, scores in defuzzed_scores(posts).items() }
 
     # sort posts by their defuzzed scores, high -> low, and return
     return sorted(posts_and_scores.items(), key = lambda x: x[1], reverse = True)[:n]
 
-def print_top_songs(n: int = 60, since: int = 1608937131, defuzz_iterations: int = 5, export = False):
+def print_top_songs(n: int = 60, since: int = 1608937131, defuzz_iterations: int = 5, export = False, workers: int = 1, adaptive: bool = False):
     start = datetime.datetime.today()
-    posts_and_scores = top_songs(n, since, defuzz_iterations)
+    posts_and_scores = top_songs(n, since, defuzz_iterations, workers, adaptive)
     end = datetime.datetime.today()
 
     if (export):
@@ -180,5 +190,11 @@ if ("monthly_playlist.py" in sys.argv[0]):
     parser.add_argument('-s', dest="save", action='store_true',
         help="[s]ave the playlist to a TXT file")
 
+    parser.add_argument('-w', dest="workers", type=int, default=4,
+        help="number of defuzzing rounds to run concurrently ([w]orkers); with '-a', the number of requests per round: default 4, minimum 1")
+
+    parser.add_argument('-a', dest="adaptive", action='store_true',
+        help="[a]daptive defuzzing: stop sampling songs whose rank is settled ('-i' becomes a maximum; rounds run one at a time, '-w' requests each)")
+
     args = parser.parse_args()
-    print_top_songs(max(60, args.num), max(1608937131, args.since), max(2, args.defuzz_iterations), args.save)
\ No newline at end of file
+    print_top_songs(max(60, args.num), max(1608937131, args.since), max(2, args.defuzz_iterations), args.save, max(1, args.workers), args.adaptive)
\ No newline at end of file
@@ -0,0 +1,94 @@
+import sys, time, pathlib, argparse
+from functools import lru_cache
+import plotly.io as pio
+
+from tools import columnar, traffic_store, plotcache, flair_counts
+import plot_pie_genre, plot_traffic, plot_upvotes_downvotes_by_genre
+
+basedir = pathlib.Path(__file__).parent
+
+#===============================================================================
+#
+#  render every plot in one process: the subreddit-wide plots, a genre pie
+#  chart for every active user, and every traffic view
+#
+#-------------------------------------------------------------------------------
+#
+#  run with
+#    $ python3 path/to/plot_all.py [-h]
+#
+#-------------------------------------------------------------------------------
+#
+#  The posts, flair counts and traffic are each read once, and shared by
+#  every figure. Plots which are already up to date (see tools/plotcache.py)
+#  are skipped, and the rest are exported in one batch, through a single
+#  kaleido session, rather than cold-starting an exporter per plot.
+#
+#-------------------------------------------------------------------------------
+
+def plot_all(min_posts = 10, views = ("all", "week", "day"), force = False):
+
+    posts = columnar.columns(basedir / 'data/posts_parsed.json')
+    today = traffic_store.today()
+
+    # the traffic is only read if some traffic plot needs rendering
+    @lru_cache(maxsize=None)
+    def traffic():
+        return (traffic_store.TrafficStore.read(basedir / 'data/traffic_merged.json'), plot_traffic.read_promos())
+
+    # (output, render cache key, figure builder) per plot
+    jobs = [(plot_upvotes_downvotes_by_genre.output, plot_upvotes_downvotes_by_genre.render_key(),
+        lambda: plot_upvotes_downvotes_by_genre.upvotes_downvotes_figure(posts))]
+
+    # the flair counts of every user are counted at once
+    counts = flair_counts.FlairCounts.from_table(posts)
+    for username in [""] + counts.authors(min_posts):
+        jobs.append((plot_pie_genre.output_of(username), plot_pie_genre.render_key(counts.of(username), username, 295),
+            lambda username=username: plot_pie_genre.pie_figure(counts.of(username), username)))
+
+    for view in views:
+        jobs.append((basedir / f'plots/traffic_{view}.png', plot_traffic.render_key(view, today),
+            lambda view=view: plot_traffic.traffic_figure(*traffic(), view, today)))
+
+    figures, outputs, keys = [], [], []
+    recorded = plotcache.entries()
+
+    for output, key, build in jobs:
+        if (not force and plotcache.is_current(output, key, recorded)):
+            print(f"       up to date  {output.name}")
+            continue
+
+        start = time.perf_counter()
+        figures.append(build())
+        outputs.append(output)
+        keys.append(key)
+        print(f"{(time.perf_counter() - start) * 1000:9.1f} ms build  {output.name}")
+
+    if (not figures):
+        return
+
+    start = time.perf_counter()
+    pio.write_images(figures, [str(output) for output in outputs]) # pip3 install kaleido
+    elapsed = time.perf_counter() - start
+
+    plotcache.record_many(outputs, keys)
+
+    print(f"{elapsed * 1000:9.1f} ms export of {len(figures)} plots ({elapsed * 1000 / len(figures):.1f} ms per plot)")
+
+# command-line interface
+if ("plot_all.py" in sys.argv[0]):
+
+    desc = "Script to save every plot (subreddit-wide, per active user, and per traffic view) in one batch."
+    parser = argparse.ArgumentParser(description=desc)
+
+    parser.add_argument('-n', dest="min_posts", type=int, default=10,
+        help="mi[n]imum number of posts for a user to get their own genre pie chart: default 10")
+
+    parser.add_argument('-v', dest="views", nargs="+", default=["all", "week", "day"], choices=["all", "week", "day"],
+        help="traffic [v]iews to plot: default all week day")
+
+    parser.add_argument('--force', dest="force", action='store_true',
+        help="save every plot, even those already up to date")
+
+    args = parser.parse_args()
+    plot_all(args.min_posts, args.views, args.force)
@@ -1,7 +1,9 @@
-import sys, json, pathlib, argparse
+import sys, pathlib, argparse
 import plotly.graph_objects as go
 from collections import Counter
 
+from tools import flair_counts, plotcache
+
 basedir = pathlib.Path(__file__).parent
 
 #===============================================================================
@@ -15,23 +17,29 @@ basedir = pathlib.Path(__file__).parent
 #
 #-------------------------------------------------------------------------------
 
-def pie_genre(optUser = "", rotation = 295, export = False):
+def username_of(optUser: str) -> str:
+    if (optUser.startswith("u/")):
+        return optUser[2:] # remove "u/" if present
+    else:
+        return optUser
+
+def output_of(username: str) -> pathlib.Path:
+    file_name = f"pie_genre_for_{username}.png" if username else "pie_genre.png"
+    return basedir / f'plots/{file_name}'
+
+def render_key(counts: Counter, username: str, rotation: int) -> str:
+    """The render cache key of a (subreddit-wide, or this user's) genre pie chart: only its own flair counts, so new
+       posts by other users don't invalidate it."""
 
-    with (basedir / 'data/posts_parsed.json').open('r') as f:
-        posts = json.load(f)
+    return plotcache.key(pathlib.Path(__file__), counts=counts.most_common(), username=username, rotation=rotation)
 
-    if (optUser == ""):
+def pie_figure(counts: Counter, username: str = "", rotation: int = 295) -> go.Figure:
+    """Builds the pie chart of these genre flair counts."""
+
+    if (username == ""):
         plot_title_text="r/nearprog Top Genres"
-        counts = Counter([post['link_flair_text'] for post in posts])
-        file_name = "pie_genre.png"
     else:
-        if (optUser.startswith("u/")):
-            username = optUser[2:] # remove "u/" if present
-        else:
-            username = optUser
         plot_title_text=f"u/{username} Top Genres"
-        counts = Counter([post['link_flair_text'] for post in posts if post['author'] == username])
-        file_name = f"pie_genre_for_{username}.png"
 
     ordered = counts.most_common()
     keys, values = zip(*ordered)
@@ -78,9 +86,29 @@ def pie_genre(optUser = "", rotation = 295, export = False):
         paper_bgcolor="LightSteelBlue"
     )
 
+    return fig
+
+def pie_genre(optUser = "", rotation = 295, export = False, force = False):
+
+    username = username_of(optUser)
+    output = output_of(username)
+
+    counts = flair_counts.FlairCounts.read(basedir / 'data/posts_parsed.json').of(username)
+
+    # skip the whole render if the saved plot is already up to date
+    if (export):
+        key = render_key(counts, username, rotation)
+
+        if (not force and plotcache.is_current(output, key)):
+            print(f"{output} is up to date")
+            return
+
+    fig = pie_figure(counts, username, rotation)
+
     # TODO add "plot saved to /path/to/plot" message upon save
     if (export):
-        fig.write_image(str(basedir / f'plots/{file_name}')) # pip3 install kaleido
+        fig.write_image(str(output)) # pip3 install kaleido
+        plotcache.record(output, key)
     else:
         fig.show()
 
@@ -99,5 +127,8 @@ if ("plot_pie_genre.py" in sys.argv[0]):
     parser.add_argument('-s', dest="save", action='store_true',
         help="[s]ave the plot to a PNG file")
 
+    parser.add_argument('--force', dest="force", action='store_true',
+        help="save the plot even if the saved PNG is already up to date")
+
     args = parser.parse_args()
-    pie_genre(args.username, args.degrees, args.save)
\ No newline at end of file
+    pie_genre(args.username, args.degrees, args.save, args.force)
\ No newline at end of file
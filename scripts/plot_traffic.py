@@ -1,4 +1,5 @@
 import json, pathlib, sys, argparse
+from typing import List
 from datetime import datetime
 import plotly
 import plotly.graph_objects as go
@@ -8,6 +9,8 @@ import numpy as np
 from copy import deepcopy
 from datetime import timedelta
 
+from tools import traffic_store, traffic_analysis, plotcache
+
 basedir = pathlib.Path(__file__).parent
 
 #===============================================================================
@@ -21,10 +24,32 @@ basedir = pathlib.Path(__file__).parent
 #
 #-------------------------------------------------------------------------------
 
-def plot_traffic(view = "all", export = False):
+# fold view -> (hours per fold, name of the fold)
+periods = {
+    "week": (24 * 7, "week"),
+    "day":  (24,     "day")
+}
+
+def box(stats: traffic_analysis.BoxStats, name: str, color: str) -> go.Box:
+    """A box per bucket, drawn from precomputed statistics rather than every hourly value."""
+
+    return go.Box(x=stats.positions, q1=stats.q1, median=stats.median, q3=stats.q3,
+        lowerfence=stats.lowerfence, upperfence=stats.upperfence,
+        name=name, legendgroup=name, marker_color=color)
+
+def outliers(stats: traffic_analysis.BoxStats, name: str, color: str) -> go.Scatter:
+    """The outliers of each bucket, as plotly would draw them next to a box."""
+
+    return go.Scatter(x=stats.outlier_positions, y=stats.outlier_values, mode='markers',
+        name=name, legendgroup=name, showlegend=False, marker=dict(color=color, size=4))
 
-    with (basedir / 'data/traffic_merged.json').open('r') as f:
-        traffic = json.load(f)
+def render_key(view: str, today: int) -> str:
+    """The render cache key of a traffic plot (the "all" view drops today, so it changes daily even without new data)."""
+
+    return plotcache.key(pathlib.Path(__file__), basedir / 'tools/traffic_store.py', basedir / 'tools/traffic_analysis.py',
+        basedir / 'data/traffic_merged.json', basedir / 'data/promotion_posts.json', view=view, today=today if view == "all" else None)
+
+def read_promos() -> List[dict]:
 
     with (basedir / 'data/promotion_posts.json').open('r') as f:
         promos = json.load(f)
@@ -33,139 +58,113 @@ def plot_traffic(view = "all", export = False):
     # promos = sorted(promos, key = lambda x: (int(x["score"]), float(x["upvote_ratio"])), reverse = True)
 
     # sort promos in reverse order by timestamp
-    promos = sorted(promos, key = lambda x: float(x["created_utc"]), reverse = True)
+    return sorted(promos, key = lambda x: float(x["created_utc"]), reverse = True)
+
+def traffic_figure(store: traffic_store.TrafficStore, promos: List[dict], view: str, today: int) -> go.Figure:
+    """Builds the figure for one view ("all", or a fold onto one "week" or "day") of the traffic."""
 
     # here, we use daily data
     if (view == "all"):
-        # drop the first day (today) because there's incomplete data
-        # ...also drop the last 16 days, because that's before the sub began
-        timestamps, unique_pageviews, total_pageviews, users = zip(*traffic["day"][1:-16])
-        total_users = list(reversed(np.cumsum(list(reversed(users)))))
-        
+        # drop today, because there's incomplete data
+        # ...and the days before the sub began (which have no traffic at all)
+        days = store.range("day", start=store.first_active("day"), end=today)
+        total_users = traffic_analysis.total_users(days.subscriptions)
+
         # convert UNIX timestamps to datetime objects
-        datetimes = list(map(lambda x: datetime.utcfromtimestamp(x), timestamps))
+        datetimes = days.timestamps.astype('datetime64[s]')
 
         fig = go.Figure()
-        fig.add_trace(go.Scatter(x=datetimes, y=unique_pageviews, name='Unique Pageviews'))
+        fig.add_trace(go.Scatter(x=datetimes, y=days.uniques, name='Unique Pageviews'))
 
-        # fig.add_trace(go.Scatter(x=datetimes, y=total_pageviews, name='Total Pageviews'))
-        fig.add_trace(go.Scatter(x=datetimes, y=users, name='New Users')) #, mode='lines+markers'))
+        # fig.add_trace(go.Scatter(x=datetimes, y=days.pageviews, name='Total Pageviews'))
+        fig.add_trace(go.Scatter(x=datetimes, y=days.subscriptions, name='New Users')) #, mode='lines+markers'))
         fig.add_trace(go.Scatter(x=datetimes, y=total_users, name='Total Users')) #, mode='lines+markers'))
 
         # add some padding in the plot
-        fig.update_xaxes(range=[datetimes[-1]-timedelta(days=30),datetimes[0]+timedelta(days=30)])
+        fig.update_xaxes(range=[datetimes[0]-np.timedelta64(30, 'D'), datetimes[-1]+np.timedelta64(30, 'D')])
 
         ypos = 1500
         ydelta = -120
-        ysteps = 0
-
-        for p in promos:
-            if (int(p["score"]) > 26 and float(p["upvote_ratio"]) > 0.95):
-                utc_timestamp = float(p["created_utc"])
-                # actual_time_posted = datetime.utcfromtimestamp(utc_timestamp)
-                rounded_timestamp = utc_timestamp - (utc_timestamp % (24 * 60 * 60))
-                rounded_time_posted = datetime.utcfromtimestamp(rounded_timestamp)
-
-                fig.add_annotation(x=rounded_time_posted, y=ypos+ydelta*ysteps,
-                    text=p["title"],
-                    # text="&nbsp;"*15*max(0, ysteps-7)+p["title"]+"&nbsp;"*15*max(0, 7-ysteps),
-                    # showarrow=True,
-                    # arrowhead=1
-                    )
-
-                index = timestamps.index(rounded_timestamp)
-                ymax = max(unique_pageviews[index], total_users[index])
-
-                fig.add_shape(type="line",
-                    x0=rounded_time_posted, x1=rounded_time_posted,
-                    y0=0, y1=ymax,
-                    line=dict(color="#999999",width=1,dash="dot")
+
+        # join the high-impact promotions to their days (skipping any posted on a day without traffic data)
+        promos = [p for p in promos if int(p["score"]) > 26 and float(p["upvote_ratio"]) > 0.95]
+        posted, indices = traffic_analysis.promotion_days(days.timestamps, np.array([float(p["created_utc"]) for p in promos]))
+        ymaxes = np.fmax(days.uniques[indices], total_users[indices])
+
+        for ysteps, (p, index, ymax) in enumerate(zip((p for p, known in zip(promos, posted) if known), indices, ymaxes)):
+            rounded_time_posted = datetime.utcfromtimestamp(int(days.timestamps[index]))
+
+            fig.add_annotation(x=rounded_time_posted, y=ypos+ydelta*ysteps,
+                text=p["title"],
+                # text="&nbsp;"*15*max(0, ysteps-7)+p["title"]+"&nbsp;"*15*max(0, 7-ysteps),
+                # showarrow=True,
+                # arrowhead=1
                 )
 
-                ysteps += 1
+            fig.add_shape(type="line",
+                x0=rounded_time_posted, x1=rounded_time_posted,
+                y0=0, y1=ymax,
+                line=dict(color="#999999",width=1,dash="dot")
+            )
 
         fig.update_layout(title_text="r/nearprog Growth Over Time<br><span style='font-size:9pt;color:#666'>with high-impact (27+ upvotes, 95%+ upvote ratio) crossposts and promotions highlighted</span>")
         fig.update_layout(width=1000, height=600)
 
-        if (export):
-            fig.write_image(str(basedir / f'plots/traffic_all.png')) # pip3 install kaleido
-        else:
-            fig.show()
+        return fig
 
-    # here, we use hourly data
-    # TODO simplify / deduplicate code below
+    # here, we use hourly data, folded onto one week or one day
     else:
-        timestamps, unique_pageviews, total_pageviews = zip(*traffic["hour"])
-        hours = [t / 3600 for t in timestamps]
-        zero_hour = min(hours)
-        
-        # convert UNIX timestamps to datetime objects
-        datetimes = list(map(lambda x: datetime.utcfromtimestamp(x), timestamps))
+        period, title = periods[view]
+        uniques, pageviews = traffic_analysis.fold(store.range("hour"), period, basedir / 'data/traffic_folds')
 
         # for hourly data, plot Unique and Total views on independent y-axes
         fig = make_subplots(specs=[[{"secondary_y": True}]])
+        fig.update_layout(title_text=f"Total / Unique Page Views (by hour of {title})")
 
-        if (view == "week"):
-            fig.update_layout(title_text="Total / Unique Page Views (by hour of week)")
-            hours_per_week = 24 * 7
-            hour_of_week = [(h - zero_hour) % hours_per_week for h in hours]
-
-            fig.add_trace(
-                go.Box(x=hour_of_week, y=unique_pageviews, name='Unique Pageviews'),
-                secondary_y = True)
-
-            fig.add_trace(
-                go.Box(x=hour_of_week, y=total_pageviews, name='Total Pageviews'),
-                secondary_y = False)
+        fig.add_trace(box(uniques, 'Unique Pageviews', '#1f77b4'), secondary_y = True)
+        fig.add_trace(outliers(uniques, 'Unique Pageviews', '#1f77b4'), secondary_y = True)
 
-            # TODO align ticks like https://github.com/VictorBezak/Plotly_Multi-Axes_Gridlines
+        fig.add_trace(box(pageviews, 'Total Pageviews', '#d62728'), secondary_y = False)
+        fig.add_trace(outliers(pageviews, 'Total Pageviews', '#d62728'), secondary_y = False)
 
-            # Set titles of primary and secondary axes
-            fig.update_yaxes(secondary_y = False,
-                title_text="<span style='font-weight:bold;color:#d62728'>Total</span> page views")
+        # TODO align ticks like https://github.com/VictorBezak/Plotly_Multi-Axes_Gridlines
 
-            fig.update_yaxes(secondary_y = True, showgrid = False,
-                title_text = "<span style='font-weight:bold;color:#1f77b4'>Unique</span> page views")
+        # Set titles of primary and secondary axes
+        fig.update_yaxes(secondary_y = False,
+            title_text="<span style='font-weight:bold;color:#d62728'>Total</span> page views")
 
-            fig.update_layout(width=1000, height=600)
+        fig.update_yaxes(secondary_y = True, showgrid = False,
+            title_text = "<span style='font-weight:bold;color:#1f77b4'>Unique</span> page views")
 
-            if (export):
-                fig.write_image(str(basedir / f'plots/traffic_week.png')) # pip3 install kaleido
-            else:
-                fig.show()
-
-        elif (view == "day"):
-            fig.update_layout(title_text="Total / Unique Page Views (by hour of day)")
-            hours_per_day = 24
-            hour_of_day = [(h - zero_hour) % hours_per_day for h in hours]
+        fig.update_layout(width=1000, height=600)
 
-            fig.add_trace(
-                go.Box(x=hour_of_day, y=unique_pageviews, name='Unique Pageviews'),
-                secondary_y = True)
+        return fig
 
-            fig.add_trace(
-                go.Box(x=hour_of_day, y=total_pageviews, name='Total Pageviews'),
-                secondary_y = False)
+def plot_traffic(view = "all", export = False, force = False):
 
-            # TODO align ticks like https://github.com/VictorBezak/Plotly_Multi-Axes_Gridlines
+    if (view != "all" and view not in periods):
+        print(f"ERROR: Unknown data view '{view}'. Please choose 'week', 'day', or 'all'.")
+        sys.exit(1)
 
-            # Set titles of primary and secondary axes
-            fig.update_yaxes(secondary_y = False,
-                title_text="<span style='font-weight:bold;color:#d62728'>Total</span> page views")
+    output = basedir / f'plots/traffic_{view}.png'
+    today = traffic_store.today()
 
-            fig.update_yaxes(secondary_y = True, showgrid = False,
-                title_text = "<span style='font-weight:bold;color:#1f77b4'>Unique</span> page views")
+    # skip the whole render if the saved plot is already up to date
+    if (export):
+        key = render_key(view, today)
 
-            fig.update_layout(width=1000, height=600)
+        if (not force and plotcache.is_current(output, key)):
+            print(f"{output} is up to date")
+            return
 
-            if (export):
-                fig.write_image(str(basedir / f'plots/traffic_day.png')) # pip3 install kaleido
-            else:
-                fig.show()
+    store = traffic_store.TrafficStore.read(basedir / 'data/traffic_merged.json')
+    fig = traffic_figure(store, read_promos(), view, today)
 
-        else:
-            print(f"ERROR: Unknown data view '{view}'. Please choose 'week', 'day', or 'all'.")
-            sys.exit(1)
+    if (export):
+        fig.write_image(str(output)) # pip3 install kaleido
+        plotcache.record(output, key)
+    else:
+        fig.show()
 
 # command-line testing
 if ("plot_traffic.py" in sys.argv[0]):
@@ -179,5 +178,8 @@ if ("plot_traffic.py" in sys.argv[0]):
     parser.add_argument('-s', dest="save", action='store_true',
         help="[s]ave the plot to a PNG file")
 
+    parser.add_argument('--force', dest="force", action='store_true',
+        help="save the plot even if the saved PNG is already up to date")
+
     args = parser.parse_args()
-    plot_traffic(args.fold, args.save)
\ No newline at end of file
+    plot_traffic(args.fold, args.save, args.force)
\ No newline at end of file
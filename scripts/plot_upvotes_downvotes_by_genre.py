@@ -1,8 +1,10 @@
-import os, json, pathlib, sys, argparse
-from collections import defaultdict
-from statistics import median
+import os, json, math, pathlib, sys, argparse
+from typing import Dict, Optional, Tuple
+import numpy as np
 import plotly.graph_objects as go
 
+from tools import columnar, quantiles, plotcache
+
 basedir = pathlib.Path(__file__).parent
 
 #===============================================================================
@@ -15,21 +17,34 @@ basedir = pathlib.Path(__file__).parent
 #    $ python3 path/to/plot_upvotes_downvotes_by_genre.py [-h]
 #
 #-------------------------------------------------------------------------------
+#
+#  The up/downvote summaries of each genre are saved in
+#  data/vote_summaries.json, along with the creation time of the newest post
+#  summarised so far (the high-water mark). Each run only estimates the votes
+#  of the posts created since then, and merges them into the saved summaries
+#  (so posts already summarised keep the votes they had when they were; delete
+#  the file to summarise every post afresh).
+#
+#-------------------------------------------------------------------------------
+
+output = basedir / 'plots/upvotes_downvotes_by_genre.png'
 
-def plot_upvotes_downvotes_by_genre(export = False):
+summaries_file = basedir / 'data/vote_summaries.json'
 
-    with (basedir / 'data/posts_parsed.json').open('r') as f:
-        posts = json.load(f)
+# bumped whenever vote_summaries() changes, so saved summaries are rebuilt
+summaries_version = 1
 
-    counts = [(post['link_flair_text'], post['score'], post['upvote_ratio']) for post in posts if (post['author'] != "None" and post['link_flair_text'] != "None" and post['link_flair_text'] != "TBD")]
+Summaries = Dict[Optional[str], Tuple[quantiles.QuantileSummary, quantiles.QuantileSummary]]
 
-    # group by genre, keep [upvote, downvote] tuples per post
-    d = defaultdict(list)
-    for genre, score, upvote_ratio in counts:
-        if (score != 0):
-            upvotes   = score * upvote_ratio / (2 * upvote_ratio - 1)
-            downvotes = upvotes - score
-            d[genre].append((round(upvotes), round(downvotes), score, upvote_ratio))
+def render_key() -> str:
+    """The render cache key of the up/downvotes plot."""
+
+    return plotcache.key(pathlib.Path(__file__), basedir / 'tools/quantiles.py', basedir / 'data/posts_parsed.json')
+
+def estimate_votes(score: np.ndarray, upvote_ratio: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Estimates the up/downvotes of posts from their scores and upvote ratios.
+       Returns a mask of the posts whose votes can be estimated, and their
+       (rounded) up and downvotes."""
 
     # let u = # upvotes
     # let d = # downvotes
@@ -52,19 +67,108 @@ def plot_upvotes_downvotes_by_genre(export = False):
 
     #  edge case
     #    when u == d, s == 0 and r == 1/2
-    #    it's not possible to determine u or d, so skip
+    #    it's not possible to determine u or d, so skip (mask) these posts
+
+    denominator = 2 * upvote_ratio - 1
+    known = (score != 0) & (denominator != 0)
+
+    upvotes = score[known] * upvote_ratio[known] / denominator[known]
+    downvotes = upvotes - score[known]
+
+    # np.round() rounds halves to even, like round()
+    return (known, np.round(upvotes).astype(np.int64), np.round(downvotes).astype(np.int64))
+
+def vote_summaries(table: columnar.Table, since: float = -math.inf) -> Summaries:
+    """Summaries of the up and downvotes per post of each genre, of the posts
+       created after 'since', in order of first appearance."""
+
+    flairs, authors = table["link_flair_text"], table["author"]
+
+    # skip posts by deleted users, and posts without a genre
+    excluded = [code for code in (table.code("link_flair_text", "None"), table.code("link_flair_text", "TBD")) if code != -1]
+    valid = ~np.isin(flairs, excluded) & (table["created_utc"] > since)
+    if (table.code("author", "None") != -1):
+        valid &= authors != table.code("author", "None")
+
+    known, upvotes, downvotes = estimate_votes(table["score"][valid], table["upvote_ratio"][valid])
+    genres = flairs[valid][known]
+
+    # group the estimates by genre, in one sort
+    codes, first, inverse = np.unique(genres, return_index=True, return_inverse=True)
+    order = np.argsort(inverse, kind='stable')
+    bounds = np.cumsum(np.bincount(inverse, minlength=len(codes)))[:-1]
+
+    names = table.categories["link_flair_text"] + [None]
+    summaries = {}
+
+    for group in np.argsort(first, kind='stable'):
+        summaries[names[codes[group]]] = (quantiles.QuantileSummary(), quantiles.QuantileSummary())
+
+    for code, group_upvotes, group_downvotes in zip(codes.tolist(), np.split(upvotes[order], bounds), np.split(downvotes[order], bounds)):
+        summaries[names[code]][0].extend(group_upvotes.tolist())
+        summaries[names[code]][1].extend(group_downvotes.tolist())
+
+    return summaries
 
-    # uncomment to verify the above
-    #for (genre, posts) in list(d.items()):
-    #    for post in posts:
-    #        (upvotes, downvotes, score, upvote_ratio) = post
-    #        print(f'{upvote_ratio:1.2f}',"=",f'{round(upvotes/(upvotes+downvotes),2):1.2f}',"::",post)
+def read_summaries(path: pathlib.Path) -> Tuple[float, Summaries]:
+    """The saved summaries, and the high-water mark of the posts in them
+       (no summaries and -inf, if none were saved by this version)."""
+
+    try:
+        with path.open('r') as infile:
+            saved = json.load(infile)
+    except (OSError, ValueError):
+        return (-math.inf, {})
+
+    if (saved.get("version") != summaries_version):
+        return (-math.inf, {})
+
+    # genres are saved as a list, since a genre may be None (not a valid JSON key)
+    return (saved["ingested"], { genre: (quantiles.QuantileSummary.from_state(upvotes), quantiles.QuantileSummary.from_state(downvotes))
+        for genre, upvotes, downvotes in saved["genres"] })
+
+def write_summaries(path: pathlib.Path, ingested: float, summaries: Summaries) -> None:
+
+    saved = {
+        "version": summaries_version,
+        "ingested": ingested,
+        "genres": [[genre, upvotes.state(), downvotes.state()] for genre, (upvotes, downvotes) in summaries.items()]
+    }
+
+    # write to a temporary file and rename, so a crash can't leave corrupt summaries
+    temporary = path.with_suffix('.tmp')
+    with temporary.open('w') as outfile:
+        json.dump(saved, outfile)
+    os.replace(temporary, path)
+
+def update_summaries(table: columnar.Table, path: pathlib.Path = summaries_file) -> Summaries:
+    """Merges the posts created since the last update into the saved
+       summaries (in 'path'), saves them, and returns them."""
+
+    ingested, summaries = read_summaries(path)
+
+    for genre, (upvotes, downvotes) in vote_summaries(table, ingested).items():
+        if (genre in summaries):
+            summaries[genre][0].merge(upvotes)
+            summaries[genre][1].merge(downvotes)
+        else:
+            summaries[genre] = (upvotes, downvotes)
+
+    created = table["created_utc"]
+    if (len(created) and not np.isnan(created).all()):
+        ingested = max(ingested, float(np.nanmax(created)))
+
+    write_summaries(path, ingested, summaries)
+    return summaries
+
+def upvotes_downvotes_figure(table: columnar.Table) -> go.Figure:
+    """Builds the stacked bar chart of median up/downvotes per genre of these
+       posts, updating the saved summaries with any new posts."""
 
     # find median # upvotes / downvotes per genre
     tuples = []
-    for (genre, posts) in list(d.items()):
-        upvotes, downvotes, score, upvote_ratio = zip(*posts)
-        tuples.append((genre, median(upvotes), -1*median(downvotes)))
+    for (genre, (upvotes, downvotes)) in update_summaries(table).items():
+        tuples.append((genre, upvotes.median(), -1*downvotes.median()))
 
     # sort high-to-low by upvotes, then low-to-high by downvotes
     tuples = sorted(tuples, key=lambda x: (x[1], x[2]))
@@ -86,8 +190,23 @@ def plot_upvotes_downvotes_by_genre(export = False):
         )
     )
 
+    return fig
+
+def plot_upvotes_downvotes_by_genre(export = False, force = False):
+
+    # skip the whole render if the saved plot is already up to date
     if (export):
-        fig.write_image(str(basedir / f'plots/upvotes_downvotes_by_genre.png')) # pip3 install kaleido
+        key = render_key()
+
+        if (not force and plotcache.is_current(output, key)):
+            print(f"{output} is up to date")
+            return
+
+    fig = upvotes_downvotes_figure(columnar.columns(basedir / 'data/posts_parsed.json'))
+
+    if (export):
+        fig.write_image(str(output)) # pip3 install kaleido
+        plotcache.record(output, key)
     else:
         fig.show()
 
@@ -100,5 +219,8 @@ if ("plot_upvotes_downvotes_by_genre.py" in sys.argv[0]):
     parser.add_argument('-s', dest="save", action='store_true',
         help="[s]ave the plot to a PNG file")
 
+    parser.add_argument('--force', dest="force", action='store_true',
+        help="save the plot even if the saved PNG is already up to date")
+
     args = parser.parse_args()
-    plot_upvotes_downvotes_by_genre(args.save)
\ No newline at end of file
+    plot_upvotes_downvotes_by_genre(args.save, args.force)
\ No newline at end of file
@@ -1,9 +1,10 @@
-import os, sys, json, re, datetime, pathlib, jsonmerge, glob
-from functools import reduce
+import os, sys, json, re, datetime, pathlib
 from operator import itemgetter
 
 from tools import reddit
 from tools import extract
+from tools import records
+from tools import traffic_store
 
 basedir = pathlib.Path(__file__).parent
 connection = reddit.connect()
@@ -51,82 +52,67 @@ nearprog = connection.subreddit("nearprog")
 
 # fetch and parse post data
 def posts(limit = None, fetch = True, parse = True, export = False):
-    typed_fields = [("str",   "title"),
-                    ("float", "created_utc"),
-                    ("str",   "link_flair_text"),
-                    ("int",   "score"),
-                    ("float", "upvote_ratio"),
-                    ("str",   "author")]
+    fields = [field for field, _ in records.post_fields]
 
-    types, fields = zip(*typed_fields)
-
-    out_raw    = "data/posts_raw.txt"
+    out_raw    = "data/posts_raw.csv"
     out_parsed = "data/posts_parsed.json"
 
     # (1) fetch new data from Reddit, optionally save to raw output file
     if (fetch):
-        def get_fields(submission):
-            return list(map(lambda x: str(getattr(submission, x)), fields))
-            
-        # fetch post fields and separate with double semicolons (;;)
+
+        # fetch post fields as typed records
         all_posts = nearprog.top("all", limit=limit)
         song_posts = filter(lambda submission: reddit.is_song(submission), all_posts)
-        fetched_posts = [";;".join(get_fields(post)) for post in song_posts]
+        fetched_posts = [records.raw_post(post) for post in song_posts]
 
         # export to output file as optional side effect
         if (export):
-            with (basedir / out_raw).open('w') as outfile:
-                for row in fetched_posts:
-                    print(row, file=outfile)
+            with (basedir / out_raw).open('w', newline='') as outfile:
+                records.write_raw(fetched_posts, outfile)
 
         # if we're fetching but not exporting, print to terminal (testing)
         else:
-            for row in fetched_posts:
-                print(row)
+            records.write_raw(fetched_posts, sys.stdout)
             print("")
 
-    # (2) parse submissions from memory or from raw file as input file
+    # (2) parse submissions from memory (if just fetched) or from raw file as input file
     if (parse):
         max_field_width = max(len(max(fields, key=len)), len("raw_title")) + 2
 
+        if (fetch):
+            infile = None
+            rows = fetched_posts
+        else:
+            infile = (basedir / out_raw).open('r', newline='')
+            rows = records.read_raw(infile)
+
         if (export):
-            infile = (basedir / out_raw).open('r')
             outfile = (basedir / out_parsed).open('w')
         else:
-            infile = fetched_posts
             outfile = sys.stdout
 
-        # with fi as infile, fo as outfile:
-
         # open the JSON object for the first post
         print('[{', file=outfile)
 
         # write a "}, {" before every entry except the first
         first_row = True
 
-        for row in infile:
+        for row in rows:
             if (first_row == False):
                 print("}, {", file=outfile)
             first_row = False
 
-            # split the input into field values
-            field_values = row.split(";;")
-
             # write the non-title fields (we'll parse "title" below)
-            for field in fields:
+            for field, field_value in zip(fields, row):
                 if (field != "title"):
-                    field_type  =        types[fields.index(field)]
-                    field_value = field_values[fields.index(field)]
-                    if (field_type == "str"):
-                        field_value = '"' + field_value.strip() + '"'
-                    else:
-                        field_value = eval(f'{field_type}(field_value)')
+                    if (isinstance(field_value, str)):
+                        field_value = json.dumps(field_value.strip(), ensure_ascii=False)
                     field += '"'
                     print(f'  "{field:{max_field_width}s}: {field_value},', file=outfile)
 
-            # if raw.txt file contains a "title" field, try to parse it
+            # if raw records contain a "title" field, try to parse it
             if ("title" in fields):
-                raw_title = field_values[fields.index("title")].strip()
+                raw_title = row[fields.index("title")].strip()
                 artist, song = reddit.split_title(raw_title)
 
                 # extract the [subgenre] tag, if there is one
@@ -167,8 +153,9 @@ def posts(limit = None, fetch = True, parse = True, export = False):
 
         print('}]', file=outfile)
 
-        if (export):
+        if (infile):
             infile.close()
+        if (export):
             outfile.close()
 
 # fetch and save traffic data
@@ -188,11 +175,7 @@ def traffic(export = False):
     traffic = nearprog.traffic()
 
     # print this new traffic data to a new file
-    output = json.dumps(traffic, indent=2)
-    output = re.sub(r'  \[\s+',      r'  [',  output)
-    output = re.sub(r'([0-9]),\s+',  r'\1, ', output)
-    output = re.sub(r'([0-9])\s+\]', r'\1]',  output)
-    print(output, file=outfile)
+    traffic_store.write(traffic, outfile)
 
     outfile.close()
 
@@ -207,51 +190,8 @@ def traffic(export = False):
         
         os.symlink(out, basedir / "data" / symlink)
 
-        # then, get all new and existing traffic files
-        all_traffic_files = sorted(glob.glob(str(basedir / "data" / "traffic_20*h.json")), reverse=True)
-
-        def file_to_dict(filename):
-            with open(filename, 'r') as infile:
-                return json.load(infile)
-
-        # ...read them all in as dictionaries
-        all_traffic_json = list(map(lambda x: file_to_dict(x), all_traffic_files))
-
-        # merge arrays by blindly appending all values
-        schema = { "properties": {
-            "day": { "mergeStrategy": "append" },
-            "hour": { "mergeStrategy": "append" },
-            "month": { "mergeStrategy": "append" }
-            } }
-
-        # merge all traffic files
-        merger = jsonmerge.Merger(schema)
-        merged = reduce(lambda x, y: merger.merge(x, y), all_traffic_json)
-
-        # remove duplicate-timestamped sublists
-        def dedup(list_of_lists):
-            deduped = list()
-            timestamps = set()
-            for sublist in list_of_lists:
-                timestamp = sublist[0]
-                if timestamp not in timestamps:
-                    deduped.append(sublist)
-                    timestamps.add(timestamp)
-            return deduped
-
-        # remove duplicate timestamps in "hour", "day", and "month" individually
-        merged = { key:dedup(value) for (key, value) in merged.items() }
-
-        # sort in-place
-        [merged[key].sort(reverse = True) for key in merged]
-
-        # export merged data to file
-        with (basedir / "data" / "traffic_merged.json").open('w') as mfile:
-            output = json.dumps(merged, indent=2)
-            output = re.sub(r'  \[\s+',      r'  [',  output)
-            output = re.sub(r'([0-9]),\s+',  r'\1, ', output)
-            output = re.sub(r'([0-9])\s+\]', r'\1]',  output)
-            print(output, file=mfile)
+        # fold the new traffic data into the merged traffic data (newest values win)
+        traffic_store.update(basedir / "data", traffic)
 
 # pull some data about a post, given its URL; always return as a dict
 def from_url(url):
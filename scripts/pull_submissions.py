@@ -3,11 +3,11 @@ import sys, json, re
 from pathlib import Path
 from praw import Reddit
 from praw.models import Subreddit, Submission
-from typing import Iterator, List
-from functools import reduce
+from typing import Iterator, List, Tuple
 
 from tools import reddit
 from tools import extract
+from tools import records
 
 basedir: Path = Path(__file__).parent
 connection: Reddit = reddit.connect()
@@ -31,10 +31,8 @@ class Post:
                 (self.link_flair_text != 'Announcement') and
                 ('[Discussion]' not in self.title))
 
-    def as_raw(self) -> str:
-        keys = ["title", "created_utc", "link_flair_text", "score", "upvote_ratio", "author"]
-        values = map(lambda k: str(getattr(self, k)), keys)
-        return reduce((lambda a, b: f"{a};;{b}"), values)
+    def as_raw(self) -> Tuple:
+        return records.raw_post(self)
 
 def fetch_posts(limit: int = None) -> Iterator[Post]:
     submissions = nearprog.top("all", limit=limit)
@@ -43,16 +41,9 @@ def fetch_posts(limit: int = None) -> Iterator[Post]:
 
 # fetch and parse post data
 def posts(limit = None, fetch = True, parse = True, export = False):
-    typed_fields = [("str",   "title"),
-                    ("float", "created_utc"),
-                    ("str",   "link_flair_text"),
-                    ("int",   "score"),
-                    ("float", "upvote_ratio"),
-                    ("str",   "author")]
+    fields = [field for field, _ in records.post_fields]
 
-    types, fields = zip(*typed_fields)
-
-    out_raw    = "data/posts_raw.txt"
+    out_raw    = "data/posts_raw.csv"
     out_parsed = "data/posts_parsed.json"
 
     # (1) fetch new data from Reddit, optionally save to raw output file
@@ -62,68 +53,59 @@ def posts(limit = None, fetch = True, parse = True, export = False):
             fetched_posts = list(map(lambda p: p.as_raw(), fetch_posts(limit)))
 
         else:
-            def get_fields(submission):
-                return list(map(lambda x: str(getattr(submission, x)), fields))
-                
-            # fetch post fields and separate with double semicolons (;;)
+            # fetch post fields as typed records
             all_posts = nearprog.top("all", limit=limit)
             song_posts = filter(lambda submission: reddit.is_song(submission), all_posts)
-            fetched_posts = [";;".join(get_fields(post)) for post in song_posts]
+            fetched_posts = [records.raw_post(post) for post in song_posts]
 
         # export to output file as optional side effect
         if (export):
-            with (basedir / out_raw).open('w') as outfile:
-                for row in fetched_posts:
-                    print(row, file=outfile)
+            with (basedir / out_raw).open('w', newline='') as outfile:
+                records.write_raw(fetched_posts, outfile)
 
         # if we're fetching but not exporting, print to terminal (testing)
         else:
-            for row in fetched_posts:
-                print(row)
+            records.write_raw(fetched_posts, sys.stdout)
             print("")
 
-    # (2) parse submissions from memory or from raw file as input file
+    # (2) parse submissions from memory (if just fetched) or from raw file as input file
     if (parse):
         max_field_width = max(len(max(fields, key=len)), len("raw_title")) + 2
 
+        if (fetch):
+            infile = None
+            rows = fetched_posts
+        else:
+            infile = (basedir / out_raw).open('r', newline='')
+            rows = records.read_raw(infile)
+
         if (export):
-            infile = (basedir / out_raw).open('r')
             outfile = (basedir / out_parsed).open('w')
         else:
-            infile = fetched_posts
             outfile = sys.stdout
 
-        # with fi as infile, fo as outfile:
-
         # open the JSON object for the first post
         print('[{', file=outfile)
 
         # write a "}, {" before every entry except the first
         first_row = True
 
-        for row in infile:
+        for row in rows:
             if (first_row == False):
                 print("}, {", file=outfile)
             first_row = False
 
-            # split the input into field values
-            field_values = row.split(";;")
-
             # write the non-title fields (we'll parse "title" below)
-            for field in fields:
+            for field, field_value in zip(fields, row):
                 if (field != "title"):
-                    field_type  =        types[fields.index(field)]
-                    field_value = field_values[fields.index(field)]
-                    if (field_type == "str"):
-                        field_value = '"' + field_value.strip() + '"'
-                    else:
-                        field_value = eval(f'{field_type}(field_value)')
+                    if (isinstance(field_value, str)):
+                        field_value = json.dumps(field_value.strip(), ensure_ascii=False)
                     field += '"'
                     print(f'  "{field:{max_field_width}s}: {field_value},', file=outfile)
 
-            # if raw.txt file contains a "title" field, try to parse it
+            # if raw records contain a "title" field, try to parse it
             if ("title" in fields):
-                raw_title = field_values[fields.index("title")].strip()
+                raw_title = row[fields.index("title")].strip()
                 artist, song = reddit.split_title(raw_title)
 
                 # extract the [subgenre] tag, if there is one
@@ -164,8 +146,9 @@ def posts(limit = None, fetch = True, parse = True, export = False):
 
         print('}]', file=outfile)
 
-        if (export):
+        if (infile):
             infile.close()
+        if (export):
             outfile.close()
 
 # command-line testing
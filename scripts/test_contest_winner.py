@@ -0,0 +1,25 @@
+from statistics import mean, stdev
+
+from tools import defuzz
+import contest_winner
+
+def test_adaptive_ranking_keeps_settled_comments_on_their_side():
+    # 'noisy' alternates between 20 and 80, so it settles below the top 2 with a large stdev
+    noisy = [20, 80]
+    fixed = { "t1_a": 100, "t1_b": 75, "t1_c": 55 }
+
+    def sample_round(active):
+        scores = { id: fixed[id] for id in active if id in fixed }
+        if ("t1_noisy" in active):
+            scores["t1_noisy"] = noisy[0]
+            noisy.reverse()
+        return scores
+
+    samples, _ = defuzz.adaptive(sample_round, ["t1_a", "t1_b", "t1_c", "t1_noisy"], 2, 100)
+    tuples = { id: (mean(values), stdev(values)) for id, values in samples.items() }
+
+    # by (mean + stdev), the noisy comment would outrank one settled inside the top 2
+    assert tuples["t1_noisy"][0] + tuples["t1_noisy"][1] > tuples["t1_b"][0]
+
+    ranked = contest_winner.rank_comments(tuples, adaptive = True)
+    assert [id for id, _ in ranked[:2]] == ["t1_a", "t1_b"]
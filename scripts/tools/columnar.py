@@ -0,0 +1,183 @@
+import sys, json, pathlib, argparse
+from array import array
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+basedir = pathlib.Path(__file__).parent.parent
+
+# so that tools.* can be imported when this file is run as a script
+sys.path.append(str(basedir))
+from tools import records
+
+#===============================================================================
+#
+#  columnar (NumPy) export of the parsed post archive, for fast analytics
+#
+#-------------------------------------------------------------------------------
+#
+#  run with
+#    $ python3 path/to/columnar.py [-h]
+#
+#-------------------------------------------------------------------------------
+#
+#  data/posts_parsed.json (or new/output/songs.json) is exported to a
+#  directory holding one .npy file per column, plus a meta.json file:
+#
+#    - numeric columns (timestamps, scores, upvote ratios) are typed arrays
+#    - string columns (flairs, authors, subgenres) are dictionary-encoded:
+#      an int32 array of codes, plus the list of distinct values in meta.json
+#      (a missing value is stored as the code -1)
+#
+#  columnar.load() memory-maps the .npy files, so analytics can start without
+#  parsing any JSON at all. If the source file has changed since the export,
+#  columnar.columns() re-exports it first.
+#
+#===============================================================================
+
+# column name -> numpy dtype, or "category" for a dictionary-encoded string
+schemas = {
+    "posts": {
+        "created_utc":     "f8",
+        "score":           "i8",
+        "upvote_ratio":    "f8",
+        "link_flair_text": "category",
+        "author":          "category",
+        "subgenre":        "category"
+    },
+    "songs": {
+        "timestamp":       "i8",
+        "score":           "i8",
+        "upvote_ratio":    "f8",
+        "flair":           "category",
+        "artist":          "category",
+        "subgenre":        "category"
+    }
+}
+
+# array module typecodes used while the columns are being built
+typecodes = { "f8": "d", "i8": "q", "category": "i" }
+
+class Table:
+    """Columns loaded by columnar.load(): numeric columns as arrays, and
+       dictionary-encoded columns as arrays of codes into 'categories'."""
+
+    def __init__(self, columns: Dict[str, np.ndarray], categories: Dict[str, List[str]]) -> None:
+        self.columns = columns
+        self.categories = categories
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def code(self, name: str, value: str) -> int:
+        """Returns the code of this value in a dictionary-encoded column (-1 if absent)."""
+        try:
+            return self.categories[name].index(value)
+        except ValueError:
+            return -1
+
+    def decode(self, name: str) -> np.ndarray:
+        """Returns a dictionary-encoded column as an array of strings (None where missing)."""
+        values = np.array(self.categories[name] + [None], dtype=object)
+        return values[self.columns[name]]
+
+def source_stamp(source: pathlib.Path) -> Dict[str, Any]:
+    stat = source.stat()
+    return { "source": str(source.resolve()), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns }
+
+def export(source: pathlib.Path, directory: pathlib.Path, schema: str = "posts") -> int:
+    """Exports the JSON array of records in 'source' to a directory of .npy
+       columns. Returns the number of records exported."""
+
+    columns = schemas[schema]
+    built = { name: array(typecodes[dtype]) for name, dtype in columns.items() }
+    categories: Dict[str, Dict[str, int]] = { name: {} for name, dtype in columns.items() if dtype == "category" }
+
+    # records are streamed, so only the (compact) columns are held in memory
+    count = 0
+    for record in records.load(source):
+        for name, dtype in columns.items():
+            value = record.get(name)
+            if (dtype == "category"):
+                if (value is None):
+                    built[name].append(-1)
+                else:
+                    built[name].append(categories[name].setdefault(value, len(categories[name])))
+            elif (dtype == "f8"):
+                built[name].append(float("nan") if value is None else value)
+            else:
+                built[name].append(0 if value is None else value)
+        count += 1
+
+    directory.mkdir(parents=True, exist_ok=True)
+
+    for name, dtype in columns.items():
+        np.save(directory / f"{name}.npy", np.frombuffer(built[name], dtype="i4" if dtype == "category" else dtype))
+
+    meta = source_stamp(source)
+    meta.update({
+        "schema": schema,
+        "count": count,
+        "columns": columns,
+        "categories": { name: list(values) for name, values in categories.items() }
+    })
+
+    # meta.json is written last, so a half-finished export is never loaded as complete
+    with (directory / "meta.json").open('w') as outfile:
+        print(json.dumps(meta, indent=2, ensure_ascii=False), file=outfile)
+
+    return count
+
+def load(directory: pathlib.Path) -> Table:
+    """Memory-maps the columns exported to this directory."""
+
+    with (directory / "meta.json").open('r') as infile:
+        meta = json.load(infile)
+
+    columns = { name: np.load(directory / f"{name}.npy", mmap_mode='r') for name in meta["columns"] }
+    return Table(columns, meta["categories"])
+
+def is_fresh(source: pathlib.Path, directory: pathlib.Path, schema: str) -> bool:
+    """Returns True if this directory holds an export of the current contents of 'source'."""
+
+    try:
+        with (directory / "meta.json").open('r') as infile:
+            meta = json.load(infile)
+    except (OSError, ValueError):
+        return False
+
+    stamp = source_stamp(source)
+    return meta.get("schema") == schema and all(meta.get(key) == value for key, value in stamp.items())
+
+def columns(source: pathlib.Path, directory: Optional[pathlib.Path] = None, schema: str = "posts") -> Table:
+    """Loads the columnar export of 'source' (by default, in a sibling
+       "<name>_columns" directory), exporting it first if it is missing or stale."""
+
+    directory = directory or source.with_name(f"{source.stem}_columns")
+
+    if (not is_fresh(source, directory, schema)):
+        export(source, directory, schema)
+
+    return load(directory)
+
+# command-line interface
+if ("columnar.py" in sys.argv[0]):
+
+    desc = "Script to export a JSON post archive to memory-mappable NumPy columns."
+    parser = argparse.ArgumentParser(description=desc)
+
+    parser.add_argument('-i', dest="source", type=pathlib.Path, default=basedir / 'data/posts_parsed.json',
+        help="JSON array of records to export: default data/posts_parsed.json")
+
+    parser.add_argument('-o', dest="directory", type=pathlib.Path, default=None,
+        help="directory to export the columns to: default <source>_columns, next to the source")
+
+    parser.add_argument('-s', dest="schema", choices=list(schemas), default="posts",
+        help="posts (posts_parsed.json) or songs (new/output/songs.json): default posts")
+
+    args = parser.parse_args()
+    directory = args.directory or args.source.with_name(f"{args.source.stem}_columns")
+    print(f"exported {export(args.source, directory, args.schema)} records from {args.source} to {directory}")
@@ -0,0 +1,216 @@
+import math, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from praw import Reddit
+
+T = TypeVar("T")
+
+#===============================================================================
+#
+#  methods for "de-fuzzing" Reddit scores by sampling them many times
+#
+#-------------------------------------------------------------------------------
+#
+#  Reddit randomly "fuzzes" the scores of submissions and comments, so the
+#  only way to find the true score is to request it many times and average.
+#  Each sampling round is independent of the others, so rounds can be run
+#  concurrently on a small pool of threads, each with its own connection.
+#
+#  Reddit allows 100 requests per minute per OAuth client (averaged over a
+#  10-minute window). All rounds share a single RateLimiter, and PRAW will
+#  additionally back off if Reddit reports that we're close to the limit.
+#
+#  Alternatively, sampling can be "adaptive": after a few rounds, items whose
+#  confidence interval lies entirely above or below the cutoff (the top-N
+#  boundary of a playlist, or the winner(s) of a contest) are no longer
+#  sampled, since more samples cannot change whether they make the cut.
+#
+#===============================================================================
+
+# maximum number of fullnames Reddit will look up in a single /api/info request
+info_batch_size = 100
+
+class RateLimiter:
+    """Token bucket shared between threads: allows bursts of up to 'burst'
+       requests, refilled at a rate of 'requests_per_minute'."""
+
+    def __init__(self, requests_per_minute: int = 100, burst: int = 100) -> None:
+        self.interval = 60.0 / requests_per_minute
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self) -> None:
+        """Block until a request may be sent."""
+
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) / self.interval)
+            self.updated = now
+            self.tokens -= 1
+            delay = -self.tokens * self.interval if self.tokens < 0 else 0
+
+        if (delay > 0):
+            time.sleep(delay)
+
+def sample(sample_round: Callable[[Reddit], T], iterations: int, connection: Reddit, connect: Callable[[], Reddit], workers: int = 1) -> List[T]:
+    """Run 'iterations' sampling rounds, and return their results in order.
+
+    With a single worker, every round uses the given connection. Otherwise,
+    rounds run on a pool of 'workers' threads, and each thread opens its own
+    connection with connect(), since PRAW connections are not thread-safe.
+    connect() should raise (not exit) on failure, so the error reaches the
+    caller through the pool."""
+
+    if (workers < 2):
+        return [sample_round(connection) for _ in range(iterations)]
+
+    local = threading.local()
+
+    def run(_: int) -> T:
+        if (not hasattr(local, "connection")):
+            local.connection = connect()
+        return sample_round(local.connection)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run, range(iterations)))
+
+def batches(items: Sequence[T], size: int) -> List[Sequence[T]]:
+    """Split 'items' into consecutive batches of at most 'size' items."""
+
+    return [items[i:i+size] for i in range(0, len(items), size)]
+
+def sample_scores(connection: Reddit, connect: Callable[[], Reddit], fullnames: List[str], iterations: int,
+        workers: int = 1, limiter: Optional[RateLimiter] = None) -> Dict[str, List[int]]:
+    """Sample the scores of the submissions / comments with the given fullnames
+       (t3_... / t1_...) 'iterations' times, using batched /api/info requests.
+
+    Returns a dict mapping each fullname to its list of sampled scores."""
+
+    limiter = limiter or RateLimiter()
+
+    def sample_round(connection: Reddit) -> Dict[str, int]:
+        scores = {}
+        for batch in batches(fullnames, info_batch_size):
+            limiter.wait()
+            for thing in connection.info(fullnames=list(batch)):
+                scores[thing.fullname] = thing.score
+        return scores
+
+    rounds = sample(sample_round, iterations, connection, connect, workers)
+
+    return { fullname : [scores[fullname] for scores in rounds if fullname in scores] for fullname in fullnames }
+
+class RunningStats:
+    """Running mean and variance of a stream of scores (Welford's algorithm)."""
+
+    def __init__(self) -> None:
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x: float) -> None:
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def interval(self, z: float, min_stdev: float) -> Tuple[float, float]:
+        """Confidence interval of the mean. 'min_stdev' stops a few identical
+           samples from looking infinitely precise."""
+
+        if (self.n == 0):
+            return (-math.inf, math.inf)
+
+        stdev = math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+        half_width = z * max(stdev, min_stdev) / math.sqrt(self.n)
+        return (self.mean - half_width, self.mean + half_width)
+
+def unsettled(stats: Dict[str, RunningStats], places: int, z: float, min_stdev: float) -> List[str]:
+    """Return the ids whose confidence interval still overlaps the boundary
+       between the top 'places' items and the rest (ranked by mean score)."""
+
+    if (places < 1 or places >= len(stats)):
+        return []
+
+    ranked = sorted(stats.values(), key = lambda s: s.mean, reverse = True)
+    boundary = (ranked[places-1].mean + ranked[places].mean) / 2
+
+    def overlaps(s: RunningStats) -> bool:
+        low, high = s.interval(z, min_stdev)
+        return (low <= boundary <= high)
+
+    return [id for id, s in stats.items() if overlaps(s)]
+
+def adaptive(sample_round: Callable[[List[str]], Dict[str, int]], ids: List[str], places: int, max_iterations: int,
+        min_iterations: int = 5, z: float = 2.58, min_stdev: float = 1.0) -> Tuple[Dict[str, List[int]], int]:
+    """Sample the scores of 'ids' until every item is settled above or below
+       the top-'places' boundary, or until 'max_iterations' rounds have run.
+
+    sample_round(active) returns the current score of each active id. Every id
+    gets at least 'min_iterations' samples. Returns a dict mapping each id to
+    its list of sampled scores, and the number of rounds that were run."""
+
+    samples = { id : list() for id in ids }
+    stats = { id : RunningStats() for id in ids }
+    active = list(ids)
+    rounds = 0
+
+    while (active and rounds < max_iterations):
+        for id, score in sample_round(active).items():
+            samples[id].append(score)
+            stats[id].add(score)
+        rounds += 1
+
+        if (rounds >= min_iterations):
+            active = unsettled(stats, places, z, min_stdev)
+
+    return (samples, rounds)
+
+def adaptive_scores(connection: Reddit, connect: Callable[[], Reddit], fullnames: List[str], places: int, max_iterations: int,
+        min_iterations: int = 5, workers: int = 1, limiter: Optional[RateLimiter] = None) -> Tuple[Dict[str, List[int]], int, int]:
+    """Adaptively sample the scores of the given fullnames with batched
+       /api/info requests (see adaptive()).
+
+    Each round depends on the results of the last, so rounds run one after
+    another; instead, the batches within a round run on a pool of 'workers'
+    threads, each with its own connection (as in sample()).
+
+    Returns a dict mapping each fullname to its list of sampled scores, the
+    number of requests made, and the number of requests saved compared to
+    sampling every fullname 'max_iterations' times."""
+
+    limiter = limiter or RateLimiter()
+    requests = 0
+    local = threading.local()
+
+    def sample_batch(connection: Reddit, batch: Sequence[str]) -> Dict[str, int]:
+        limiter.wait()
+        return { thing.fullname : thing.score for thing in connection.info(fullnames=list(batch)) }
+
+    def run(batch: Sequence[str]) -> Dict[str, int]:
+        if (not hasattr(local, "connection")):
+            local.connection = connect()
+        return sample_batch(local.connection, batch)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+
+        def sample_round(active: List[str]) -> Dict[str, int]:
+            nonlocal requests
+            round_batches = batches(active, info_batch_size)
+            requests += len(round_batches)
+
+            if (workers < 2 or len(round_batches) < 2):
+                results = [sample_batch(connection, batch) for batch in round_batches]
+            else:
+                results = list(pool.map(run, round_batches))
+
+            return { fullname : score for result in results for fullname, score in result.items() }
+
+        samples, _ = adaptive(sample_round, fullnames, places, max_iterations, min_iterations)
+
+    fixed = max_iterations * len(batches(fullnames, info_batch_size))
+
+    return (samples, requests, fixed - requests)
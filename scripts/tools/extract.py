@@ -68,6 +68,96 @@ tests([
     ('contains('+ str(arr) +', "frog")', False )
     ])
 
+# A list of words / names, loaded from a JSON file and indexed for fast matching
+#   lexicon.contains(elem) == contains(<JSON list>, elem)
+#
+# Entries which are substrings of 'elem' are found with an Aho-Corasick automaton
+# over all (lowercased) entries, in a single scan of 'elem'. Entries which contain
+# 'elem' are found with one substring search over all entries, joined together.
+# The JSON file is loaded on first use. Callers check it for changes on disk with
+# reload_if_changed() once per top-level call, rather than once per word checked.
+class Lexicon:
+    def __init__(self, path):
+        self.path = path
+        self.mtime = None
+        self.entries = []
+
+    def reload_if_changed(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        if (mtime != self.mtime):
+            with self.path.open('r') as f:
+                self.entries = json.load(f)
+            self.index()
+            self.mtime = mtime
+
+    def index(self):
+        lowered = [entry.lower() for entry in self.entries]
+
+        # no entry can contain the separator, so no match can span two entries
+        self.joined = "\0".join(lowered)
+
+        # build a trie of all entries: goto[node][char] => next node
+        self.goto = [{}]
+        self.accept = [False]
+        for entry in lowered:
+            node = 0
+            for char in entry:
+                if (char not in self.goto[node]):
+                    self.goto.append({})
+                    self.accept.append(False)
+                    self.goto[node][char] = len(self.goto) - 1
+                node = self.goto[node][char]
+            self.accept[node] = True
+
+        # breadth-first, link each node to the longest proper suffix which is also in the trie
+        self.fail = [0] * len(self.goto)
+        queue = list(self.goto[0].values())
+        for node in queue:
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                suffix = self.fail[node]
+                while (suffix and char not in self.goto[suffix]):
+                    suffix = self.fail[suffix]
+                self.fail[child] = self.goto[suffix].get(char, 0) if node else 0
+                self.accept[child] = self.accept[child] or self.accept[self.fail[child]]
+
+    # True if any entry is a substring of 'text'
+    def any_entry_in(self, text):
+        node = 0
+        if (self.accept[node]):
+            return True
+        for char in text:
+            while (node and char not in self.goto[node]):
+                node = self.fail[node]
+            node = self.goto[node].get(char, 0)
+            if (self.accept[node]):
+                return True
+        return False
+
+    def contains(self, elem):
+        if (self.mtime is None):
+            self.reload_if_changed()
+        if (self.entries == []):
+            return False
+        elem_lower = elem.lower()
+        if ("\0" in elem_lower):
+            return contains(self.entries, elem)
+        return (self.any_entry_in(elem_lower) or elem_lower in self.joined)
+
+compound_artists = Lexicon(basedir / '../../json/compound_artists.json')
+genre_words = Lexicon(basedir / '../../json/genre_words.json')
+
+tests([
+    ('compound_artists.contains("maps & atlases")', True  ),
+    ('compound_artists.contains("Maps")',           True  ),
+    ('compound_artists.contains("The Voidz")',      True  ),
+    ('compound_artists.contains("Muse")',           False ),
+    ('genre_words.contains("Mathrock")',            True  ),
+    ('genre_words.contains("post-rock")',           True  ),
+    ('genre_words.contains("Fleetwood")',           False ),
+    ('all(genre_words.contains(w) == contains(genre_words.entries, w) for w in ["jazzy", "ele", "Trap", "x", "", "Mac"])', True)
+    ])
+
 #===============================================================================
 #
 #  methods to extract information from post titles
@@ -77,16 +167,15 @@ tests([
 # try to extract multiple artist names
 def multiple_artists(artist):
 
+    # pick up any changes to the list of compound artists (once per call, not per name)
+    compound_artists.reload_if_changed()
+
     # split on " ft." / " feat."
     artists = re.split(r'\s+[Ff]eat.\s*|\s+[Ff]t.\s*', artist)
 
     # don't split artist names like "Black Country, New Road" and "Simon and Garfunkel"
-    with (basedir / '../../json/compound_artists.json').open('r') as f:
-        compound_artists = json.load(f)
-
-    # split if not a compound artist
     def is_compound(artist):
-        return contains(compound_artists, artist)
+        return compound_artists.contains(artist)
 
     # split on "and" except when followed by "the", like "Jim and the Other Guys"
     # split on ",", "+", "&"
@@ -128,12 +217,9 @@ tests([
 def parenthetical_subgenre(song):
 
     # try to parse (subgenre) like [subgenre]
-    with (basedir / '../../json/genre_words.json').open('r') as f:
-        genre_words = json.load(f)
-
     # return True if this word is a "genre word"
     def is_genre_word(word):
-        return contains(genre_words, word)
+        return genre_words.contains(word)
 
     # extract "words" from any string
     # a "word" is any sequence of characters not including .-/, etc.
@@ -144,6 +230,9 @@ def parenthetical_subgenre(song):
     def all_genre_words(arr):
         return all(map(lambda x: is_genre_word(x), arr))
 
+    # pick up any changes to the list of genre words (once per call, not per word)
+    genre_words.reload_if_changed()
+
     # find all (...) parenthetical expressions
     parentheticals = re.findall(r'\(([^(]+)\)', song)
 
@@ -0,0 +1,75 @@
+import pathlib
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from tools import columnar
+
+#===============================================================================
+#
+#  genre flair counts of the post archive, for every author at once
+#
+#-------------------------------------------------------------------------------
+#
+#  The flair and author columns of the columnar export (see columnar.py) are
+#  combined into one key per post, and counted in a single grouped pass, so
+#  the flair counts of every author (and of the whole subreddit) are just
+#  lookups afterwards, rather than a pass over all of the posts per author.
+#
+#  Counts are kept in order of first appearance, so Counter.most_common()
+#  breaks ties exactly as it would counting the posts one at a time.
+#
+#===============================================================================
+
+class FlairCounts:
+    """Flair counts of the whole archive, and of each author."""
+
+    def __init__(self, total: Counter, by_author: Dict[Optional[str], Counter]) -> None:
+        self.total = total
+        self.by_author = by_author
+
+    @staticmethod
+    def from_table(table: columnar.Table) -> 'FlairCounts':
+        flairs, authors = table["link_flair_text"], table["author"]
+        flair_names = table.categories["link_flair_text"] + [None]
+        author_names = table.categories["author"] + [None]
+
+        # codes are shifted by one, so that missing values (-1) get keys too
+        width = len(flair_names)
+        keys = (authors.astype(np.int64) + 1) * width + (flairs + 1)
+
+        # one grouped pass: every distinct (author, flair), its first post, and its count
+        pairs, first, counts = np.unique(keys, return_index=True, return_counts=True)
+        order = np.argsort(first, kind='stable')
+
+        by_author: Dict[Optional[str], Counter] = {}
+        for pair, count in zip(pairs[order].tolist(), counts[order].tolist()):
+            author, flair = divmod(pair, width)
+            by_author.setdefault(author_names[author - 1], Counter())[flair_names[flair - 1]] = count
+
+        codes, first, counts = np.unique(flairs, return_index=True, return_counts=True)
+        order = np.argsort(first, kind='stable')
+        total = Counter({ flair_names[code]: count for code, count in zip(codes[order].tolist(), counts[order].tolist()) })
+
+        return FlairCounts(total, by_author)
+
+    @staticmethod
+    def read(source: pathlib.Path) -> 'FlairCounts':
+        """Counts the flairs in this post archive (via its columnar export, which is refreshed if stale)."""
+
+        return FlairCounts.from_table(columnar.columns(source))
+
+    def of(self, username: str = "") -> Counter:
+        """The flair counts of this author's posts (of every post, if no author is given)."""
+
+        if (username == ""):
+            return self.total
+        else:
+            return self.by_author.get(username, Counter())
+
+    def authors(self, min_posts: int = 1) -> List[str]:
+        """The (known) authors with at least this many posts, in alphabetical order."""
+
+        return sorted(author for author, counts in self.by_author.items()
+            if author not in (None, "None") and sum(counts.values()) >= min_posts)
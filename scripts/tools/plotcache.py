@@ -0,0 +1,74 @@
+import json, os, hashlib, pathlib
+from typing import Any, Dict, Iterable, Optional
+
+#===============================================================================
+#
+#  content-hash render cache for exported plots
+#
+#-------------------------------------------------------------------------------
+#
+#  Exporting a plot (fig.write_image, via kaleido) is by far the slowest part
+#  of the plot_*.py scripts, and on most runs the data hasn't changed since
+#  the last export. Each exported PNG is recorded in plots/.render_cache.json
+#  against a key: a hash of the contents of its input files (data, plus the
+#  plotting script itself, so code changes invalidate it) and its parameters.
+#  Where a plot only depends on a slice of a data file (like one user's flair
+#  counts), that slice is passed as a parameter instead of hashing the file.
+#
+#  If a PNG exists and its recorded key matches the current one, the script
+#  can skip building and exporting the figure entirely.
+#
+#===============================================================================
+
+basedir = pathlib.Path(__file__).parent.parent
+
+sidecar = basedir / 'plots/.render_cache.json'
+
+def key(*paths: pathlib.Path, **params: Any) -> str:
+    """Hashes the contents of these files (a missing file hashes as empty), and these parameters."""
+
+    digest = hashlib.sha1()
+
+    for path in paths:
+        digest.update(str(pathlib.Path(path).name).encode())
+        try:
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+        except FileNotFoundError:
+            pass
+        digest.update(b'\0')
+
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+def entries() -> Dict[str, str]:
+    try:
+        with sidecar.open('r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def is_current(output: pathlib.Path, current: str, recorded: Optional[Dict[str, str]] = None) -> bool:
+    """Returns True if 'output' exists and was last rendered with this key
+       (checking 'recorded', if given, rather than re-reading the sidecar)."""
+
+    recorded = entries() if recorded is None else recorded
+    return output.exists() and recorded.get(output.name) == current
+
+def record(output: pathlib.Path, current: str) -> None:
+    """Records that 'output' has just been rendered with this key."""
+
+    record_many([output], [current])
+
+def record_many(outputs: Iterable[pathlib.Path], keys: Iterable[str]) -> None:
+    """Records that each of these outputs has just been rendered with its key, in one rewrite of the sidecar."""
+
+    cache = entries()
+    cache.update({ output.name: current for output, current in zip(outputs, keys) })
+
+    # write to a temporary file and rename, so a crash can't leave a corrupt cache
+    temporary = sidecar.with_suffix('.tmp')
+    with temporary.open('w') as f:
+        print(json.dumps(cache, indent=2, sort_keys=True), file=f)
+    os.replace(temporary, sidecar)
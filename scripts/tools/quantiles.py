@@ -0,0 +1,130 @@
+import random, statistics
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+#===============================================================================
+#
+#  mergeable, streaming quantile summaries
+#
+#-------------------------------------------------------------------------------
+#
+#  A QuantileSummary holds every value it is given (so its quantiles are
+#  exact) until it holds more than 'exact' of them. From then on it is a
+#  KLL-style sketch: values are kept in levels, where each value at level h
+#  stands for 2^h of the original values. When a level fills up, it is
+#  sorted and every other value (starting at a random offset) is promoted to
+#  the next level, so the sketch stays small however many values are added,
+#  while quantiles stay within a small rank error.
+#
+#  Two summaries merge by combining their levels, so summaries of separate
+#  batches of posts can be built independently and merged as they arrive.
+#  A summary can be saved (see state()) and restored later, so only the
+#  values which arrived since then need to be merged into it.
+#
+#===============================================================================
+
+class QuantileSummary:
+    """Quantiles of a stream of numbers: exact while small, sketched when large."""
+
+    def __init__(self, exact: int = 1000, k: int = 200, seed: int = 0) -> None:
+        self.exact = exact
+        self.k = k
+        self.count = 0
+        self.levels: List[List[float]] = [[]]
+
+        # a fixed seed, so the same values always give the same sketch
+        self.random = random.Random(seed)
+
+    def state(self) -> Dict[str, Any]:
+        """This summary, as JSON-serialisable data (see from_state())."""
+
+        return { "exact": self.exact, "k": self.k, "count": self.count, "levels": self.levels }
+
+    @staticmethod
+    def from_state(state: Dict[str, Any]) -> 'QuantileSummary':
+        """Restores a summary saved by state()."""
+
+        # seeded by the count, so a restored summary still compresses deterministically
+        summary = QuantileSummary(state["exact"], state["k"], seed=state["count"])
+        summary.count = state["count"]
+        summary.levels = state["levels"]
+        return summary
+
+    def __len__(self) -> int:
+        return self.count
+
+    def is_exact(self) -> bool:
+        """Returns True if no values have been discarded (yet)."""
+        return len(self.levels) == 1
+
+    def add(self, value: float) -> None:
+        self.levels[0].append(value)
+        self.count += 1
+        self.compress()
+
+    def extend(self, values: Iterable[float]) -> None:
+        values = list(values)
+        self.levels[0].extend(values)
+        self.count += len(values)
+        self.compress()
+
+    def merge(self, other: 'QuantileSummary') -> None:
+        """Adds every value summarised by 'other' to this summary."""
+
+        for height, level in enumerate(other.levels):
+            if (height == len(self.levels)):
+                self.levels.append([])
+            self.levels[height].extend(level)
+
+        self.count += other.count
+        self.compress()
+
+    def capacity(self, height: int) -> int:
+        # lower levels (lighter values) get smaller capacities, as in KLL
+        return max(2, int(self.k * (2 / 3) ** (len(self.levels) - 1 - height)))
+
+    def compress(self) -> None:
+        if (self.is_exact() and self.count <= self.exact):
+            return
+
+        height = 0
+        while (height < len(self.levels)):
+            level = self.levels[height]
+
+            if (len(level) > self.capacity(height)):
+                if (height + 1 == len(self.levels)):
+                    self.levels.append([])
+
+                level.sort()
+
+                # an odd value out stays at this level
+                kept = [level.pop()] if (len(level) % 2) else []
+                self.levels[height + 1].extend(level[self.random.randint(0, 1)::2])
+                self.levels[height] = kept
+
+            height += 1
+
+    def quantile(self, q: float) -> float:
+        """The q-quantile (0 <= q <= 1) of the values (interpolated, when exact)."""
+
+        if (self.count == 0):
+            raise ValueError("no values to summarise")
+
+        if (self.is_exact()):
+            return float(np.quantile(self.levels[0], q))
+
+        values = np.concatenate([np.asarray(level, dtype=float) for level in self.levels])
+        weights = np.concatenate([np.full(len(level), 1 << height) for height, level in enumerate(self.levels)])
+
+        order = np.argsort(values, kind='stable')
+        ranks = np.cumsum(weights[order])
+        return float(values[order][min(np.searchsorted(ranks, q * ranks[-1]), len(values) - 1)])
+
+    def median(self) -> float:
+        """The median of the values (as statistics.median, when exact)."""
+
+        if (self.is_exact() and self.count):
+            return statistics.median(self.levels[0])
+        else:
+            return self.quantile(0.5)
@@ -0,0 +1,141 @@
+import csv, json, re, pathlib
+from typing import Any, Iterable, Iterator, List, TextIO, Tuple
+
+#===============================================================================
+#
+#  methods for reading and writing post records
+#
+#-------------------------------------------------------------------------------
+#
+#  data/posts_parsed.json (written by pull_data.posts) is one big JSON array
+#  of posts. Rather than json.load()-ing the whole array, records.load()
+#  yields one post at a time, holding only that post (plus one chunk of the
+#  file) in memory, so aggregations over the posts run in constant memory.
+#
+#-------------------------------------------------------------------------------
+#
+#  data/posts_raw.csv (also written by pull_data.posts) holds one typed raw
+#  record per fetched post, as CSV with a header row. The csv module quotes
+#  and escapes every field, so titles may contain any characters at all, and
+#  each column is converted back to its type in a single pass when read.
+#
+#===============================================================================
+
+# JSON whitespace, skipped between the tokens of the top-level array
+re_whitespace = re.compile(r'[ \t\n\r]*')
+
+decoder = json.JSONDecoder()
+
+# the longest token which can fail to decode at its start when cut short: "-Infinity"
+longest_token = 9
+
+def truncated(buffer: str, error: json.JSONDecodeError) -> bool:
+    """True if this decoding error may just be the end of the buffer cutting
+       an element short (an unterminated string runs to the end of the
+       buffer, but is reported at its opening quote)."""
+
+    return (error.pos > len(buffer) - longest_token or error.msg.startswith('Unterminated string'))
+
+def iterate(file: TextIO, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Yields the elements of the top-level JSON array in this file, one at a
+       time. Raises ValueError if the file does not contain a JSON array."""
+
+    buffer = ''
+    position = 0
+    eof = False
+
+    # read the next chunk of the file, dropping what we've already consumed
+    def refill() -> bool:
+        nonlocal buffer, position, eof
+        if (eof):
+            return False
+
+        chunk = file.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+        return not eof
+
+    # skip whitespace, and return the next character ('' at the end of the file)
+    def next_token() -> str:
+        nonlocal position
+        while True:
+            position = re_whitespace.match(buffer, position).end()
+            if (position < len(buffer) or not refill()):
+                return buffer[position:position+1]
+
+    if (next_token() != '['):
+        raise ValueError('Expected a JSON array')
+    position += 1
+
+    if (next_token() == ']'):
+        return
+
+    while True:
+        next_token()
+
+        try:
+            element, end = decoder.raw_decode(buffer, position)
+
+            # a number at the end of the buffer may continue in the next chunk (even "1.5e" decodes, as 1.5)
+            if ((end == len(buffer) or buffer[end] in '.eE') and refill()):
+                continue
+
+        except json.JSONDecodeError as error:
+            # only an element cut short by the end of the buffer is worth reading more of the file for;
+            # anything else is malformed, so raise at once rather than buffering the rest of the file
+            if (truncated(buffer, error) and refill()):
+                continue
+            raise ValueError(f'Malformed JSON array element: {error}')
+
+        position = end
+        yield element
+
+        token = next_token()
+        if (token == ']'):
+            return
+        elif (token != ','):
+            raise ValueError(f"Expected ',' or ']' after a JSON array element, found {token!r}")
+        position += 1
+
+def load(path: pathlib.Path) -> Iterator[Any]:
+    """Yields the records in this JSON file (an array of records), one at a time."""
+
+    with path.open('r') as f:
+        yield from iterate(f)
+
+# typed fields of a raw post record, in file order
+post_fields: List[Tuple[str, type]] = [
+    ("title",           str),
+    ("created_utc",     float),
+    ("link_flair_text", str),
+    ("score",           int),
+    ("upvote_ratio",    float),
+    ("author",          str)]
+
+def raw_post(submission: Any) -> Tuple:
+    """Returns the raw record of a (PRAW) submission, as a typed tuple."""
+
+    # 'author' is a Redditor (or None, if deleted), and 'link_flair_text' may be None
+    return tuple(str(getattr(submission, field)) if kind is str else kind(getattr(submission, field)) for field, kind in post_fields)
+
+def write_raw(posts: Iterable[Tuple], file: TextIO) -> None:
+    """Writes these raw post records to a file, as CSV with a header row."""
+
+    writer = csv.writer(file)
+    writer.writerow([field for field, _ in post_fields])
+    writer.writerows(posts)
+
+def read_raw(file: TextIO) -> Iterator[Tuple]:
+    """Yields the raw post records in a file written by write_raw(), as typed tuples."""
+
+    reader = csv.reader(file)
+    header = next(reader, None)
+
+    if (header != [field for field, _ in post_fields]):
+        raise ValueError(f"Expected a raw post record header, found {header}")
+
+    # only the numeric columns need converting
+    converters = [kind for _, kind in post_fields]
+    for row in reader:
+        yield tuple(value if kind is str else kind(value) for kind, value in zip(converters, row))
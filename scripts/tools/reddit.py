@@ -1,10 +1,12 @@
 import os, sys, json, re, pathlib
 import praw # pip3 install praw
 
-from typing import List, Tuple, Mapping
+from typing import Iterator, List, Tuple, Mapping
 from praw import Reddit
 from praw.models import Submission, Subreddit
 
+from tools import defuzz
+
 basedir = pathlib.Path(__file__).parent
 
 #===============================================================================
@@ -37,19 +39,23 @@ basedir = pathlib.Path(__file__).parent
 #
 #===============================================================================
 
-def connect() -> praw.Reddit:
-    try:
-        with (basedir / '../../json/config.json').open('r') as f:
-            config = json.load(f)
+def open_connection() -> praw.Reddit:
+    """Like connect(), but raises an exception (rather than exiting) if the
+       connection can't be made, for callers on worker threads."""
 
-        reddit = praw.Reddit(
-                    user_agent    = "nearprog_scraper by u/_awwsmm",
-                    client_id     = config['client_id'],
-                    client_secret = config['client_secret'],
-                    username      = config['username'],
-                    password      = config['password'])
+    with (basedir / '../../json/config.json').open('r') as f:
+        config = json.load(f)
 
-        return reddit
+    return praw.Reddit(
+                user_agent    = "nearprog_scraper by u/_awwsmm",
+                client_id     = config['client_id'],
+                client_secret = config['client_secret'],
+                username      = config['username'],
+                password      = config['password'])
+
+def connect() -> praw.Reddit:
+    try:
+        return open_connection()
     except:
         print("\nERROR: json/config.json configuration file is missing")
         print("       read source of scripts/tools/reddit.py for more details")
@@ -81,34 +87,32 @@ def split_title(title: str) -> Tuple[str, str]:
         split_title = re.split(' (-|—)+ ', stripped, 1) # only split 1 time
         return (split_title[0], split_title[2]) # (artist, song)
 
-def fetch_submissions_since(connection: Reddit, utc_timestamp: int) -> List[Submission]:
-    """Return all r/nearprog submissions since the given UTC UNIX timestamp."""
+def stream_submissions_since(connection: Reddit, utc_timestamp: int) -> Iterator[Submission]:
+    """Lazily yield r/nearprog submissions since the given UTC UNIX timestamp, newest first."""
 
-    # Sort posts oldest -> newest, so oldest post is at head of list
-    def fetch_n_most_recent_posts(n: int) -> List[Submission]:
-        return sorted(list(connection.subreddit("nearprog").new(limit=n)),
-            key = lambda x: x.created_utc)
+    # The "new" listing is already sorted newest -> oldest, and PRAW requests it
+    # one page (of 100) at a time, following the 'after' cursor. So we only
+    # need to walk it once, and stop at the first post that isn't recent enough.
 
-    earliest_post_timestamp = utc_timestamp + 1
-    fetch_multiplier = -1
+    for submission in connection.subreddit("nearprog").new(limit=None):
+        if (submission.created_utc < utc_timestamp):
+            return
+        yield submission
 
-    # To get all posts since <timestamp>, get the newest 100 posts and check the
-    # 'created_utc' time of the earliest post. If it's not early enough, get the
-    # next 100, 200, 400, etc. until the earliest post is earlier than 'since'.
+def stream_songs_since(connection: Reddit, utc_timestamp: int) -> Iterator[Submission]:
+    """Lazily yield r/nearprog song submissions since the given UTC UNIX timestamp, newest first."""
 
-    while (earliest_post_timestamp > utc_timestamp):
-        fetch_multiplier += 1
-        n_to_fetch = 2**fetch_multiplier * 100
-        most_recent_posts = fetch_n_most_recent_posts(n_to_fetch)
-        earliest_post_timestamp = most_recent_posts[0].created_utc
+    return filter(is_song, stream_submissions_since(connection, utc_timestamp))
 
-    # we now have a list of all submissions since the specified timestamp
-    return [p for p in most_recent_posts if p.created_utc >= utc_timestamp]
+def fetch_submissions_since(connection: Reddit, utc_timestamp: int) -> List[Submission]:
+    """Return all r/nearprog submissions since the given UTC UNIX timestamp, oldest first."""
+
+    return list(reversed(list(stream_submissions_since(connection, utc_timestamp))))
 
 def fetch_songs_since(connection: Reddit, utc_timestamp: int) -> List[Submission]:
-    """Return all r/nearprog song submissions since the given UTC UNIX timestamp."""
+    """Return all r/nearprog song submissions since the given UTC UNIX timestamp, oldest first."""
 
-    return [x for x in fetch_submissions_since(connection, utc_timestamp) if is_song(x)]
+    return list(reversed(list(stream_songs_since(connection, utc_timestamp))))
 
 def defuzzed_submission_score(connection: Reddit, submission: Submission, iterations: int) -> float:
     """"De-fuzzes" a single submission's score by requesting the score from
@@ -119,24 +123,38 @@ def defuzzed_submission_score(connection: Reddit, submission: Submission, iterat
         score_sum += connection.submission(submission.id).score
     return (score_sum / iterations)
 
-def defuzzed_submissions_scores(connection: Reddit, submissions: List[Submission], iterations: int) -> Mapping[Submission, List[int]]:
+def t3_(id: str) -> str:
+    """Return the fullname (t3_...) of the submission with the given id."""
+
+    if id.startswith('t3_'):
+        return id
+    else:
+        return f't3_{id}'
+
+def defuzzed_submissions_scores(connection: Reddit, submissions: List[Submission], iterations: int, workers: int = 1) -> Mapping[Submission, List[int]]:
     """"De-fuzzes" multiple submissions' scores by batch requesting each score
-        from Reddit multiple times, and calculating the average score for each."""
+        from Reddit multiple times, and calculating the average score for each.
 
-    def t3_(id: str) -> str:
-        if id.startswith('t3_'):
-            return id
-        else:
-            return f't3_{id}'
+        Sampling rounds run concurrently on 'workers' threads (see tools/defuzz.py)."""
 
     # scores is a dict mapping submission ids to lists of scores
     ids = [ t3_(submission.id) for submission in submissions ]
-    scores = { i : list() for i in ids }
-
-    for _ in range(iterations):
-        for submission in connection.info(ids):
-            scores[t3_(submission.id)].append(submission.score)
+    scores = defuzz.sample_scores(connection, open_connection, ids, iterations, workers)
 
     # map given submissions to submission ids
     idmap = { t3_(submission.id) : submission for submission in submissions }
     return { idmap[i] : scores[i] for i in ids }
+
+def adaptively_defuzzed_submissions_scores(connection: Reddit, submissions: List[Submission], places: int, max_iterations: int, workers: int = 1) -> Tuple[Mapping[Submission, List[int]], int, int]:
+    """"De-fuzzes" multiple submissions' scores like defuzzed_submissions_scores(),
+        but stops sampling each submission once it is clearly inside or outside
+        the top 'places' submissions (see tools/defuzz.py). Each round's batched
+        requests are run on 'workers' threads.
+
+        Returns the mapping, the number of API requests made, and the number saved."""
+
+    ids = [ t3_(submission.id) for submission in submissions ]
+    scores, requests, saved = defuzz.adaptive_scores(connection, open_connection, ids, places, max_iterations, workers=workers)
+
+    idmap = { t3_(submission.id) : submission for submission in submissions }
+    return ({ idmap[i] : scores[i] for i in ids }, requests, saved)
@@ -0,0 +1,54 @@
+import sys, pathlib, statistics
+import numpy as np
+
+sys.path.append(str(pathlib.Path(__file__).parent.parent))
+from tools import columnar, quantiles
+import plot_upvotes_downvotes_by_genre as votes
+
+def test_exact_median_matches_statistics():
+    summary = quantiles.QuantileSummary()
+    summary.extend([5, 1, 4, 2])
+
+    assert summary.is_exact()
+    assert summary.median() == statistics.median([5, 1, 4, 2])
+
+def test_restored_summary_merges_like_the_original():
+    values = list(range(5000))
+    summary = quantiles.QuantileSummary(exact=100, k=50)
+    summary.extend(values[:2500])
+
+    restored = quantiles.QuantileSummary.from_state(summary.state())
+    restored.extend(values[2500:])
+
+    assert len(restored) == 5000
+    assert abs(restored.median() - statistics.median(values)) < 5000 * 0.05
+
+def posts(count: int, seed: int) -> columnar.Table:
+    generator = np.random.default_rng(seed)
+
+    return columnar.Table({
+        "created_utc":     np.arange(count, dtype=float),
+        "score":           generator.integers(-5, 200, count),
+        "upvote_ratio":    generator.uniform(0.3, 1.0, count),
+        "link_flair_text": generator.integers(-1, 3, count).astype(np.int32),
+        "author":          generator.integers(0, 2, count).astype(np.int32)
+    }, { "link_flair_text": ["Rock", "Jazz", "TBD"], "author": ["someone", "None"] })
+
+def test_incremental_summaries_match_a_full_rebuild(tmp_path):
+    table = posts(600, 1)
+    earlier = columnar.Table({ name: column[:400] for name, column in table.columns.items() }, table.categories)
+
+    votes.update_summaries(earlier, tmp_path / "incremental.json")
+    incremental = votes.update_summaries(table, tmp_path / "incremental.json")
+    rebuilt = votes.update_summaries(table, tmp_path / "rebuilt.json")
+
+    assert "TBD" not in rebuilt
+    assert list(incremental) == list(rebuilt)
+    for genre, (upvotes, downvotes) in rebuilt.items():
+        assert len(incremental[genre][0]) == len(upvotes)
+        assert incremental[genre][0].median() == upvotes.median()
+        assert incremental[genre][1].median() == downvotes.median()
+
+    # nothing new: the saved summaries are unchanged
+    again = votes.update_summaries(table, tmp_path / "incremental.json")
+    assert [len(upvotes) for upvotes, _ in again.values()] == [len(upvotes) for upvotes, _ in rebuilt.values()]
@@ -0,0 +1,27 @@
+import io, sys, json, pathlib
+import pytest
+
+sys.path.append(str(pathlib.Path(__file__).parent.parent))
+from tools import records
+
+def test_iterate_matches_json_load():
+    elements = [{"title": "A - B \"live\" é", "score": -1.5e3}, None, True, -12, "\U0001f600", [1, [2]], {}]
+    text = ' [ ' + ' , '.join(json.dumps(element, ensure_ascii=False) for element in elements) + ' ] '
+
+    for chunk_size in [1, 2, 3, 7, 64]:
+        assert list(records.iterate(io.StringIO(text), chunk_size)) == elements
+
+def test_iterate_fails_fast_on_malformed_elements():
+
+    class Counting(io.StringIO):
+        reads = 0
+        def read(self, size=-1):
+            Counting.reads += 1
+            return super().read(size)
+
+    text = '[{"score": 1}, {"score": nope}, ' + ', '.join(['{"score": 1}'] * 1000) + ']'
+
+    with pytest.raises(ValueError):
+        list(records.iterate(Counting(text), 64))
+
+    assert Counting.reads < 5
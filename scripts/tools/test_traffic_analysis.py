@@ -0,0 +1,36 @@
+import sys, pathlib
+import numpy as np
+
+sys.path.append(str(pathlib.Path(__file__).parent.parent))
+from tools import traffic_analysis
+
+# expected values are plotly's (quartilemethod 'linear': interpolated at position n*p - 0.5)
+
+def test_box_stats_quartiles_match_plotly():
+    stats = traffic_analysis.box_stats(np.zeros(4, dtype=np.int64), np.array([4.0, 2.0, 1.0, 3.0]))
+
+    assert list(stats.positions) == [0]
+    assert (stats.q1[0], stats.median[0], stats.q3[0]) == (1.5, 2.5, 3.5)
+    assert (stats.lowerfence[0], stats.upperfence[0]) == (1.0, 4.0)
+    assert len(stats.outlier_values) == 0
+
+def test_box_stats_fences_and_outliers_match_plotly():
+    values = np.array([1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 100.0, 10.0, 20.0, np.nan])
+    buckets = np.array([0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1])
+    stats = traffic_analysis.box_stats(buckets, values)
+
+    # bucket 0: q1 = 2.5, q3 = 6.5, so the fences are [-3.5, 12.5]
+    assert list(stats.positions) == [0, 1]
+    assert (stats.q1[0], stats.median[0], stats.q3[0]) == (2.5, 4.5, 6.5)
+    assert (stats.lowerfence[0], stats.upperfence[0]) == (1.0, 7.0)
+    assert (stats.q1[1], stats.median[1], stats.q3[1]) == (10.0, 15.0, 20.0)
+    assert list(stats.outlier_positions) == [0]
+    assert list(stats.outlier_values) == [100.0]
+
+def test_promotion_days_skips_missing_days():
+    day = 24 * 60 * 60
+    posted, indices = traffic_analysis.promotion_days(np.array([0, day, 3 * day]),
+        np.array([100.0, 2 * day + 5.0, 3 * day + 9.0, 9 * day + 1.0]))
+
+    assert list(posted) == [True, False, True, False]
+    assert list(indices) == [0, 2]
@@ -0,0 +1,125 @@
+import hashlib, pathlib
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from tools import traffic_store
+
+#===============================================================================
+#
+#  vectorized analyses of subreddit traffic, for plot_traffic.py
+#
+#-------------------------------------------------------------------------------
+#
+#  Hourly traffic is "folded" onto one week (or one day) by bucketing each
+#  hour by its hour-of-week (or hour-of-day), and each bucket is summarised
+#  by its box plot statistics, so plots only need to draw one box per bucket
+#  (plus its outliers) rather than every hourly value. Fold statistics are
+#  cached on disk, keyed by a hash of the traffic itself, so they're only
+#  recomputed when new traffic has been pulled.
+#
+#  Promotion posts are joined to days by binary search on the (sorted) day
+#  timestamps; promotions on days without traffic data are skipped.
+#
+#===============================================================================
+
+# bumped whenever box_stats() changes, so cached folds are recomputed
+fold_version = 2
+
+class BoxStats(NamedTuple):
+    """Box plot statistics per bucket (as plotly's q1 / median / q3 /
+       lowerfence / upperfence signature), plus the outliers of every bucket."""
+
+    positions: np.ndarray
+    q1: np.ndarray
+    median: np.ndarray
+    q3: np.ndarray
+    lowerfence: np.ndarray
+    upperfence: np.ndarray
+    mean: np.ndarray
+    outlier_positions: np.ndarray
+    outlier_values: np.ndarray
+
+def hour_buckets(timestamps: np.ndarray, period: int) -> np.ndarray:
+    """The bucket (0 <= bucket < period) of each hourly timestamp, counting from the first hour."""
+
+    hours = timestamps // traffic_store.hour
+    return (hours - hours.min()) % period
+
+def box_stats(buckets: np.ndarray, values: np.ndarray) -> BoxStats:
+    """Summarises the values in each bucket, like plotly's default box plot:
+       quartiles interpolated at position n*p - 0.5 (plotly's quartilemethod
+       'linear', which is numpy's 'hazen' method), whiskers at the most
+       extreme values within 1.5 IQR of the box, and every value beyond them
+       an outlier."""
+
+    known = ~np.isnan(values)
+    buckets, values = buckets[known], values[known]
+
+    # sort by bucket, then by value, so each bucket is a sorted slice
+    order = np.lexsort((values, buckets))
+    buckets, values = buckets[order], values[order]
+    positions, starts = np.unique(buckets, return_index=True)
+    ends = np.append(starts[1:], len(values))
+
+    stats = np.empty((len(positions), 6))
+    outliers = np.zeros(len(values), dtype=bool)
+
+    for index, (start, end) in enumerate(zip(starts, ends)):
+        bucket = values[start:end]
+        q1, median, q3 = np.percentile(bucket, [25, 50, 75], method='hazen')
+        iqr = q3 - q1
+        inside = (bucket >= q1 - 1.5 * iqr) & (bucket <= q3 + 1.5 * iqr)
+        stats[index] = [q1, median, q3, bucket[inside].min(), bucket[inside].max(), bucket.mean()]
+        outliers[start:end] = ~inside
+
+    return BoxStats(positions, *stats.T, buckets[outliers], values[outliers])
+
+def fold(hourly: traffic_store.Series, period: int, cachedir: Optional[pathlib.Path] = None) -> Tuple[BoxStats, BoxStats]:
+    """Box plot statistics of unique and total pageviews, per hour of a
+       'period' hours long, cached in 'cachedir' (if given) by data version."""
+
+    key = hashlib.sha1(b''.join([
+        np.int64(fold_version).tobytes(), np.int64(period).tobytes(), hourly.timestamps.tobytes(), hourly.uniques.tobytes(), hourly.pageviews.tobytes()
+    ])).hexdigest()[:16]
+
+    cached = cachedir / f"fold_{period}_{key}.npz" if cachedir else None
+
+    if (cached and cached.exists()):
+        with np.load(cached) as arrays:
+            return (BoxStats(*(arrays[f"uniques_{field}"] for field in BoxStats._fields)),
+                    BoxStats(*(arrays[f"pageviews_{field}"] for field in BoxStats._fields)))
+
+    buckets = hour_buckets(hourly.timestamps, period)
+    uniques = box_stats(buckets, hourly.uniques)
+    pageviews = box_stats(buckets, hourly.pageviews)
+
+    if (cached):
+        cachedir.mkdir(parents=True, exist_ok=True)
+
+        # older versions of this fold are stale now
+        for stale in cachedir.glob(f"fold_{period}_*.npz"):
+            stale.unlink()
+
+        np.savez(cached,
+            **{ f"uniques_{field}": value for field, value in zip(BoxStats._fields, uniques) },
+            **{ f"pageviews_{field}": value for field, value in zip(BoxStats._fields, pageviews) })
+
+    return (uniques, pageviews)
+
+def total_users(subscriptions: np.ndarray) -> np.ndarray:
+    """Cumulative subscriptions (oldest first), treating unknown days as zero."""
+
+    return np.nancumsum(subscriptions)
+
+def promotion_days(day_timestamps: np.ndarray, created_utc: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Joins promotions to (sorted) days by timestamp. Returns a mask of the
+       promotions posted on a known day, and the index of each one's day."""
+
+    rounded = (created_utc - created_utc % traffic_store.day).astype(np.int64)
+    index = np.searchsorted(day_timestamps, rounded)
+
+    found = index < len(day_timestamps)
+    found[found] = day_timestamps[index[found]] == rounded[found]
+
+    return (found, index[found])
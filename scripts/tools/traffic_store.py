@@ -0,0 +1,265 @@
+import json, os, re, glob, time, pathlib
+from typing import Callable, Dict, List, NamedTuple, Optional, TextIO
+
+import numpy as np
+
+#===============================================================================
+#
+#  methods for merging subreddit traffic snapshots
+#
+#-------------------------------------------------------------------------------
+#
+#  Reddit only keeps a few days of hourly traffic (and a little more daily
+#  and monthly traffic), so pull_data.traffic saves a snapshot of it every
+#  day, and folds each new snapshot into data/traffic_merged.json.
+#
+#  Each granularity ("hour", "day", "month") is a list of rows, newest first,
+#  where each row starts with its timestamp. When a snapshot and the merged
+#  traffic both have a row for the same timestamp, the snapshot's row wins,
+#  as it is the more recent. A new snapshot only overlaps the newest few rows
+#  of the merged traffic, so the merge step itself costs O(size of the
+#  snapshot), and the older snapshot files are never read again (though each
+#  run still reads and rewrites the whole merged history, in O(history)).
+#
+#  If traffic_merged.json does not exist yet, it is rebuilt by folding every
+#  saved snapshot into it, oldest first.
+#
+#  For analysis, a TrafficStore holds the merged traffic as NumPy arrays per
+#  granularity, and answers range(granularity, start, end) queries.
+#
+#===============================================================================
+
+Traffic = Dict[str, List[List[int]]]
+
+# seconds per hour / day
+hour = 60 * 60
+day = 24 * hour
+
+def today() -> int:
+    """The timestamp of the start of the current (UTC) day."""
+    return int(time.time()) // day * day
+
+def dumps(traffic: Traffic) -> str:
+    """Formats traffic as JSON, with each row on a single line."""
+
+    output = json.dumps(traffic, indent=2)
+    output = re.sub(r'  \[\s+',      r'  [',  output)
+    output = re.sub(r'([0-9]),\s+',  r'\1, ', output)
+    output = re.sub(r'([0-9])\s+\]', r'\1]',  output)
+    return output
+
+def is_compact(traffic: Traffic) -> bool:
+    """Returns True if traffic is made only of lists of rows of integers."""
+
+    return (isinstance(traffic, dict) and len(traffic) > 0 and
+        all(isinstance(rows, list) and all(isinstance(row, list) and all(type(value) is int for value in row) for row in rows)
+            for rows in traffic.values()))
+
+def write(traffic: Traffic, file: TextIO) -> None:
+    """Writes traffic to a file, exactly as print(dumps(traffic)) would, but
+       one row at a time, without building the whole document in memory."""
+
+    # anything but rows of integers is left to the general (regex) formatting
+    if (not is_compact(traffic)):
+        print(dumps(traffic), file=file)
+        return
+
+    file.write('{\n')
+
+    for index, (granularity, rows) in enumerate(traffic.items()):
+        file.write(f'  {json.dumps(granularity)}: ')
+
+        if (rows):
+            file.write('[\n')
+            file.writelines(f'    [{", ".join(map(str, row))}],\n' for row in rows[:-1])
+            file.write(f'    [{", ".join(map(str, rows[-1]))}]\n  ]')
+        else:
+            file.write('[]')
+
+        file.write(',\n' if index < len(traffic) - 1 else '\n')
+
+    file.write('}\n')
+
+def fold_rows(rows: List[List[int]], snapshot: List[List[int]]) -> List[List[int]]:
+    """Folds the rows of a snapshot into rows (both newest first, by timestamp)."""
+
+    if (not snapshot):
+        return rows
+
+    # newest row per timestamp in the snapshot, newest first
+    new = sorted({ row[0]: row for row in snapshot }.values(), reverse = True)
+
+    # only the (newest) rows at or after the snapshot's oldest timestamp can overlap it
+    oldest = new[-1][0]
+    overlap = 0
+    while (overlap < len(rows) and rows[overlap][0] >= oldest):
+        overlap += 1
+
+    head = { row[0]: row for row in rows[:overlap] }
+    head.update({ row[0]: row for row in new })
+
+    return sorted(head.values(), reverse = True) + rows[overlap:]
+
+def fold(merged: Traffic, snapshot: Traffic) -> Traffic:
+    """Folds a (newer) snapshot into the merged traffic, in place. Returns the merged traffic."""
+
+    for granularity, rows in snapshot.items():
+        merged[granularity] = fold_rows(merged.get(granularity, []), rows)
+
+    return merged
+
+def read(path: pathlib.Path) -> Traffic:
+    with path.open('r') as infile:
+        return json.load(infile)
+
+def rebuild(datadir: pathlib.Path) -> Traffic:
+    """Merges every traffic snapshot saved in this directory, oldest first."""
+
+    merged: Traffic = {}
+    for snapshot in sorted(glob.glob(str(datadir / "traffic_20*h.json"))):
+        fold(merged, read(pathlib.Path(snapshot)))
+
+    return merged
+
+def update(datadir: pathlib.Path, snapshot: Traffic) -> Traffic:
+    """Folds a new snapshot into datadir/traffic_merged.json, creating it from
+       the saved snapshots if it doesn't exist. Returns the merged traffic."""
+
+    merged_file = datadir / "traffic_merged.json"
+
+    if (merged_file.exists()):
+        merged = fold(read(merged_file), snapshot)
+    else:
+        # the new snapshot has already been saved, so it's folded in (last) here
+        merged = rebuild(datadir)
+
+    # this is the only copy of the merged history, so write it to a temporary
+    # file and rename it, so a crash mid-write can't leave it truncated
+    temporary = merged_file.with_suffix('.json.tmp')
+    with temporary.open('w') as outfile:
+        write(merged, outfile)
+    os.replace(temporary, merged_file)
+
+    return merged
+
+class Series(NamedTuple):
+    """Traffic at one granularity, oldest first. Values which are unknown
+       (e.g. the uniques of a rolled-up day) are NaN."""
+
+    timestamps: np.ndarray
+    uniques: np.ndarray
+    pageviews: np.ndarray
+    subscriptions: np.ndarray
+    rolled_up: np.ndarray
+
+class TrafficStore:
+    """Traffic time series, one set of arrays per granularity, sorted by
+       timestamp, with hour -> day -> month rollups and range queries.
+
+       Rows reported by Reddit always take precedence. A day (or month) which
+       Reddit didn't report, but for which every hour (or day) is known, is
+       rolled up: pageviews and subscriptions add up, but uniques don't (the
+       same user can visit in many hours), so a rolled-up row's uniques are NaN."""
+
+    granularities = ["hour", "day", "month"]
+    fields = ["uniques", "pageviews", "subscriptions"]
+
+    def __init__(self) -> None:
+        self.timestamps = { g: np.empty(0, dtype=np.int64) for g in TrafficStore.granularities }
+        self.values = { g: np.empty((0, len(TrafficStore.fields))) for g in TrafficStore.granularities }
+        self.rolled_up = { g: np.empty(0, dtype=bool) for g in TrafficStore.granularities }
+
+    @staticmethod
+    def from_traffic(traffic: Traffic) -> 'TrafficStore':
+        store = TrafficStore()
+        store.ingest(traffic)
+        return store
+
+    @staticmethod
+    def read(path: pathlib.Path) -> 'TrafficStore':
+        return TrafficStore.from_traffic(read(path))
+
+    def upsert(self, granularity: str, timestamps: np.ndarray, values: np.ndarray, rolled_up: bool) -> None:
+        """Adds rows at this granularity; new rows replace existing rows with the same timestamp."""
+
+        all_timestamps = np.concatenate([timestamps, self.timestamps[granularity]])
+        all_values = np.concatenate([values, self.values[granularity]])
+        all_rolled_up = np.concatenate([np.full(len(timestamps), rolled_up), self.rolled_up[granularity]])
+
+        # np.unique() keeps the first occurrence of each timestamp, i.e. the new row
+        unique, first = np.unique(all_timestamps, return_index=True)
+
+        self.timestamps[granularity] = unique
+        self.values[granularity] = all_values[first]
+        self.rolled_up[granularity] = all_rolled_up[first]
+
+    def ingest(self, traffic: Traffic) -> None:
+        """Adds the rows of a traffic snapshot (or of the merged traffic), then rolls up any gaps."""
+
+        for granularity in TrafficStore.granularities:
+            rows = traffic.get(granularity, [])
+            if (not rows):
+                continue
+
+            # rows are [timestamp, uniques, pageviews, (subscriptions)]; missing fields are NaN
+            values = np.full((len(rows), len(TrafficStore.fields)), np.nan)
+            for index, row in enumerate(rows):
+                values[index, :len(row) - 1] = row[1:len(TrafficStore.fields) + 1]
+
+            timestamps = np.array([row[0] for row in rows], dtype=np.int64)
+            self.upsert(granularity, timestamps, values, False)
+
+        self.rollup("hour", "day", lambda t: t - t % day, lambda t: day // hour)
+        self.rollup("day", "month", month_start, days_in_month)
+
+    def rollup(self, fine: str, coarse: str, bucket: Callable[[np.ndarray], np.ndarray], size: Callable[[np.ndarray], np.ndarray]) -> None:
+        """Adds a rolled-up 'coarse' row for every complete 'coarse' period of
+           'fine' rows which has no reported 'coarse' row."""
+
+        timestamps = self.timestamps[fine]
+        if (len(timestamps) == 0):
+            return
+
+        buckets = bucket(timestamps)
+        starts, first, counts = np.unique(buckets, return_index=True, return_counts=True)
+
+        # only complete periods, which Reddit didn't report
+        reported = self.timestamps[coarse][~self.rolled_up[coarse]]
+        wanted = (counts == size(starts)) & ~np.isin(starts, reported)
+        if (not wanted.any()):
+            return
+
+        # pageviews and subscriptions add up (NaN if unknown in any row); uniques don't
+        sums = np.add.reduceat(self.values[fine], first, axis=0)[wanted]
+        sums[:, TrafficStore.fields.index("uniques")] = np.nan
+
+        self.upsert(coarse, starts[wanted], sums, True)
+
+    def range(self, granularity: str, start: Optional[int] = None, end: Optional[int] = None, rollups: bool = True) -> Series:
+        """Returns the traffic in [start, end) at this granularity (either may be None), oldest first."""
+
+        timestamps = self.timestamps[granularity]
+        lo = 0 if start is None else np.searchsorted(timestamps, start, side='left')
+        hi = len(timestamps) if end is None else np.searchsorted(timestamps, end, side='left')
+
+        rolled_up = self.rolled_up[granularity][lo:hi]
+        keep = slice(None) if rollups else ~rolled_up
+        values = self.values[granularity][lo:hi][keep]
+
+        return Series(timestamps[lo:hi][keep], values[:, 0], values[:, 1], values[:, 2], rolled_up[keep])
+
+    def first_active(self, granularity: str) -> Optional[int]:
+        """Returns the timestamp of the first row with any pageviews (Reddit
+           reports zeros for the days before the subreddit was created)."""
+
+        active = np.flatnonzero(self.values[granularity][:, TrafficStore.fields.index("pageviews")] > 0)
+        return int(self.timestamps[granularity][active[0]]) if len(active) else None
+
+def month_start(timestamps: np.ndarray) -> np.ndarray:
+    """The UTC timestamp of the first day of the month of each timestamp."""
+
+    return timestamps.astype('datetime64[s]').astype('datetime64[M]').astype('datetime64[s]').astype(np.int64)
+
+def days_in_month(starts: np.ndarray) -> np.ndarray:
+    months = starts.astype('datetime64[s]').astype('datetime64[M]')
+    return ((months + 1).astype('datetime64[D]') - months.astype('datetime64[D]')).astype(np.int64)